@@ -0,0 +1,55 @@
+import os
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from data.Export import ExportCancelled, ExportMonitor, export_segment
+
+
+class ExportWorkerSignals(QObject):
+    # samples written, total samples (per signal)
+    progress = pyqtSignal(int, int)
+    # file path, error message ("" on success, "cancelled" if cancelled)
+    finished = pyqtSignal(str, str)
+
+
+class ExportWorker(QRunnable, ExportMonitor):
+    """
+    Exports a segment of signals on a QThreadPool thread, see data.Export.export_segment.
+    """
+
+    def __init__(self, file_path, timeseries, start_time, stop_time, dtype="float64"):
+        QRunnable.__init__(self)
+        self.file_path = file_path
+        self.timeseries = list(timeseries)
+        self.start_time = start_time
+        self.stop_time = stop_time
+        self.dtype = dtype
+        self.signals = ExportWorkerSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        Asks the worker to stop at the next chunk, the partial file is removed.
+        """
+        self.cancel_event.set()
+
+    def run(self):
+        error = ""
+        try:
+            export_segment(self.file_path, self.timeseries, self.start_time, self.stop_time, self.dtype, monitor=self)
+        except ExportCancelled:
+            error = "cancelled"
+        except Exception as e:
+            error = str(e)
+            print(f"Error exporting to {os.path.basename(self.file_path)}: {e}")
+        self.signals.finished.emit(self.file_path, error)
+
+    ########################
+    # ExportMonitor Events #
+    ########################
+    def update(self, samples_written, total_samples):
+        self.signals.progress.emit(samples_written, total_samples)
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
@@ -0,0 +1,114 @@
+import numpy as np
+from PyQt6.QtCore import QTimer
+
+from data.MinMaxPyramid import decimate_minmax
+from data.RingBuffer import RingBuffer
+
+LIVE_FRAME_RATE = 30  # Maximum number of refreshes per second of the live panels
+
+
+class LiveView:
+    """
+    Draws the content of a ring buffer on the three panels of the viewer at a capped frame rate.
+    The overview shows the whole buffer, the interval panel its latest samples and the FFT panel their spectrum.
+    The panels keep their lines and only update their data, every step is vectorized over the buffer.
+    """
+
+    def __init__(
+        self,
+        ring_buffer: RingBuffer,
+        sampling_rate,
+        channel_names,
+        overview_canvas,
+        interval_canvas,
+        spectrum_canvas,
+        frame_rate=LIVE_FRAME_RATE,
+    ):
+        self.ring_buffer = ring_buffer
+        self.sampling_rate = float(sampling_rate)
+        self.channel_names = channel_names
+        self.overview_canvas = overview_canvas
+        self.interval_canvas = interval_canvas
+        self.spectrum_canvas = spectrum_canvas
+        self.interval_size = 500  # Number of samples of the interval and FFT panels
+        self.spectrum_channel = 0  # Channel shown on the FFT panel
+        self.last_drawn = -1  # ring_buffer.total_written at the last refresh
+        self.timer = QTimer()
+        self.timer.setInterval(int(1000 / frame_rate))
+        self.timer.timeout.connect(self.refresh)
+
+    def start(self):
+        """
+        Creates the lines of the panels and starts refreshing them.
+        """
+        self.overview_lines = self.create_lines(self.overview_canvas, "Time (Seconds)", "Amplitude")
+        self.interval_lines = self.create_lines(self.interval_canvas, "Time (Seconds)", "Amplitude")
+        self.spectrum_canvas.axes.clear()
+        (self.spectrum_line,) = self.spectrum_canvas.axes.plot([], [])
+        self.spectrum_canvas.axes.set_xlabel("Frequency (Hz)")
+        self.spectrum_canvas.axes.set_ylabel("amplitude")
+        self.spectrum_canvas.axes.set_title("FFT applied on interval")
+        self.spectrum_canvas.axes.set_xlim(0, self.sampling_rate / 2)
+        self.last_drawn = -1
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def create_lines(self, canvas, x_label, y_label):
+        canvas.axes.clear()
+        lines = [canvas.axes.plot([], [], label=name)[0] for name in self.channel_names]
+        canvas.axes.legend(loc="upper left")
+        canvas.axes.set_xlabel(x_label)
+        canvas.axes.set_ylabel(y_label)
+        return lines
+
+    def refresh(self):
+        """
+        Redraws the panels from the latest samples, skipped if nothing arrived since the last refresh.
+        """
+        if self.ring_buffer.total_written == self.last_drawn:
+            return
+        samples, first_index = self.ring_buffer.latest()
+        self.last_drawn = first_index + samples.shape[1]
+        if samples.shape[1] < 2:
+            return
+        start_time = first_index / self.sampling_rate
+
+        # Overview: min/max envelope of the whole buffer, about two points per pixel
+        indices, envelope = decimate_minmax(samples, self.overview_canvas.axes.bbox.width)
+        times = start_time + indices / self.sampling_rate
+        for line, values in zip(self.overview_lines, envelope):
+            line.set_data(times, values)
+        self.overview_canvas.axes.set_xlim(
+            start_time, start_time + self.ring_buffer.capacity / self.sampling_rate
+        )
+        self.set_ylim(self.overview_canvas, envelope)
+        self.overview_canvas.draw_idle()
+
+        # Interval: latest interval_size samples
+        interval = samples[:, -self.interval_size :]
+        interval_start = self.last_drawn - interval.shape[1]
+        times = (interval_start + np.arange(interval.shape[1])) / self.sampling_rate
+        for line, values in zip(self.interval_lines, interval):
+            line.set_data(times, values)
+        self.interval_canvas.axes.set_xlim(times[0], times[-1])
+        self.set_ylim(self.interval_canvas, interval)
+        self.interval_canvas.axes.set_title(f"interval view on {interval.shape[1]} samples")
+        self.interval_canvas.draw_idle()
+
+        # Spectrum of the interval of the selected channel
+        channel = min(self.spectrum_channel, samples.shape[0] - 1)
+        spectrum = np.abs(np.fft.rfft(interval[channel])) / interval.shape[1]
+        freq = np.fft.rfftfreq(interval.shape[1], 1 / self.sampling_rate)
+        self.spectrum_line.set_data(freq, spectrum)
+        self.spectrum_canvas.axes.set_ylim(0, max(float(spectrum.max()), 1e-12) * 1.05)
+        self.spectrum_canvas.draw_idle()
+
+    def set_ylim(self, canvas, values):
+        finite = values[np.isfinite(values)]
+        if finite.size == 0:
+            return
+        low, high = float(finite.min()), float(finite.max())
+        margin = (high - low) * 0.05 or 1.0
+        canvas.axes.set_ylim(low - margin, high + margin)
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from data.Alignment import Aligner
+from data.Timeseries import LoadCancelled, LoadMonitor, Timeseries, load_data_file
+
+
+class LoadWorkerSignals(QObject):
+    # bytes read, total bytes, channels done, total channels, estimated seconds left (-1 while unknown)
+    progress = pyqtSignal(int, int, int, int, float)
+    timeseries_loaded = pyqtSignal(list)
+    # file path, True if the load was cancelled
+    finished = pyqtSignal(str, bool)
+
+
+class LoadWorker(QRunnable, LoadMonitor):
+    """
+    Loads a CSV or XDF file on a QThreadPool thread.
+    Progress and the timeseries are sent back to the GUI thread through the signals of self.signals.
+    Files are parsed (and cached) with their native samples. The channels of CSV files are delivered as their aligned
+    views at the sampling rate of the viewer, XDF streams keep their own rate.
+    """
+
+    def __init__(
+        self, file_path, sampling_rate, cache=None, stream_ids=None, disk_backed=False, storage=None, aligner=None
+    ):
+        QRunnable.__init__(self)
+        self.file_path = file_path
+        self.sampling_rate = sampling_rate  # Rate of the views of the CSV channels, None to keep their native samples
+        self.aligner = aligner if aligner is not None else Aligner()  # Produces and caches the views
+        self.cache = cache
+        self.stream_ids = stream_ids  # XDF streams to load, all by default
+        self.disk_backed = disk_backed  # True to keep the parsed data in memory-mapped files
+        self.storage = storage  # Type the channels are stored in, None for the parsed type
+        self.signals = LoadWorkerSignals()
+        self.cancel_event = threading.Event()
+        self.start_time = None
+
+    def cancel(self):
+        """
+        Asks the worker to stop at the next chunk or stream.
+        """
+        self.cancel_event.set()
+
+    def run(self):
+        self.start_time = time.monotonic()
+        cancelled = False
+        try:
+            load_data_file(
+                self.file_path,
+                None,
+                self.cache,
+                monitor=self,
+                stream_ids=self.stream_ids,
+                disk_backed=self.disk_backed,
+                storage=self.storage,
+            )
+        except LoadCancelled:
+            cancelled = True
+        except Exception as e:
+            print(f"Error loading {os.path.basename(self.file_path)}: {e}")
+        self.signals.finished.emit(self.file_path, cancelled)
+
+    ######################
+    # LoadMonitor Events #
+    ######################
+    def update(self, bytes_read, total_bytes, channels_done, total_channels):
+        elapsed = time.monotonic() - self.start_time
+        eta = -1.0
+        if 0 < bytes_read < total_bytes:
+            eta = elapsed * (total_bytes - bytes_read) / bytes_read
+        elif total_bytes > 0 and bytes_read >= total_bytes:
+            eta = 0.0
+        self.signals.progress.emit(bytes_read, total_bytes, channels_done, total_channels, eta)
+
+    def deliver(self, timeseries):
+        if self.sampling_rate and not self.file_path.endswith((".xdf", ".xdfz")):
+            timeseries = self.views_at_rate(timeseries)
+        self.signals.timeseries_loaded.emit(list(timeseries))
+
+    def views_at_rate(self, timeseries):
+        """
+        Returns timeseries holding the aligned views of the native timeseries at self.sampling_rate.
+        """
+        views = []
+        times = {}  # Channels of a file share their timestamps, like the channels of a store
+        for ts in timeseries:
+            self.check_cancelled()
+            view = self.aligner.aligned(ts, self.sampling_rate)
+            key = (view.first_index, len(view.values))
+            if key not in times:
+                times[key] = view.times()
+            views.append(
+                Timeseries(
+                    view.values, self.sampling_rate, ts.name, times[key], storage=ts.storage if ts.compact else None
+                )
+            )
+        return views
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
@@ -1,6 +1,5 @@
 import sys
 import numpy as np
-from scipy.interpolate import interp1d
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -11,25 +10,52 @@ from PyQt6.QtWidgets import (
     QLabel,
     QLineEdit,
     QPushButton,
+    QProgressBar,
 )
 from matplotlib.backends.backend_qt5agg import (
     FigureCanvasQTAgg as FigureCanvas,
     NavigationToolbar2QT as NavigationToolbar,
 )
 from matplotlib.figure import Figure
-import pandas as pd
+from matplotlib.widgets import SpanSelector
 from PyQt6.QtWidgets import QFileDialog  # Import QFileDialog
 import os
 from PyQt6 import QtCore
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtWidgets import QComboBox
-from local_tools.filters import normalize_range
+from PyQt6.QtCore import Qt, pyqtSignal, QThreadPool
+from PyQt6.QtWidgets import QComboBox, QCheckBox
+from local_tools.filters import StreamingFilter, design_cascade, filter_channels, geordi_streaming_filter
+from local_tools import tracing
 from SignalActionPanel import SignalActionPanel
-from scipy.signal import butter, filtfilt
 
-from data.Timeseries import Timeseries, parse_data_file_csv, parse_data_file_xdf
+from data.Timeseries import Timeseries
+from data.MinMaxPyramid import decimate_minmax
+from data.Pipeline import FilterStage, NormalizeStage, OffsetStage, filter_by_window
+from data.RecordingCache import RecordingCache
+from data.Alignment import Aligner
+from LoadWorker import LoadWorker
+from ExportWorker import ExportWorker
+from data.Export import export_formats
+from XdfStreamDialog import XdfStreamDialog
+from data.XdfIndex import read_xdf_streams
+from LiveView import LiveView
+from SpectrogramPanel import SpectrogramPanel
+from RedrawScheduler import RedrawScheduler
+from TraceOverlay import TraceOverlay
+from local_tools.spectral import WELCH_SEGMENT, TileCache, welch_psd
+from data.RingBuffer import RingBuffer
+from data.SignalStore import STORAGE_TYPES, SignalStore
+from data.LiveSource import (
+    AcquisitionThread,
+    LiveSource,
+    PipeSource,
+    SocketSource,
+    SyntheticSource,
+    TailFileSource,
+)
 from typing import List
 
+LIVE_BUFFER_SECONDS = 10  # Duration kept in the live ring buffer
+
 
 class MplCanvas(FigureCanvas):
     def __init__(
@@ -49,6 +75,9 @@ class MplCanvas(FigureCanvas):
         self.axes.set_ylabel(Y_axis)
         self.axes.set_title(Title)
         self.fig.tight_layout()
+        self.lines = {}  # Persistent lines updated with set_data, see sync_lines
+        self.background = None  # Figure without the animated lines, cached at every full draw
+        self.mpl_connect("draw_event", self.on_draw)
 
     def update_canvas(
         self,
@@ -65,6 +94,96 @@ class MplCanvas(FigureCanvas):
         self.axes.plot(X_values, Y_values)
         # self.draw()
 
+    def sync_lines(self, labels):
+        """
+        Keeps one persistent line per key of labels, only creating and removing lines when keys appear or
+        disappear. The lines are animated: a full draw caches everything else as a background, then the lines
+        are redrawn on top of it with blit_lines.
+        :param labels: A dict key -> legend label, in drawing order.
+        :return: The dict key -> Line2D.
+        """
+        # axes.clear() (e.g. by the live view) detaches the lines, start over
+        attached = {key: line for key, line in self.lines.items() if line in self.axes.lines}
+        if list(attached) == list(labels) and len(attached) == len(self.lines):
+            return self.lines
+        for key, line in attached.items():
+            if key not in labels:
+                line.remove()
+        self.lines = {
+            key: attached[key] if key in attached else self.axes.plot([], [], label=label, animated=True)[0]
+            for key, label in labels.items()
+        }
+        legend = self.axes.get_legend()
+        if legend is not None:
+            legend.remove()
+        if any(not str(label).startswith("_") for label in labels.values()):
+            self.axes.legend(handles=list(self.lines.values()))
+        self.background = None
+        return self.lines
+
+    def update_view(self, x_limits, y_limits, title=None):
+        """
+        Redraws the lines after their data changed. Only the lines are blitted on the cached background,
+        unless the limits or the title changed, or the background is stale, which needs a full draw.
+        :param x_limits: The (min, max) x range of the data.
+        :param y_limits: The (min, max) y range of the data.
+        :param title: The new title of the axes, unchanged if None.
+        """
+        full_draw = self.background is None
+        if tuple(self.axes.get_xlim()) != tuple(x_limits) and x_limits[0] < x_limits[1]:
+            self.axes.set_xlim(*x_limits)
+            full_draw = True
+        fitted = fit_limits(self.axes.get_ylim(), *y_limits)
+        if fitted is not None:
+            self.axes.set_ylim(*fitted)
+            full_draw = True
+        if title is not None and self.axes.get_title() != title:
+            self.axes.set_title(title)
+            full_draw = True
+        if full_draw:
+            self.draw_idle()
+        else:
+            self.blit_lines()
+
+    def draw(self):
+        with tracing.span("draw", panel=self.axes.get_title()):
+            super().draw()
+
+    def on_draw(self, event):
+        """
+        Caches the static part of the figure after a full draw and draws the animated lines on top of it.
+        """
+        self.background = self.copy_from_bbox(self.fig.bbox)
+        for line in self.lines.values():
+            if line in self.axes.lines:
+                self.fig.draw_artist(line)
+
+    def blit_lines(self):
+        """
+        Redraws only the lines, on top of the cached background.
+        """
+        with tracing.span("blit", panel=self.axes.get_title(), lines=len(self.lines)):
+            self.restore_region(self.background)
+            for line in self.lines.values():
+                self.fig.draw_artist(line)
+            self.blit(self.fig.bbox)
+
+
+def fit_limits(current, low, high, margin=0.15):
+    """
+    Returns new axis limits for data in [low, high], or None if the current limits still fit.
+    The limits are kept while the data is inside them and spans at least about half of them, so that small changes
+    of the data do not change the axis (and can be blitted). The margin leaves room for the data to move.
+    """
+    if not (np.isfinite(low) and np.isfinite(high)):
+        return None
+    pad = (high - low) * margin or 1.0
+    fitted = (low - pad, high + pad)
+    current_low, current_high = current
+    if current_low <= low and high <= current_high and current_high - current_low <= 2 * (fitted[1] - fitted[0]):
+        return None
+    return fitted
+
 
 # this class is needed to make the navigation bar smaller
 class CustomNavigationToolbar(NavigationToolbar):
@@ -88,8 +207,20 @@ class SignalViewer(QMainWindow):
         ] = []  # Variable to store the generated signal
         self.timeseries: List[Timeseries] = []  # Variable to store the loaded signal
         self.time_stamps = None  # Variable to store the time array
+        self.overview_lines = []  # (Timeseries, Line2D) pairs drawn on the left panel
+        self.interval_selector = None  # SpanSelector dragging the interval on the left panel
         self.x_axis_in_seconds = False  # Initially, X-axis is in seconds
         self.file_name = "undefined"
+        self.recording_cache = RecordingCache()  # On-disk cache of parsed files
+        self.load_pool = QThreadPool()  # Worker threads parsing files off the GUI thread
+        self.load_worker = None  # Worker of the load in progress, if any
+        self.export_worker = None  # Worker of the export in progress, if any
+        self.xdf_file_path = None  # XDF file whose streams are loaded, if any
+        self.live_view = None  # LiveView drawing the live ring buffer, if live
+        self.acquisition_thread = None  # Thread filling the live ring buffer
+        self.spectrogram_cache = TileCache()  # STFT tiles shared by the spectrogram windows
+        self.spectrogram_panels = []  # Open spectrogram windows
+        self.aligner = Aligner()  # Aligned views of the signals, cached per rate
         # Main Widget and Layout
         self.main_widget = QWidget()
         self.main_layout = QHBoxLayout(self.main_widget)
@@ -113,6 +244,10 @@ class SignalViewer(QMainWindow):
         self.top_right_toolbar = CustomNavigationToolbar(self.top_right_panel, self)
         self.right_layout.addWidget(self.top_right_toolbar)
         self.right_layout.addWidget(self.top_right_panel)
+        # Statistics of the plotted signals over the interval, from their statistics indexes
+        self.interval_statistics_label = QLabel()
+        self.interval_statistics_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.right_layout.addWidget(self.interval_statistics_label)
 
         # Bottom Right Panel for Frequential View
         self.bottom_right_panel = MplCanvas(width=5, height=4, dpi=100)
@@ -138,6 +273,14 @@ class SignalViewer(QMainWindow):
         self.fft_control_layout.addWidget( self.end_sample_label)
         self.fft_control_layout.addWidget(self.end_sample_input)
         self.fft_control_layout.addWidget(self.Update_interval_view_button)
+        # Samples per Welch segment: frequency resolution against variance of the spectra
+        self.welch_segment_dropdown = QComboBox()
+        self.welch_segment_dropdown.addItems([str(2**k) for k in range(6, 17)])
+        self.welch_segment_dropdown.setCurrentText(str(WELCH_SEGMENT))
+        self.welch_segment_dropdown.setToolTip("Samples per segment of the Welch power spectral density")
+        self.welch_segment_dropdown.currentIndexChanged.connect(lambda: self.redraw_scheduler.invalidate("fft"))
+        self.fft_control_layout.addWidget(QLabel("PSD segment:"))
+        self.fft_control_layout.addWidget(self.welch_segment_dropdown)
         self.right_layout.addWidget(self.fft_control_panel)
 
         self.filter_control_panel = QWidget()
@@ -152,14 +295,15 @@ class SignalViewer(QMainWindow):
 
         self.apply_filter_button = QPushButton("Apply Filter")
         self.apply_filter_button.clicked.connect(self.apply_filter)
+        self.apply_filter_all_button = QPushButton("Apply to All")
+        self.apply_filter_all_button.clicked.connect(self.apply_filter_to_all)
+        self.replace_filter_checkbox = QCheckBox("Replace last filter")
+        self.causal_filter_checkbox = QCheckBox("Causal")
 
-        # Signal selector dropdown selector FFT
+        # Signal selector dropdown of the plotted signal to filter (the PSD panel shows every plotted signal)
         self.signal_selector_dropdown_fft = QComboBox()
         self.signal_selector_dropdown_fft.addItems(["No Signal Loaded"])
-        self.signal_selector_dropdown_fft.currentIndexChanged.connect(
-            self.signal_selector_index_changed_fft
-        )
-        signal_selector_label_fft = QLabel("Signal: FFT")
+        signal_selector_label_fft = QLabel("Signal:")
         
         self.filter_control_layout.addWidget(signal_selector_label_fft)
         self.filter_control_layout.addWidget(self.signal_selector_dropdown_fft)
@@ -170,23 +314,100 @@ class SignalViewer(QMainWindow):
         self.filter_control_layout.addWidget(QLabel("Filter Order:"))
         self.filter_control_layout.addWidget(self.filter_order_input)
         self.filter_control_layout.addWidget(self.apply_filter_button)
+        self.filter_control_layout.addWidget(self.apply_filter_all_button)
+        self.filter_control_layout.addWidget(self.replace_filter_checkbox)
+        self.filter_control_layout.addWidget(self.causal_filter_checkbox)
 
         self.right_layout.addWidget(self.filter_control_panel)
 
         # Save to Excel Button
-        self.save_excel_button = QPushButton("Save Signal to Excel")
-        self.save_excel_button.clicked.connect(lambda : self.save_to_csv(self.start_sample,self.end_sample))
-        self.right_layout.addWidget(self.save_excel_button)
+        self.export_panel = QWidget()
+        self.export_layout = QHBoxLayout(self.export_panel)
+        self.save_excel_button = QPushButton("Export Signals...")
+        self.save_excel_button.clicked.connect(lambda: self.export_signals(self.start_sample, self.end_sample))
+        self.export_dtype_dropdown = QComboBox()
+        self.export_dtype_dropdown.addItems(["float64", "float32"])
+        self.export_dtype_dropdown.setToolTip("Type of the exported values")
+        self.export_layout.addWidget(self.save_excel_button)
+        self.export_layout.addWidget(self.export_dtype_dropdown)
+        self.right_layout.addWidget(self.export_panel)
 
         # Load from Excel Button
+        self.load_panel = QWidget()
+        self.load_layout = QHBoxLayout(self.load_panel)
         self.load_excel_button = QPushButton("Load Signal from csv")
         self.load_excel_button.clicked.connect(self.load_from_csv)
-        self.right_layout.addWidget(self.load_excel_button)
+        # Recordings larger than the memory: the parsed data stays in memory-mapped files
+        self.out_of_core_checkbox = QCheckBox("Out of core")
+        # Type the loaded channels are stored in, processing always runs in float64
+        self.storage_dropdown = QComboBox()
+        self.storage_dropdown.addItems(["Parsed type"] + list(STORAGE_TYPES))
+        self.storage_dropdown.setToolTip("Type the loaded signals are stored in (int16/int32 are scaled per channel)")
+        self.load_layout.addWidget(self.load_excel_button)
+        self.load_layout.addWidget(self.out_of_core_checkbox)
+        self.load_layout.addWidget(self.storage_dropdown)
+        self.right_layout.addWidget(self.load_panel)
+
+        # Choose the streams of the current XDF file to keep in memory
+        self.xdf_streams_button = QPushButton("XDF Streams...")
+        self.xdf_streams_button.clicked.connect(lambda: self.choose_xdf_streams(self.xdf_file_path))
+        self.xdf_streams_button.setEnabled(False)
+        self.right_layout.addWidget(self.xdf_streams_button)
+
+        # Load progress, hidden while no load is in progress
+        self.load_progress_panel = QWidget()
+        self.load_progress_layout = QHBoxLayout(self.load_progress_panel)
+        self.load_progress_bar = QProgressBar()
+        self.load_progress_bar.setRange(0, 1000)
+        self.load_progress_label = QLabel()
+        self.cancel_load_button = QPushButton("Cancel")
+        self.cancel_load_button.clicked.connect(self.cancel_load)
+        self.load_progress_layout.addWidget(self.load_progress_bar)
+        self.load_progress_layout.addWidget(self.load_progress_label)
+        self.load_progress_layout.addWidget(self.cancel_load_button)
+        self.load_progress_panel.hide()
+        self.right_layout.addWidget(self.load_progress_panel)
 
         # Toggle Button for X-axis view
         self.toggle_xaxis_button = QPushButton("Toggle X-Axis (Samples/Seconds)")
         self.toggle_xaxis_button.clicked.connect(self.toggle_xaxis)
         self.right_layout.addWidget(self.toggle_xaxis_button)
+
+        # Live acquisition controls
+        self.live_control_panel = QWidget()
+        self.live_control_layout = QHBoxLayout(self.live_control_panel)
+        self.live_source_dropdown = QComboBox()
+        self.live_source_dropdown.addItems(["Synthetic", "Socket", "Pipe", "Tail CSV"])
+        self.live_address_input = QLineEdit()
+        self.live_address_input.setPlaceholderText("host:port, socket, pipe or CSV path")
+        self.live_channels_input = QLineEdit("4")
+        # Filter applied causally to the live blocks as they arrive, before they are buffered
+        self.live_filter_dropdown = QComboBox()
+        self.live_filter_dropdown.addItems(["No filter", "Filter panel", "Geordi"])
+        self.live_button = QPushButton("Start Live")
+        self.live_button.clicked.connect(self.toggle_live)
+        self.live_control_layout.addWidget(QLabel("Live:"))
+        self.live_control_layout.addWidget(self.live_source_dropdown)
+        self.live_control_layout.addWidget(self.live_address_input)
+        self.live_control_layout.addWidget(QLabel("Channels:"))
+        self.live_control_layout.addWidget(self.live_channels_input)
+        self.live_control_layout.addWidget(self.live_filter_dropdown)
+        self.live_control_layout.addWidget(self.live_button)
+        self.right_layout.addWidget(self.live_control_panel)
+
+        # Performance tracing controls
+        self.trace_control_panel = QWidget()
+        self.trace_control_layout = QHBoxLayout(self.trace_control_panel)
+        self.trace_checkbox = QCheckBox("Trace")
+        self.trace_checkbox.toggled.connect(tracing.enable)
+        self.trace_overlay_checkbox = QCheckBox("Show timings")
+        self.export_trace_button = QPushButton("Export Trace")
+        self.export_trace_button.clicked.connect(self.export_trace)
+        self.trace_control_layout.addWidget(QLabel("Performance:"))
+        self.trace_control_layout.addWidget(self.trace_checkbox)
+        self.trace_control_layout.addWidget(self.trace_overlay_checkbox)
+        self.trace_control_layout.addWidget(self.export_trace_button)
+        self.right_layout.addWidget(self.trace_control_panel)
         
         # Signal selector dropdown selector
         self.signal_selector_layout = QHBoxLayout()
@@ -217,39 +438,157 @@ class SignalViewer(QMainWindow):
 
         # Set Main Widget and Window Title
         self.setCentralWidget(self.main_widget)
+        self.trace_overlay = TraceOverlay(self.main_widget)
+        self.trace_overlay_checkbox.toggled.connect(self.trace_overlay.set_visible)
         self.setWindowTitle("Signal Analysis Tool")
 
         # Add signal action panel
         self.signal_action_panel = SignalActionPanel()
         self.right_panel.layout().addWidget(self.signal_action_panel)
         self.signal_action_panel.normalizeButtonClicked.connect(self.normalize_signal)
+        self.signal_action_panel.resetButtonClicked.connect(self.reset_processing)
+        self.signal_action_panel.spectrogramButtonClicked.connect(self.open_spectrogram)
+
+        # Panels are redrawn at most once per event loop iteration, in this order
+        self.redraw_scheduler = RedrawScheduler()
+        self.redraw_scheduler.register("overview", self.draw_overview)
+        self.redraw_scheduler.register("interval", self.draw_interval)
+        self.redraw_scheduler.register("fft", self.draw_fft)
+        self.redraw_scheduler.listeners.append(
+            lambda scheduler: self.statusBar().showMessage(f"Redraws: {scheduler.summary()}")
+        )
 
         # Connect UI Signal Event
         self.signal_added.connect(self.update_signal_selector_fft)
         self.signal_removed.connect(self.update_signal_selector_fft)
         
-    def apply_filter(self):
+    def filter_stage(self):
+        """
+        Returns the filter stage described by the filter controls (see local_tools.filters.design_stage).
+        Band filters take their two cutoff frequencies separated by a comma.
+        """
         filter_type = self.filter_type_dropdown.currentText()
-        cutoff = float(self.cutoff_freq_input.text())
-        order = int(self.filter_order_input.text())         
+        cutoff = tuple(float(value) for value in self.cutoff_freq_input.text().split(","))
+        if len(cutoff) == 1:
+            cutoff = cutoff[0]
+        order = int(self.filter_order_input.text())
+        return ("butter", order, cutoff, filter_type.lower())
 
-        # Get fft signal selected index
+    def apply_filter(self):
+        try:
+            stage = self.filter_stage()
+        except ValueError:
+            print("Invalid cutoff frequency or filter order.")
+            return
+
+        # The dropdown lists the plotted signals, in order
         signal_index = self.signal_selector_dropdown_fft.currentIndex()
-        # Get the signal
-        name = self.timeseries[signal_index].name
-        for i, sig in enumerate(self.signals_plotted):
-            if sig.name == name:
-                signal_index = i
-                
-        # Create the filter
-        b, a = butter(order, cutoff, btype=filter_type, fs=int(float(self.signals_plotted[signal_index].sampling_rate)))
-        
-        # Apply the filter
-        filtered_signal = filtfilt(b, a, self.signals_plotted[signal_index].values)
-        self.signals_plotted[signal_index].values = filtered_signal
+        if signal_index < 0 or signal_index >= len(self.signals_plotted):
+            print("No plotted signal selected for the filter.")
+            return
+
+        self.filter_signals([self.signals_plotted[signal_index]], (stage,))
+
+    def apply_filter_to_all(self):
+        try:
+            stage = self.filter_stage()
+        except ValueError:
+            print("Invalid cutoff frequency or filter order.")
+            return
+        self.filter_signals(self.signals_plotted, (stage,))
+
+    def filter_signals(self, signals, stages):
+        """
+        Adds a filter stage made of a chain of filter stages to the pipeline of signals, then updates the plots once.
+        If "Replace last filter" is checked, the last filter stage of each pipeline is replaced instead.
+        If "Causal" is checked, the filter runs forward only, as it would on a live signal.
+        The new stage is evaluated on the whole signals for the overview, signals sharing a sampling rate
+        and a length are filtered together as one 2-D array (window by window for disk-backed and compact ones).
+        """
+        groups = {}
+        for signal in signals:
+            key = (float(signal.sampling_rate), len(signal))
+            group = groups.setdefault(key, [])
+            if not any(signal is other for other in group):
+                group.append(signal)
+
+        # Every cascade is designed before any pipeline changes, so that an invalid filter leaves no broken stage
+        cascades = {}
+        try:
+            for sampling_rate, _ in groups:
+                cascades[sampling_rate] = design_cascade(stages, sampling_rate)
+        except ValueError as e:
+            print(f"Invalid filter: {e}")
+            return
+
+        replace = self.replace_filter_checkbox.isChecked()
+        causal = self.causal_filter_checkbox.isChecked()
+        for (sampling_rate, _), group in groups.items():
+            cascade = cascades[sampling_rate]
+            for signal in group:
+                pipeline = signal.pipeline
+                if replace and pipeline.stages and isinstance(pipeline.stages[-1], FilterStage):
+                    pipeline.set_stage(len(pipeline.stages) - 1, FilterStage(stages, causal))
+                else:
+                    pipeline.append(FilterStage(stages, causal))
+
+            # Disk-backed and compact signals are read window by window, never whole in float64
+            windowed = [signal for signal in group if signal.disk_backed or signal.compact]
+            filter_by_window(
+                [signal.pipeline for signal in windowed],
+                [signal.raw_values for signal in windowed],
+                sampling_rate,
+                cascade,
+                causal,
+            )
+            group = [signal for signal in group if not signal.disk_backed and not signal.compact]
+            if not group:
+                continue
+            # The raw values are kept, the filtered ones are stored as the output of the new stage
+            upstream = np.stack(
+                [
+                    signal.pipeline.evaluate_full(
+                        signal.raw_values, sampling_rate, len(signal.pipeline.stages) - 1
+                    )
+                    for signal in group
+                ]
+            )
+            with tracing.span("filter", channels=len(group), samples=upstream.shape[1]):
+                filtered = filter_channels(cascade, upstream, causal=causal)
+            for signal, values in zip(group, filtered):
+                signal.pipeline.set_full_result(values)
         # Update the plot
         self.plot_signals(self.file_name, "amplitude")
 
+    def reset_processing(self):
+        """
+        Removes the filters and normalizations of the plotted signals, back to their raw values.
+        """
+        for signal in self.signals_plotted:
+            signal.pipeline.clear()
+        self.plot_signals(self.file_name, "amplitude")
+
+    def open_spectrogram(self):
+        """
+        Opens a spectrogram window for the plotted signal selected in the dropdown of the filter panel.
+        """
+        index = self.signal_selector_dropdown_fft.currentIndex()
+        if index < 0 or index >= len(self.signals_plotted):
+            print("No plotted signal selected for the spectrogram.")
+            return
+        panel = SpectrogramPanel(self.signals_plotted[index], cache=self.spectrogram_cache)
+        self.spectrogram_panels = [p for p in self.spectrogram_panels if p.isVisible()] + [panel]
+        panel.show()
+
+    def export_trace(self):
+        """
+        Saves the recorded spans as a Chrome trace event file (chrome://tracing or https://ui.perfetto.dev).
+        """
+        fileName, _ = QFileDialog.getSaveFileName(self, "Export Trace", "", "Trace Files (*.json)")
+        if fileName:
+            count = tracing.export_chrome_trace(fileName)
+            print(f"Exported {count} spans to {fileName}")
+
     def toggle_xaxis(self):
         self.x_axis_in_seconds = not self.x_axis_in_seconds
         if not self.x_axis_in_seconds:
@@ -263,243 +602,422 @@ class SignalViewer(QMainWindow):
         self.plot_signals(self.file_name, "amplitude")
 
     def plot_signals(self, file_name, Y_axis):
+        """
+        Schedules the redraw of every panel.
+        """
+        if self.live_view is not None:
+            return  # The panels show the live signals
+        self.redraw_scheduler.invalidate()
+
+    @tracing.traced("overview")
+    def draw_overview(self):
+        if self.live_view is not None:
+            return
         # update left_panel
         self.left_panel.axes.clear()
-        print(self.signals_plotted)
+        self.overview_lines = []
         if self.signals_plotted is None or len(self.signals_plotted) == 0:
             return
         for signal in self.signals_plotted:
-            print(f"Update graph with {signal.name}")
+            # Only draw the decimated envelope of the signal, the xlim_changed callback refines it on zoom
+            x_values, y_values = self.decimate_overview(signal, 0, len(signal))
+            (line,) = self.left_panel.axes.plot(x_values, y_values, label=signal.name)
+            self.overview_lines.append((signal, line))
             if self.x_axis_in_seconds:
-                self.left_panel.axes.plot(
-                    signal.timestamps, signal.values, label=signal.name
-                )
                 x_label = "Time (Seconds)"
             else:
-                self.left_panel.axes.plot(
-                    signal.values,
-                    label=signal.name,
-                )
                 x_label = "Sample Number"
         self.left_panel.axes.legend()
         self.left_panel.axes.set_xlabel(x_label)
         self.left_panel.axes.set_ylabel("Amplitude")
+        # axes.clear() drops the callbacks, reconnect the zoom handler every time
+        self.left_panel.axes.callbacks.connect(
+            "xlim_changed", self.overview_xlim_changed
+        )
+        # The span selector is removed by axes.clear() as well
+        self.interval_selector = SpanSelector(
+            self.left_panel.axes,
+            self.interval_selected,
+            "horizontal",
+            useblit=True,
+            interactive=True,
+            onmove_callback=self.interval_selected,
+            props=dict(alpha=0.2, facecolor="tab:orange"),
+        )
+        self.interval_selector.extents = (self.start_sample, self.end_sample)
         self.left_panel.draw()
 
-        self.update_interval_view(file_name, Y_axis)
+    def interval_selected(self, x_min, x_max):
+        """
+        Moves the interval to the span dragged on the overview. The interval and FFT panels are only marked
+        dirty: while dragging, the positions reached before the next frame are dropped.
+        """
+        if not self.x_axis_in_seconds:
+            x_min, x_max = int(round(x_min)), int(round(x_max))
+        if x_max <= x_min:
+            return
+        self.start_sample = x_min
+        self.end_sample = x_max
+        self.start_sample_input.setText(str(x_min))
+        self.end_sample_input.setText(str(x_max))
+        self.redraw_scheduler.invalidate("interval", "fft")
+
+    def interval_points(self, signal, start, stop, width):
+        """
+        Returns the points of signal to draw for the samples [start, stop) on a panel width pixels wide.
+        Long intervals are reduced to the min/max envelope of the pyramid, so the work depends on the width.
+        :return: A tuple (indices, values).
+        """
+        if stop - start > 2 * width:
+            return signal.pyramid.query(start, stop, width)
+        return np.arange(start, stop), signal.window(start, stop)
+
+    def decimate_overview(self, signal, start, stop):
+        """
+        Returns the points of signal to draw on the overview for the samples [start, stop).
+        About two points per pixel of the left panel are returned, taken from the min/max pyramid.
+        """
+        n_buckets = int(self.left_panel.axes.bbox.width)
+        indices, values = signal.pyramid.query(start, stop, n_buckets)
+        if self.x_axis_in_seconds:
+            return signal.timestamps[indices], values
+        return indices, values
+
+    def overview_xlim_changed(self, axes):
+        """
+        Redraws the overview lines at the resolution matching the visible x range after a zoom or a pan.
+        """
+        x_min, x_max = axes.get_xlim()
+        for signal, line in self.overview_lines:
+            if self.x_axis_in_seconds:
+                start, stop = signal.time_index.range(x_min, x_max)
+                start, stop = start - 1, stop + 1
+            else:
+                start, stop = int(np.floor(x_min)), int(np.ceil(x_max)) + 1
+            start = max(start, 0)
+            stop = min(stop, len(signal))
+            if start >= stop:
+                continue
+            line.set_data(*self.decimate_overview(signal, start, stop))
+        self.left_panel.draw_idle()
+
+    def toggle_live(self):
+        if self.live_view is None:
+            try:
+                source = self.create_live_source()
+            except (ValueError, OSError) as e:
+                print(f"Could not open the live source: {e}")
+                return
+            self.start_live(source)
+        else:
+            self.stop_live()
+
+    def create_live_source(self):
+        """
+        Creates the live source described by the live controls.
+        """
+        source_type = self.live_source_dropdown.currentText()
+        address = self.live_address_input.text()
+        channel_count = int(self.live_channels_input.text())
+        names = [f"live_{ch}" for ch in range(channel_count)]
+        if source_type == "Socket":
+            return SocketSource(address, names, self.sampling_rate)
+        if source_type == "Pipe":
+            return PipeSource(address, names, self.sampling_rate)
+        if source_type == "Tail CSV":
+            return TailFileSource(address, self.sampling_rate)
+        return SyntheticSource(channel_count, self.sampling_rate)
+
+    def live_stream_filter(self, sampling_rate):
+        """
+        Returns the StreamingFilter selected for the live signals, None if they are not filtered.
+        "Filter panel" applies the filter described by the filter controls, "Geordi" the cascade of
+        apply_geordi_filtering, both forward only as the blocks arrive.
+        """
+        choice = self.live_filter_dropdown.currentText()
+        if choice == "Filter panel":
+            return StreamingFilter(design_cascade((self.filter_stage(),), sampling_rate))
+        if choice == "Geordi":
+            return geordi_streaming_filter(sampling_rate)
+        return None
+
+    def start_live(self, source: LiveSource):
+        """
+        Starts acquiring source into a ring buffer of LIVE_BUFFER_SECONDS and drawing it on the panels.
+        The blocks are filtered by the selected live filter (see live_stream_filter) before they are buffered.
+        """
+        try:
+            stream_filter = self.live_stream_filter(float(source.sampling_rate))
+        except ValueError as e:
+            print(f"Invalid live filter: {e}")
+            source.close()
+            return
+        capacity = int(LIVE_BUFFER_SECONDS * float(source.sampling_rate))
+        ring_buffer = RingBuffer(len(source.channel_names), capacity)
+        self.acquisition_thread = AcquisitionThread(source, ring_buffer, stream_filter)
+        self.live_view = LiveView(
+            ring_buffer,
+            source.sampling_rate,
+            source.channel_names,
+            self.left_panel,
+            self.top_right_panel,
+            self.bottom_right_panel,
+        )
+        try:
+            self.live_view.interval_size = max(
+                int(float(self.end_sample_input.text()) - float(self.start_sample_input.text())), 2
+            )
+        except ValueError:
+            pass
+        self.acquisition_thread.start()
+        self.live_view.start()
+        self.live_button.setText("Stop Live")
+
+    def stop_live(self):
+        """
+        Stops the live acquisition, the buffered samples are added to the loaded signals.
+        """
+        self.live_view.stop()
+        self.acquisition_thread.stop()
+        self.acquisition_thread.join()
+        samples, first_index = self.live_view.ring_buffer.latest()
+        if samples.shape[1] > 0:
+            sampling_rate = self.live_view.sampling_rate
+            store = SignalStore(
+                samples,
+                (first_index + np.arange(samples.shape[1])) / sampling_rate,
+                sampling_rate,
+                self.live_view.channel_names,
+            )
+            self.timeseries.extend(Timeseries.from_store(store, ch) for ch in range(store.channel_count))
+            self.update_signal_selector()
+        self.live_view = None
+        self.acquisition_thread = None
+        self.live_button.setText("Start Live")
+        self.plot_signals(self.file_name, "amplitude")
 
     def update_interval_view(self, file_name, Y_axis):
         try:
             start = float(self.start_sample_input.text())
             end = float(self.end_sample_input.text())
+            if self.live_view is not None:
+                # The live panels always show the latest end - start samples
+                self.live_view.interval_size = max(int(end - start), 2)
+                return
 
             # Ensure the start and end are within the bounds of the signal
             self.start_sample = start
             self.end_sample = end
-            print(f"start sample : {self.start_sample}")
-            print(f"end sample : {self.end_sample}")
         except ValueError:
             # Handle invalid input
             print("Invalid start or end sample input.")
             return
 
-        # Use the stored signal for analysis
-        if self.signals_plotted is not None:
-            # Determine the FFT window size
-            if self.x_axis_in_seconds:
-                N = int((self.end_sample - self.start_sample) * self.sampling_rate)
-            else:
-                N = self.end_sample - self.start_sample
-            N_fft = N / 2
-            if N <= 0:
-                print("Invalid FFT window size.")
-                return
+        self.redraw_scheduler.invalidate("interval", "fft")
 
-            # Update the top right panel (Temporal View)
-            self.update_temporal_interval_view(
-                N, title=str("interval view on " + str(N) + " samples")
-            )
+    def interval_length(self):
+        """
+        Returns the number of samples of the interval, or None if the interval is empty.
+        """
+        # Determine the FFT window size
+        if self.x_axis_in_seconds:
+            N = int((self.end_sample - self.start_sample) * self.sampling_rate)
+        else:
+            N = self.end_sample - self.start_sample
+        if N <= 0:
+            print("Invalid FFT window size.")
+            return None
+        return N
 
-            # Perform FFT analysis
-            self.perform_fft(N)
+    def draw_interval(self):
+        N = self.interval_length()
+        if self.live_view is not None or N is None:
+            return
+        # Update the top right panel (Temporal View)
+        self.update_temporal_interval_view(
+            N, title=str("interval view on " + str(N) + " samples")
+        )
 
+    def draw_fft(self):
+        N = self.interval_length()
+        if self.live_view is not None or N is None:
+            return
+        if self.signals_plotted:
+            # Spectra of every plotted signal
+            self.perform_fft()
+
+    @tracing.traced("interval")
     def update_temporal_interval_view(self, N, title):
-        self.top_right_panel.axes.clear()
+        lines = self.top_right_panel.sync_lines(
+            {id(signal): signal.name for signal in self.signals_plotted}
+        )
+        x_limits = [np.inf, -np.inf]
+        y_limits = [np.inf, -np.inf]
+        readout = []
+        width = int(self.top_right_panel.axes.bbox.width)
         for signal in self.signals_plotted:
             if self.x_axis_in_seconds:
                 x_label = "Time (Seconds)"
-                # Get the min index of the signal to plot
-                try:
-                    min_index = min(
-                        [
-                            index
-                            for index, value in enumerate(signal.timestamps)
-                            if self.start_sample <= value <= self.end_sample
-                        ]
-                    )
-                    max_index = max(
-                        [
-                            index
-                            for index, value in enumerate(signal.timestamps)
-                            if self.start_sample <= value <= self.end_sample
-                        ]
-                    )   
-                except ValueError:
+                # Get the index range of the signal to plot
+                min_index, max_index = signal.time_index.range(
+                    self.start_sample, self.end_sample
+                )
+                if min_index >= max_index:
                     print("Invalid start or end sample input.")
                     return
-                print (f"min_index : {min_index}")
-                print (f"max_index : {max_index}")
-                print (f"len(signal.timestamps) : {len(signal.timestamps)}")
-                print (f"len(signal.values) : {len(signal.values)}")
-                
-                print(f"signal.timestamps[min_index:min_index] : {signal.timestamps[min_index:min_index]}")
-                print(f"signal.values[min_index:max_index] : {signal.values[min_index:max_index]}")
-                self.top_right_panel.axes.plot(
-                    signal.timestamps[min_index:max_index],
-                    signal.values[min_index:max_index],
-                    label=signal.name,
-                )
+                indices, y_values = self.interval_points(signal, min_index, max_index, width)
+                x_values = signal.timestamps[indices]
             else:
-                self.top_right_panel.axes.plot(
-                    signal.values[
-                        int(self.start_sample) : int(self.end_sample)
-                        if self.end_sample < len(signal.values)
-                        else len(signal.values)
-                    ],
-                    label=signal.name,
-                )
+                min_index = int(self.start_sample)
+                max_index = min(int(self.end_sample), len(signal))
+                indices, y_values = self.interval_points(signal, min_index, max_index, width)
+                x_values = indices - min_index
                 x_label = "Sample Number"
-        self.top_right_panel.axes.set_xlabel(x_label)
+            lines[id(signal)].set_data(x_values, y_values)
+            if len(y_values) > 0:
+                # Limits of the interval rather than of the (possibly decimated) points, stable while dragging
+                if self.x_axis_in_seconds:
+                    first, last = signal.timestamps[min_index], signal.timestamps[max_index - 1]
+                else:
+                    first, last = 0, max_index - min_index - 1
+                x_limits = [min(x_limits[0], first), max(x_limits[1], last)]
+                # Exact extrema of the interval, merged from the blocks of the statistics index
+                statistics = signal.statistics.query(min_index, max_index)
+                y_limits = [np.fmin(y_limits[0], statistics.minimum), np.fmax(y_limits[1], statistics.maximum)]
+                readout.append(self.describe_statistics(signal.name, statistics))
+        self.interval_statistics_label.setText("\n".join(readout))
+        if not self.signals_plotted:
+            self.top_right_panel.draw_idle()
+            return
+        if self.top_right_panel.axes.get_xlabel() != x_label:
+            self.top_right_panel.axes.set_xlabel(x_label)
+            self.top_right_panel.background = None
         self.top_right_panel.axes.set_ylabel("Amplitude")
-        self.top_right_panel.axes.set_title(title)
-        self.top_right_panel.axes.legend()
-        self.top_right_panel.draw()
+        self.top_right_panel.update_view(x_limits, y_limits, title)
 
-    def perform_fft(self, N): 
-        # Get fft signal selected index
-        signal_index = self.signal_selector_dropdown_fft.currentIndex()
-        print(f"signal_index : {signal_index}")
-        # Get fft signal selected index
-        signal_index = self.signal_selector_dropdown_fft.currentIndex()
-        # Get the signal
-        name = self.timeseries[signal_index].name
-        for i, sig in enumerate(self.signals_plotted):
-            if sig.name == name:
-                signal_index = i
-        # Get the signal
-        signal = self.signals_plotted[signal_index]      
-        
+    def describe_statistics(self, name, statistics):
+        """
+        Returns one line of the interval statistics readout.
+        :param name: The name of the signal.
+        :param statistics: The RangeStatistics of the signal over the interval.
+        """
+        return (
+            f"{name}: mean {statistics.mean:.4g}, RMS {statistics.rms:.4g}, "
+            f"std {statistics.standard_deviation:.4g}, p-p {statistics.peak_to_peak:.4g} "
+            f"[{statistics.minimum:.4g}, {statistics.maximum:.4g}] ({statistics.count} samples)"
+        )
+
+    def interval_samples(self, signal):
+        """
+        Returns the samples of signal over the interval on a uniform grid, as needed by spectral analysis.
+        :return: A tuple (sampling_rate, values), or None if the interval is empty.
+        """
         if self.x_axis_in_seconds:
-            try:     
-                min_index = min(
-                    [
-                        index
-                        for index, value in enumerate(signal.timestamps)
-                        if self.start_sample <= value <= self.end_sample
-                    ]
-                )
-                max_index = max(
-                    [
-                        index
-                        for index, value in enumerate(signal.timestamps)
-                        if self.start_sample <= value <= self.end_sample
-                    ]
-                )
-            except ValueError:
-                print("Invalid start or end sample input.")
-                return
+            min_index, max_index = signal.time_index.range(self.start_sample, self.end_sample)
         else:
             min_index = int(self.start_sample)
-            max_index = int(self.end_sample)
-            
-        print(f"min_index : {min_index}")
-        print(f"max_index : {max_index}")
-        print(f"N: {N}")    
-        y_fft = (
-            np.fft.fft(signal.values[min_index: max_index]) / N
-        )
+            max_index = min(int(self.end_sample), len(signal))
+        if min_index >= max_index:
+            return None
 
-        # Frequency resolution is equal to the sampling rate divided by the number of samples
-        sampling_rate = int(float(signal.sampling_rate))
-        freq_resolution = sampling_rate / N
-        print(f"freq_resolution : {freq_resolution}")
-        print(f"self.sampling_rate : {sampling_rate}")
-        print(f"N : {N}")
-        print(f"N//2 +1: {N//2+1}")
-        freq = np.arange(0, sampling_rate / 2 + freq_resolution, freq_resolution)[
-            : int(N // 2 + 1)
-        ]
-
-        # Take only the positive half of the spectrum
-        y_fft_half = y_fft[: int(N // 2 + 1)]
-
-        self.bottom_right_panel.axes.clear()
-        self.bottom_right_panel.update_canvas(
-            freq,
-            np.abs(y_fft_half),
-            "FFT applied on interval",
-            "Frequency (Hz)",
-            "amplitude",
-        )
-        self.bottom_right_panel.draw()
+        sampling_rate = self.aligner.rate_of(signal)
+        if self.aligner.is_uniform(signal):
+            return sampling_rate, signal.window(min_index, max_index)
+        # Irregular timestamps: the interval is read from the view on a uniform grid, resampled once per chain
+        timestamps = signal.time_index.timestamps
+        values = self.aligner.aligned(signal, sampling_rate).between(timestamps[min_index], timestamps[max_index - 1])
+        return sampling_rate, values[~np.isnan(values)]
 
-    def save_to_csv(self, start_sample, stop_sample):  # Method to save signals to a CSV file
-        # Check if there are any signals to save
+    def perform_fft(self):
+        """
+        Draws the Welch power spectral density of every plotted signal over the interval. Signals with the same rate
+        and number of samples are stacked and analysed together (see local_tools.spectral.welch_psd).
+        """
+        groups = {}
+        for signal in self.signals_plotted:
+            interval = self.interval_samples(signal)
+            if interval is None:
+                print(f"Invalid start or end sample input for {signal.name}.")
+                continue
+            sampling_rate, values = interval
+            if len(values) > 1:
+                groups.setdefault((float(sampling_rate), len(values)), []).append((signal, values))
 
-        # Convert start and stop samples to integers
-        start_sample = int(start_sample)
-        stop_sample = int(stop_sample)
+        nperseg = int(self.welch_segment_dropdown.currentText())
+        spectra = {}
+        for (sampling_rate, samples), members in groups.items():
+            with tracing.span("welch", channels=len(members), samples=samples):
+                freq, psd = welch_psd(np.stack([values for _, values in members]), sampling_rate, nperseg)
+            for (signal, _), row in zip(members, psd):
+                # Floor 200 dB under the peak, so that empty bins do not stretch the axis
+                floor = max(np.max(row) * 1e-20, np.finfo(np.float64).tiny)
+                spectra[id(signal)] = (freq, 10 * np.log10(np.maximum(row, floor)))
 
-        if self.signals_plotted:
-            # Initialize a dictionary to hold our data
-            data_dict = {'time': []}  # Initialize 'time' separately to handle different lengths
-
-            # Iterate over each Timeseries object in signals_plotted
-            for ts in self.signals_plotted:
-                # Extract the segment of the timeseries between start_sample and stop_sample
-                segment_time = ts.timestamps_data[start_sample:stop_sample+1]
-                segment_data = ts.values_data[start_sample:stop_sample+1]
-
-                # Check if segment data needs to be interpolated
-                if len(segment_data) < (stop_sample - start_sample + 1):
-                    # Generate new time vector for interpolation within the segment
-                    new_time_vector = np.linspace(segment_time[0], segment_time[-1], num=stop_sample - start_sample + 1)
-                    
-                    # Interpolate both timestamps and data to the new time vector
-                    time_interpolator = interp1d(segment_time, segment_time, kind='linear', fill_value="extrapolate")
-                    data_interpolator = interp1d(segment_time, segment_data, kind='linear', fill_value="extrapolate")
-                    
-                    # Create interpolated timestamps and data
-                    interpolated_time = time_interpolator(new_time_vector)
-                    interpolated_data = data_interpolator(new_time_vector)
-                else:
-                    # Use the extracted segment directly if no interpolation is needed
-                    interpolated_time = segment_time
-                    interpolated_data = segment_data
-                
-                # Add the interpolated or original segment data and timestamps to the data dictionary
-                data_dict[ts.name] = interpolated_data
-                if len(data_dict['time']) < len(interpolated_time):  # Update the 'time' column to match the longest segment
-                    data_dict['time'] = interpolated_time
-
-            # Create a DataFrame from the dictionary
-            df = pd.DataFrame(data_dict)
-            
-            # Open a file dialog to ask the user for a file name
-            fileName, _ = QFileDialog.getSaveFileName(self, "Save CSV File", "", "CSV Files (*.csv)")
-            
-            # Check if the user provided a file name
-            if fileName:
-                # Attempt to save the DataFrame to a CSV file
-                try:
-                    df.to_csv(fileName, index=False)
-                    print(f"Signal data saved to {fileName}")
-                except Exception as e:
-                    print(f"Error saving to CSV: {e}")
-            else:
-                print("Save operation cancelled.")
-        else:
+        lines = self.bottom_right_panel.sync_lines(
+            {id(signal): signal.name for signal in self.signals_plotted if id(signal) in spectra}
+        )
+        x_limits = [0, 0]
+        y_limits = [np.inf, -np.inf]
+        for key, (freq, power) in spectra.items():
+            # Spectra with more bins than pixels are drawn as their min/max envelope
+            indices, envelope = decimate_minmax(power, self.bottom_right_panel.axes.bbox.width)
+            lines[key].set_data(freq[indices], envelope)
+            x_limits[1] = max(x_limits[1], freq[-1])
+            y_limits = [min(y_limits[0], np.min(power)), max(y_limits[1], np.max(power))]
+        self.bottom_right_panel.axes.set_xlabel("Frequency (Hz)")
+        self.bottom_right_panel.axes.set_ylabel("PSD (dB/Hz)")
+        self.bottom_right_panel.update_view(x_limits, y_limits, f"Welch PSD on interval ({nperseg} samples/segment)")
+
+    def export_signals(self, start, stop):
+        """
+        Exports the interval [start, stop] of the plotted signals on a worker thread, in the format of the extension
+        chosen (see data.Export).
+        :param start: The start of the interval, in samples or in seconds depending on the x-axis.
+        :param stop: The end of the interval (included).
+        """
+        if not self.signals_plotted:
             print("No signals to save.")
+            return
+        if self.export_worker is not None:
+            print("An export is already in progress.")
+            return
+        if self.x_axis_in_seconds:
+            start_time, stop_time = float(start), float(stop)
+        else:
+            # Sample indices are those of the first plotted signal, the others are aligned in time
+            timestamps = self.signals_plotted[0].time_index.timestamps
+            if len(timestamps) == 0:
+                print("No signals to save.")
+                return
+            start_time = timestamps[min(max(int(start), 0), len(timestamps) - 1)]
+            stop_time = timestamps[min(max(int(stop), 0), len(timestamps) - 1)]
+
+        filters = {
+            ".csv": "CSV Files (*.csv)",
+            ".bin": "Raw binary (*.bin)",
+            ".npz": "NumPy archive (*.npz)",
+            ".h5": "HDF5 (*.h5)",
+        }
+        formats = export_formats()
+        fileName, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Signals", "", ";;".join(filters[extension] for extension in formats)
+        )
+        if not fileName:
+            print("Save operation cancelled.")
+            return
+        if os.path.splitext(fileName)[1].lower() not in formats:
+            # No extension typed: take the one of the selected filter
+            fileName += next(extension for extension in formats if filters[extension] == selected_filter)
+
+        self.export_worker = ExportWorker(
+            fileName, self.signals_plotted, start_time, stop_time, self.export_dtype_dropdown.currentText()
+        )
+        self.export_worker.signals.progress.connect(self.export_progressed)
+        self.export_worker.signals.finished.connect(self.export_finished)
+        self.load_progress_bar.setValue(0)
+        self.load_progress_label.setText(f"Exporting {os.path.basename(fileName)} ...")
+        self.load_progress_panel.show()
+        self.load_pool.start(self.export_worker)
 
     def load_from_csv(self):
         self.filepath, _ = QFileDialog.getOpenFileName(
@@ -510,24 +1028,112 @@ class SignalViewer(QMainWindow):
         )
         if self.filepath:
             if self.filepath.endswith(".xdf"):
-                self.timeseries: List[Timeseries] = parse_data_file_xdf(self.filepath)
+                self.choose_xdf_streams(self.filepath)
             else:
-                
-                self.timeseries: List[Timeseries] = parse_data_file_csv(
-                    self.filepath, self.sampling_rate,self.timeseries)
-                
-            self.update_signal_selector()
+                self.start_load(self.filepath)
+
+    def choose_xdf_streams(self, file_path):
+        """
+        Lists the streams of an XDF file from its headers and loads only the ones the user checks.
+        Unchecked streams that were loaded are released, streams already in memory are not parsed again.
+        :param file_path: The path of the XDF file.
+        """
+        if not file_path:
+            return
+        try:
+            streams = read_xdf_streams(file_path)
+        except Exception as e:
+            print(f"Error reading the streams of {file_path}: {e}")
+            return
+        if file_path != self.xdf_file_path:
+            loaded_ids = set()
+        else:
+            loaded_ids = {ts.store.stream_id for ts in self.timeseries if ts.store is not None}
+        dialog = XdfStreamDialog(os.path.basename(file_path), streams, loaded_ids)
+        if not dialog.exec():
+            return
+        selected_ids = set(dialog.selected_ids())
+
+        if file_path != self.xdf_file_path:
+            # An XDF file replaces the loaded signals, CSV files add to them
+            self.timeseries: List[Timeseries] = []
+            self.xdf_file_path = file_path
+            self.xdf_streams_button.setEnabled(True)
+        else:
+            self.release_xdf_streams(loaded_ids - selected_ids)
+        new_ids = sorted(selected_ids - loaded_ids)
+        if new_ids:
+            self.start_load(file_path, new_ids)
+
+    def release_xdf_streams(self, stream_ids):
+        """
+        Removes the channels of XDF streams from the loaded and plotted signals, freeing their memory.
+        """
+        if not stream_ids:
+            return
+
+        def released(ts):
+            return ts.store is not None and ts.store.stream_id in stream_ids
+
+        self.timeseries = [ts for ts in self.timeseries if not released(ts)]
+        plotted = len(self.signals_plotted)
+        self.signals_plotted = [ts for ts in self.signals_plotted if not released(ts)]
+        self.update_signal_selector()
+        if len(self.signals_plotted) != plotted:
+            self.signal_removed.emit()
+            self.plot_signals(self.file_name, "amplitude")
+
+    def start_load(self, file_path, stream_ids=None):
+        """
+        Parses a file on a worker thread, its channels are added to the loaded signals as they are delivered.
+        :param file_path: The path of the CSV or XDF file.
+        :param stream_ids: The XDF streams to load, all of them by default.
+        """
+        if self.load_worker is not None:
+            self.load_worker.cancel()
+        storage = self.storage_dropdown.currentText()
+        # CSV files are parsed at their native rate, their channels are shown as aligned views at the sampling rate
+        # of the viewer (see data.Alignment)
+        self.load_worker = LoadWorker(
+            file_path,
+            self.sampling_rate,
+            self.recording_cache,
+            stream_ids,
+            self.out_of_core_checkbox.isChecked(),
+            storage if storage in STORAGE_TYPES else None,
+            self.aligner,
+        )
+        self.load_worker.signals.progress.connect(self.load_progressed)
+        self.load_worker.signals.timeseries_loaded.connect(self.timeseries_loaded)
+        self.load_worker.signals.finished.connect(self.load_finished)
+        self.load_progress_bar.setValue(0)
+        self.load_progress_label.setText(f"Loading {os.path.basename(file_path)} ...")
+        self.load_progress_panel.show()
+        self.load_pool.start(self.load_worker)
+
+    def cancel_load(self):
+        """
+        Cancels the load in progress, the channels already delivered are kept, or the export in progress.
+        """
+        for worker in (self.load_worker, self.export_worker):
+            if worker is not None:
+                worker.cancel()
+                self.load_progress_label.setText("Cancelling ...")
 
     def update_signal_selector(self):
         """
         Updates the signal selector dropdown with the timeseries loaded from the CSV file.
         """
+        # Keep the selection while channels are delivered during a load
+        current_index = self.signal_selector_dropdown.currentIndex()
+        if current_index < 0 or current_index >= len(self.timeseries):
+            current_index = 0
         self.signal_selector_dropdown.clear()
         self.signal_selector_dropdown.addItems(
             [timeseries.name for timeseries in self.timeseries]
         )
-        self.signal_selector_dropdown.setCurrentIndex(0)
-        self.signal_selector_index_changed(0)
+        self.signal_selector_dropdown.setCurrentIndex(current_index)
+        self.signal_selector_index_changed(current_index)
     
     def update_signal_selector_fft(self):
         """
@@ -538,11 +1144,64 @@ class SignalViewer(QMainWindow):
             [signal.name for signal in self.signals_plotted]
         )
         self.signal_selector_dropdown_fft.setCurrentIndex(0)
-        self.signal_selector_index_changed_fft(0)
 
     #########################
     # Signal Event Handlers #
     #########################
+    def load_progressed(self, bytes_read, total_bytes, channels_done, total_channels, eta):
+        """
+        signal handler for the progress of the load worker
+        """
+        if total_bytes > 0:
+            self.load_progress_bar.setValue(int(1000 * bytes_read / total_bytes))
+        text = f"{bytes_read / 1e6:.1f}/{total_bytes / 1e6:.1f} MB"
+        if total_channels > 0:
+            text += f", {channels_done}/{total_channels} channels"
+        if eta >= 0:
+            text += f", ETA {eta:.0f} s"
+        self.load_progress_label.setText(text)
+
+    def timeseries_loaded(self, timeseries):
+        """
+        signal handler for the channels delivered by the load worker, they can be plotted right away
+        """
+        if self.load_worker is None or self.sender() is not self.load_worker.signals:
+            return  # Channels of a load replaced by a newer one
+        self.timeseries.extend(timeseries)
+        self.update_signal_selector()
+
+    def load_finished(self, file_path, cancelled):
+        """
+        signal handler for the end of the load worker
+        """
+        if self.load_worker is None or self.sender() is not self.load_worker.signals:
+            return
+        self.load_worker = None
+        if self.export_worker is None:
+            self.load_progress_panel.hide()
+        if cancelled:
+            print(f"Loading of {os.path.basename(file_path)} cancelled.")
+
+    def export_progressed(self, samples_written, total_samples):
+        """
+        signal handler for the progress of the export worker
+        """
+        if total_samples > 0:
+            self.load_progress_bar.setValue(int(1000 * samples_written / total_samples))
+        self.load_progress_label.setText(f"Exported {samples_written}/{total_samples} samples")
+
+    def export_finished(self, file_path, error):
+        """
+        signal handler for the end of the export worker
+        """
+        self.export_worker = None
+        if self.load_worker is None:
+            self.load_progress_panel.hide()
+        if not error:
+            print(f"Signal data saved to {file_path}")
+        elif error == "cancelled":
+            print(f"Export to {os.path.basename(file_path)} cancelled.")
+
     def signal_selector_index_changed(self, index):
         """
         signal handler for signal selector dropdown
@@ -556,23 +1215,10 @@ class SignalViewer(QMainWindow):
         # self.file_name = self.timeseries[index].name
         # self.plot_signals(self.file_name,"amplitude")
         
-    def signal_selector_index_changed_fft(self, index):
-        """
-        signal handler for signal selector dropdown
-        """
-        N = self.end_sample - self.start_sample
-        N_fft = N / 2
-        if N <= 0:
-            print("Invalid FFT window size.")
-            return
-        if len(self.signals_plotted) > 0 and index < len(self.signals_plotted): 
-            self.perform_fft(N)
-
     def add_signal_to_plot(self):
         """
         Adds a signal to the plot.
         """
-        print("add signal")
         self.signals_plotted.append(
             self.timeseries[self.signal_selector_dropdown.currentIndex()]
         )
@@ -583,7 +1229,6 @@ class SignalViewer(QMainWindow):
         """
         Removes a signal from the plot.
         """
-        print("remove signal")
         for signal in self.signals_plotted:
             if (
                 signal.name
@@ -599,7 +1244,8 @@ class SignalViewer(QMainWindow):
         """
         count=0
         for i,signal in enumerate(self.signals_plotted):
-            self.signals_plotted[i].values = normalize_range(signal.values)+count
+            # Same as normalize_range(signal.values)+count, evaluated lazily
+            self.signals_plotted[i].pipeline.append(NormalizeStage())
+            self.signals_plotted[i].pipeline.append(OffsetStage(count))
             count=count+1
-        print("normalize signal")
         self.plot_signals(self.file_name, "amplitude(normalisée)")
\ No newline at end of file
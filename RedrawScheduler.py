@@ -0,0 +1,70 @@
+from PyQt6.QtCore import QTimer
+
+
+class RedrawScheduler:
+    """
+    Coalesces the redraws of the panels of the viewer.
+    Event handlers only mark panels dirty; once per event loop iteration, the scheduler recomputes and draws each
+    dirty panel once, in the order the panels were registered (e.g. overview, then interval, then FFT).
+    """
+
+    def __init__(self):
+        # name -> function recomputing and drawing the panel, in drawing order
+        self.panels = {}
+        self.dirty = set()
+        # name -> number of times the panel was marked dirty / actually redrawn
+        self.requested = {}
+        self.performed = {}
+        self.listeners = []
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def register(self, name, redraw):
+        """
+        Adds a panel to the scheduler.
+        :param name: The name of the panel.
+        :param redraw: The function recomputing and drawing the panel.
+        """
+        self.panels[name] = redraw
+        self.requested[name] = 0
+        self.performed[name] = 0
+
+    def invalidate(self, *names):
+        """
+        Marks panels dirty, they are redrawn at the next iteration of the event loop.
+        :param names: The names of the panels, all of them if none is given.
+        """
+        names = names or tuple(self.panels)
+        for name in names:
+            self.requested[name] += 1
+            self.dirty.add(name)
+        if not self.timer.isActive():
+            self.timer.start(0)
+
+    def flush(self):
+        """
+        Redraws the dirty panels now. A panel invalidated again while the others redraw is redrawn at the next
+        iteration.
+        """
+        dirty, self.dirty = self.dirty, set()
+        for name, redraw in self.panels.items():
+            if name in dirty:
+                self.performed[name] += 1
+                redraw()
+        for listener in self.listeners:
+            listener(self)
+
+    def avoided(self, name=None):
+        """
+        Returns the number of redundant redraws avoided by coalescing, for one panel or all of them.
+        """
+        names = [name] if name is not None else self.panels
+        return sum(self.requested[name] - self.performed[name] for name in names) - len(
+            [name for name in names if name in self.dirty]
+        )
+
+    def summary(self):
+        return ", ".join(
+            f"{name} {self.performed[name]}/{self.requested[name]}" for name in self.panels
+        ) + f" (avoided {self.avoided()})"
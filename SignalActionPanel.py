@@ -3,6 +3,8 @@ from PyQt6.QtCore import pyqtSignal
 
 class SignalActionPanel(QWidget):
     normalizeButtonClicked = pyqtSignal(str)
+    resetButtonClicked = pyqtSignal(str)
+    spectrogramButtonClicked = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
@@ -18,6 +20,14 @@ class SignalActionPanel(QWidget):
         button1.clicked.connect(lambda: self.normalizeButtonClicked.emit("Button 1 clicked"))
         row1_layout.addWidget(button1)
 
+        reset_button = QPushButton("Reset Processing")
+        reset_button.clicked.connect(lambda: self.resetButtonClicked.emit("Reset clicked"))
+        row1_layout.addWidget(reset_button)
+
+        spectrogram_button = QPushButton("Spectrogram")
+        spectrogram_button.clicked.connect(lambda: self.spectrogramButtonClicked.emit("Spectrogram clicked"))
+        row1_layout.addWidget(spectrogram_button)
+
         # button2 = QPushButton("Button 2")
         # button2.clicked.connect(lambda: self.buttonClicked.emit("Button 2 clicked"))
         # row1_layout.addWidget(button2)
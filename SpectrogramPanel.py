@@ -0,0 +1,98 @@
+import numpy as np
+from PyQt6.QtCore import QTimer, pyqtSignal
+from PyQt6.QtWidgets import QVBoxLayout, QWidget
+from matplotlib.backends.backend_qt5agg import (
+    FigureCanvasQTAgg as FigureCanvas,
+    NavigationToolbar2QT as NavigationToolbar,
+)
+from matplotlib.figure import Figure
+
+from data.Alignment import effective_rate
+from data.Timeseries import Timeseries
+from local_tools.spectral import SpectrogramTiler, TileCache
+
+
+class SpectrogramPanel(QWidget):
+    """
+    Window showing the spectrogram of a timeseries.
+    The image only holds the columns of the visible range at the resolution of the screen; its tiles are computed
+    in the background and drawn as they arrive, while panning and zooming reuse the tiles already computed.
+    """
+
+    # Emitted from the worker threads, delivered on the GUI thread
+    tile_ready = pyqtSignal(int, int)
+
+    def __init__(self, timeseries: Timeseries, nperseg=256, cache: TileCache = None):
+        """
+        Constructor for the SpectrogramPanel class.
+        :param timeseries: The Timeseries to show.
+        :param nperseg: The number of samples of an FFT segment.
+        :param cache: The TileCache shared with the other spectrograms, if any.
+        """
+        super().__init__()
+        self.setWindowTitle(f"Spectrogram - {timeseries.name}")
+        self.timeseries = timeseries
+        timestamps = timeseries.timestamps
+        # The nominal rate is 0 for irregular XDF streams, their mean rate places the columns in time
+        self.sampling_rate = effective_rate(timestamps, timeseries.sampling_rate)
+        self.tiler = SpectrogramTiler(timeseries, nperseg, cache, sampling_rate=self.sampling_rate)
+        self.start_time = float(timestamps[0]) if timestamps is not None and len(timestamps) else 0.0
+
+        self.figure = Figure(figsize=(8, 4), dpi=100)
+        self.canvas = FigureCanvas(self.figure)
+        self.axes = self.figure.add_subplot(111)
+        self.toolbar = NavigationToolbar(self.canvas, self)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.toolbar)
+        layout.addWidget(self.canvas)
+
+        self.image = self.axes.imshow(
+            np.full((2, 2), np.nan), aspect="auto", origin="lower", interpolation="nearest", cmap="viridis"
+        )
+        self.figure.colorbar(self.image, ax=self.axes, label="Power (dB)")
+        self.axes.set_xlabel("Time (Seconds)")
+        self.axes.set_ylabel("Frequency (Hz)")
+        self.axes.set_title(f"Spectrogram of {timeseries.name}")
+        self.axes.set_xlim(self.start_time, self.start_time + len(timeseries) / self.sampling_rate)
+        self.axes.set_ylim(0, self.sampling_rate / 2)
+
+        # Zoom, pan and new tiles only mark the view stale, it is rebuilt once per event loop iteration
+        self.refresh_timer = QTimer()
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.axes.callbacks.connect("xlim_changed", lambda axes: self.refresh_timer.start(0))
+        self.tile_ready.connect(lambda hop, index: self.refresh_timer.start(0))
+        self.tiler_callback = lambda hop, index: self.tile_ready.emit(hop, index)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Draws the cached columns of the visible range and requests the missing tiles.
+        """
+        x_min, x_max = self.axes.get_xlim()
+        start = max(int((x_min - self.start_time) * self.sampling_rate), 0)
+        stop = min(int(np.ceil((x_max - self.start_time) * self.sampling_rate)), len(self.timeseries))
+        if stop <= start:
+            return
+        hop, first, power, missing = self.tiler.view(start, stop, self.axes.bbox.width)
+        self.tiler.request(hop, missing, self.tiler_callback)
+        if len(power) == 0:
+            return
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            decibels = 10 * np.log10(power.T)
+        self.image.set_data(decibels)
+        # Column c covers the samples [c * hop, c * hop + frame length), drawn centred on its frame
+        offset = (self.tiler.frame_length(hop) - hop) / 2
+        left = self.start_time + (first * hop + offset) / self.sampling_rate
+        right = left + len(power) * hop / self.sampling_rate
+        frequencies = self.tiler.frequencies()
+        self.image.set_extent((left, right, frequencies[0], frequencies[-1]))
+        finite = decibels[np.isfinite(decibels)]
+        if finite.size:
+            self.image.set_clim(*np.percentile(finite, (5, 99.5)))
+        self.canvas.draw_idle()
+
+    def closeEvent(self, event):
+        self.tiler.shutdown()
+        super().closeEvent(event)
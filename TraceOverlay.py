@@ -0,0 +1,45 @@
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QLabel
+
+from local_tools import tracing
+
+TRACE_OVERLAY_INTERVAL_MS = 500  # Refresh period of the overlay
+TRACE_OVERLAY_SECONDS = 5.0  # Spans older than this are not shown
+
+
+class TraceOverlay(QLabel):
+    """
+    Translucent box drawn over the top right corner of its parent, listing the timings of the recent spans.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 170); color: #e0e0e0; font-family: monospace; padding: 6px;"
+        )
+        self.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        self.timer = QTimer(self)
+        self.timer.setInterval(TRACE_OVERLAY_INTERVAL_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def set_visible(self, visible):
+        if visible:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.timer.start()
+        else:
+            self.timer.stop()
+            self.hide()
+
+    def refresh(self):
+        lines = [f"{'span':14} {'n':>5} {'mean ms':>9} {'max ms':>9} {'last ms':>9}"]
+        for name, count, mean, maximum, last in tracing.recent_summary(TRACE_OVERLAY_SECONDS):
+            lines.append(f"{name[:14]:14} {count:>5} {mean:>9.2f} {maximum:>9.2f} {last:>9.2f}")
+        if len(lines) == 1:
+            lines.append("no span in the last seconds" if tracing.enabled else "tracing is disabled")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(self.parent().width() - self.width() - 10, 10)
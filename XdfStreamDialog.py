@@ -0,0 +1,64 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QDialog, QDialogButtonBox, QLabel, QListWidget, QListWidgetItem, QVBoxLayout
+
+from data.XdfIndex import XdfStreamInfo
+
+
+class XdfStreamDialog(QDialog):
+    """
+    Dialog listing the streams of an XDF file (read from its headers only) to choose the ones to load.
+    """
+
+    def __init__(self, file_name, streams, selected_ids=()):
+        """
+        Constructor for the XdfStreamDialog class.
+        :param file_name: The name of the XDF file, shown in the title.
+        :param streams: The list of XdfStreamInfo of the file.
+        :param selected_ids: The identifiers of the streams checked initially, e.g. the ones already loaded.
+        """
+        super().__init__()
+        self.setWindowTitle(f"Streams of {file_name}")
+        self.streams = streams
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Check the streams to load, unchecked streams are unloaded:"))
+
+        self.stream_list = QListWidget()
+        for stream in streams:
+            item = QListWidgetItem(self.describe(stream))
+            item.setData(Qt.ItemDataRole.UserRole, stream.stream_id)
+            if stream.channel_labels:
+                item.setToolTip(", ".join(stream.channel_labels))
+            if stream.is_numeric():
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                checked = stream.stream_id in selected_ids
+                item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+            else:
+                # Marker streams hold strings, they cannot be plotted
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEnabled)
+            self.stream_list.addItem(item)
+        layout.addWidget(self.stream_list)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    @staticmethod
+    def describe(stream: XdfStreamInfo):
+        rate = f"{stream.nominal_srate:g} Hz" if stream.nominal_srate > 0 else "irregular"
+        size = stream.sample_bytes / 1024**2
+        return (
+            f"{stream.name} ({stream.stream_type or 'no type'}): {stream.channel_count} channels, {rate}, "
+            f"{stream.channel_format}, {size:.1f} MiB"
+        )
+
+    def selected_ids(self):
+        """
+        Returns the identifiers of the checked streams.
+        """
+        ids = []
+        for row in range(self.stream_list.count()):
+            item = self.stream_list.item(row)
+            if item.checkState() == Qt.CheckState.Checked:
+                ids.append(item.data(Qt.ItemDataRole.UserRole))
+        return ids
@@ -0,0 +1,259 @@
+""" Command line entry point processing recordings without the user interface.
+    Description: Every CSV/XDF file of a directory or glob goes through a declarative pipeline (resample, filter chain,
+    normalize, spectra) in a pool of worker processes, each with its own memory cap. The results of each file are
+    written as compact binary .npz files, and the time spent in each step is summarized per file.
+
+    Example:
+        python batch.py "sessions/*.xdf" -o results --jobs 4 --memory-limit 2G \
+            --pipeline '{"resample": 250, "filters": ["geordi"], "normalize": true, "spectra": {"nperseg": 1024}}'
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from data.Alignment import effective_rate, resample_rows
+from data.Timeseries import load_data_file, unique_stores
+from local_tools.filters import GEORDI_STAGES, design_cascade, filter_channels, normalize_range
+from local_tools.spectral import WELCH_SEGMENT, welch_psd
+
+DEFAULT_SAMPLING_RATE = 1000  # Sampling rate of the CSV files when the pipeline does not resample
+PIPELINE_KEYS = {"resample", "filters", "causal", "normalize", "spectra", "dtype"}
+RECORDING_EXTENSIONS = (".csv", ".xdf")
+
+
+def parse_pipeline(text):
+    """
+    Reads a pipeline description, given as JSON or as the path of a JSON file:
+        resample: the sampling rate (in Hz) every stream is resampled to,
+        filters: a list of filter stages (see local_tools.filters.design_stage), or "geordi" for GEORDI_STAGES,
+        causal: true to filter forward only,
+        normalize: true to scale every channel to [-1, 1],
+        spectra: true or {"nperseg": n} to compute the Welch power spectral density of every channel,
+        dtype: the type of the samples written, "float32" by default.
+    :param text: The JSON text or the path of the JSON file.
+    :return: The pipeline as a dict.
+    """
+    if os.path.isfile(text):
+        with open(text) as pipeline_file:
+            text = pipeline_file.read()
+    pipeline = json.loads(text) if text else {}
+    unknown = set(pipeline) - PIPELINE_KEYS
+    if unknown:
+        raise ValueError(f"Unknown pipeline steps: {', '.join(sorted(unknown))}")
+    stages = []
+    for stage in pipeline.get("filters", []):
+        if stage == "geordi":
+            stages.extend(GEORDI_STAGES)
+        else:
+            # Stages are hashed by the filter design cache, band cutoffs become tuples
+            stages.append(tuple(tuple(item) if isinstance(item, list) else item for item in stage))
+    pipeline["filters"] = tuple(stages)
+    if pipeline.get("spectra") is True:
+        pipeline["spectra"] = {}
+    np.dtype(pipeline.setdefault("dtype", "float32"))
+    return pipeline
+
+
+def parse_size(text):
+    """
+    Converts a size such as "512M" or "2G" into a number of bytes.
+    """
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def find_recordings(inputs):
+    """
+    Returns the sorted CSV/XDF files of directories, globs and paths.
+    """
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            paths = [os.path.join(item, name) for name in os.listdir(item)]
+        else:
+            paths = glob.glob(item, recursive=True)
+        files.update(os.path.abspath(path) for path in paths if path.lower().endswith(RECORDING_EXTENSIONS))
+    return sorted(files)
+
+
+def limit_memory(memory_limit):
+    """
+    Caps the memory of the current worker process, a step going over the cap raises MemoryError.
+    """
+    if not memory_limit:
+        return
+    try:
+        import resource
+    except ImportError:
+        print("Memory limits are not supported on this platform.")
+        return
+    limit = getattr(resource, "RLIMIT_DATA", resource.RLIMIT_AS)
+    resource.setrlimit(limit, (memory_limit, memory_limit))
+
+
+def resample_store(store, sampling_rate):
+    """
+    Resamples the channels of a store on the grid k / sampling_rate (see data.Alignment.resample_rows).
+    :return: A tuple (data, start_time).
+    """
+    source_rate = effective_rate(store.timestamps, store.sampling_rate)
+    first_index, data = resample_rows(store.decode(), store.timestamps, source_rate, sampling_rate)
+    return data, first_index / sampling_rate
+
+
+def process_store(store, pipeline, timings):
+    """
+    Runs the pipeline on the channels of one store, the time of each step is added to timings.
+    :return: The dict of arrays to save.
+    """
+    start = time.perf_counter()
+
+    def lap(step):
+        nonlocal start
+        now = time.perf_counter()
+        timings[step] = timings.get(step, 0.0) + now - start
+        start = now
+
+    data = store.decode()
+    sampling_rate = float(store.sampling_rate)
+    timestamps = store.timestamps
+    start_time = float(timestamps[0]) if timestamps is not None and len(timestamps) else 0.0
+    if pipeline.get("resample") and timestamps is not None and sampling_rate != float(pipeline["resample"]):
+        sampling_rate = float(pipeline["resample"])
+        data, start_time = resample_store(store, sampling_rate)
+        lap("resample")
+    if sampling_rate <= 0:
+        raise ValueError("Irregular stream, set a resampling rate in the pipeline")
+
+    if pipeline["filters"]:
+        cascade = design_cascade(pipeline["filters"], sampling_rate)
+        data = filter_channels(cascade, data, causal=pipeline.get("causal", False))
+        lap("filter")
+
+    if pipeline.get("normalize"):
+        # Same scaling as the viewer, per channel
+        data = normalize_range(data, (data.min(axis=1, keepdims=True), data.max(axis=1, keepdims=True)))
+        lap("normalize")
+
+    results = {
+        "data": data.astype(pipeline["dtype"]),
+        "names": np.array(store.names),
+        "sampling_rate": sampling_rate,
+        "start_time": start_time,
+    }
+    if pipeline.get("spectra") is not None:
+        nperseg = int(pipeline["spectra"].get("nperseg", WELCH_SEGMENT))
+        # One thread: the files are already spread over the worker processes
+        results["frequencies"], results["psd"] = welch_psd(data, sampling_rate, nperseg, workers=1)
+        results["psd"] = results["psd"].astype(pipeline["dtype"])
+        lap("spectra")
+    return results
+
+
+def process_file(file_path, pipeline, output_directory, default_sampling_rate=DEFAULT_SAMPLING_RATE):
+    """
+    Loads a recording, runs the pipeline on each of its streams and writes one .npz file per stream.
+    Runs in a worker process.
+    :return: The summary of the file: its status, sizes and the time spent in each step (in seconds).
+    """
+    summary = {"file": file_path, "status": "ok", "channels": 0, "samples": 0, "outputs": []}
+    timings = {}
+    started = time.perf_counter()
+    try:
+        # CSV files are read as is when the pipeline resamples, so that they are resampled only once
+        timeseries = load_data_file(file_path, None if pipeline.get("resample") else default_sampling_rate)
+        stores = unique_stores(timeseries)
+        timings["load"] = time.perf_counter() - started
+
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        for index, store in enumerate(stores):
+            if not np.issubdtype(store.data.dtype, np.number) or store.sample_count < 2:
+                continue  # Marker streams
+            results = process_store(store, pipeline, timings)
+            saving = time.perf_counter()
+            name = stem if len(stores) == 1 else f"{stem}_{index}"
+            output_path = os.path.join(output_directory, name + ".npz")
+            np.savez(output_path, **results)
+            timings["save"] = timings.get("save", 0.0) + time.perf_counter() - saving
+            summary["outputs"].append(output_path)
+            summary["channels"] += store.channel_count
+            summary["samples"] += results["data"].size
+        if not summary["outputs"]:
+            summary["status"] = "no data"
+    except MemoryError:
+        summary["status"] = "memory limit"
+    except Exception as e:
+        summary["status"] = f"error: {e}"
+    timings["total"] = time.perf_counter() - started
+    summary["timings"] = timings
+    return summary
+
+
+def print_summary(summaries):
+    steps = ["load", "resample", "filter", "normalize", "spectra", "save", "total"]
+    print(f"{'file':40} {'channels':>8} {'samples':>12} " + " ".join(f"{step:>9}" for step in steps) + "  status")
+    for summary in summaries:
+        timings = summary["timings"]
+        print(
+            f"{os.path.basename(summary['file'])[:40]:40} {summary['channels']:>8} {summary['samples']:>12} "
+            + " ".join(f"{timings.get(step, 0.0):>9.3f}" for step in steps)
+            + f"  {summary['status']}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process CSV/XDF recordings without the user interface.")
+    parser.add_argument("inputs", nargs="+", help="Directories, globs or paths of CSV/XDF files")
+    parser.add_argument("-o", "--output", required=True, help="Directory of the .npz results")
+    parser.add_argument("-p", "--pipeline", default="", help="Pipeline as JSON or the path of a JSON file")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--memory-limit", default=None, help="Memory cap of each worker, e.g. 2G")
+    parser.add_argument(
+        "--sampling-rate",
+        type=float,
+        default=DEFAULT_SAMPLING_RATE,
+        help="Sampling rate of the CSV files when the pipeline does not resample",
+    )
+    args = parser.parse_args(argv)
+
+    pipeline = parse_pipeline(args.pipeline)
+    files = find_recordings(args.inputs)
+    if not files:
+        print("No CSV/XDF file found.")
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    memory_limit = parse_size(args.memory_limit) if args.memory_limit else None
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=limit_memory, initargs=(memory_limit,)) as pool:
+        futures = {
+            pool.submit(process_file, path, pipeline, args.output, args.sampling_rate): path for path in files
+        }
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                # The worker died, e.g. killed for its memory
+                summary = {"file": futures[future], "status": f"worker failed: {e}", "channels": 0, "samples": 0,
+                           "outputs": [], "timings": {"total": 0.0}}
+            print(f"{os.path.basename(summary['file'])}: {summary['status']} ({summary['timings']['total']:.2f} s)")
+            summaries.append(summary)
+
+    summaries.sort(key=lambda summary: summary["file"])
+    print_summary(summaries)
+    with open(os.path.join(args.output, "batch_summary.json"), "w") as summary_file:
+        json.dump(summaries, summary_file, indent=2)
+    return 0 if all(summary["status"] == "ok" for summary in summaries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
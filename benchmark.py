@@ -0,0 +1,399 @@
+""" Benchmark suite measuring how the loading, processing and plotting code scales.
+    Description: Every case runs on synthetic signals generated with a fixed seed, from 10^4 to 10^8 samples and from
+    1 to 256 channels (combinations over the memory budget are skipped). The wall time (best of several runs) and
+    the peak memory allocated (measured with tracemalloc in a separate run) are reported for each case. Plot cases
+    draw freshly built timeseries in every run, so their time is measured with cold caches (pyramids, statistics,
+    processed windows); the same run repeated on the warm caches is reported separately. The results can be saved as
+    a baseline, later runs are compared to it and regressions are flagged.
+
+    Example:
+        python benchmark.py --sizes 1e4,1e6 --channels 1,16 --save-baseline
+        python benchmark.py --sizes 1e4,1e6 --channels 1,16
+"""
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from data.Timeseries import Timeseries, parse_data_file_csv, parse_data_file_xdf
+from local_tools.filters import (
+    apply_geordi_filtering,
+    butter_bandpass_filter,
+    butter_highpass_filter,
+    butter_lowpass_filter,
+    butter_stoppass_filter,
+    normalize_range,
+)
+
+BENCHMARK_SAMPLING_RATE = 1000  # Sampling rate of the synthetic signals (in Hz)
+BENCHMARK_SEED = 0
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_SIZES = "1e4,1e5,1e6,1e7,1e8"
+DEFAULT_CHANNELS = "1,16,256"
+DEFAULT_MAX_BYTES = 2 * 1024**3  # Largest synthetic signal (channels x samples x 8 bytes) of the in-memory cases
+DEFAULT_MAX_FILE_VALUES = 10**7  # Largest number of values written to a generated CSV/XDF file
+DEFAULT_MAX_PLOT_CHANNELS = 16  # Most channels drawn by the plotting cases
+# Differences below these are noise, never flagged as regressions
+REGRESSION_FLOOR = {"time": 0.005, "warm_time": 0.005, "peak_memory": 1024**2}
+
+application = None  # QApplication of the plotting cases, created on first use
+
+
+def synthetic_signals(samples, channels, seed=BENCHMARK_SEED):
+    """
+    Returns reproducible test signals: one sine per channel plus noise, shape (channels, samples).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(samples) / BENCHMARK_SAMPLING_RATE
+    data = np.empty((channels, samples))
+    for channel in range(channels):
+        data[channel] = np.sin(2 * np.pi * (5 + channel) * t) + 0.1 * rng.standard_normal(samples)
+    return data
+
+
+def write_csv(path, data):
+    """
+    Writes signals as a CSV file in the format read by parse_data_file_csv, with a jittered time column.
+    """
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    samples = data.shape[1]
+    time_column = (np.arange(samples) + rng.uniform(-0.2, 0.2, samples)) / BENCHMARK_SAMPLING_RATE
+    time_column[0] = 0
+    header = ",".join(["time"] + [f"ch{channel}" for channel in range(data.shape[0])])
+    rows = 100_000
+    with open(path, "w") as csv_file:
+        csv_file.write(header + "\n")
+        for start in range(0, samples, rows):
+            block = np.column_stack((time_column[start : start + rows], data[:, start : start + rows].T))
+            np.savetxt(csv_file, block, delimiter=",", fmt="%.6f")
+
+
+def xdf_chunk(tag, content):
+    """
+    Returns an XDF chunk: its length (variable-length integer, counting the tag), its tag and its content.
+    """
+    length = len(content) + 2
+    if length < 256:
+        prefix = struct.pack("<BB", 1, length)
+    elif length < 2**32:
+        prefix = struct.pack("<BI", 4, length)
+    else:
+        prefix = struct.pack("<BQ", 8, length)
+    return prefix + struct.pack("<H", tag) + content
+
+
+def write_xdf(path, data):
+    """
+    Writes signals as a single float32 stream of an XDF file, in blocks of samples with explicit timestamps.
+    """
+    channels, samples = data.shape
+    header = (
+        "<?xml version='1.0'?><info><name>benchmark</name><type>EEG</type>"
+        f"<channel_count>{channels}</channel_count><nominal_srate>{BENCHMARK_SAMPLING_RATE}</nominal_srate>"
+        "<channel_format>float32</channel_format><created_at>0</created_at></info>"
+    )
+    with open(path, "wb") as xdf_file:
+        xdf_file.write(b"XDF:")
+        xdf_file.write(xdf_chunk(1, b"<?xml version='1.0'?><info><version>1.0</version></info>"))
+        xdf_file.write(xdf_chunk(2, struct.pack("<I", 1) + header.encode()))
+        # Each sample: a timestamp flag (8 bytes follow), its timestamp, then the value of every channel
+        sample_type = np.dtype([("flag", "u1"), ("time", "<f8"), ("values", "<f4", (channels,))])
+        block = 10_000
+        for start in range(0, samples, block):
+            stop = min(start + block, samples)
+            records = np.empty(stop - start, dtype=sample_type)
+            records["flag"] = 8
+            records["time"] = np.arange(start, stop) / BENCHMARK_SAMPLING_RATE
+            records["values"] = data[:, start:stop].T
+            content = struct.pack("<IBI", 1, 4, stop - start) + records.tobytes()
+            xdf_file.write(xdf_chunk(3, content))
+        footer = (
+            "<?xml version='1.0'?><info><first_timestamp>0</first_timestamp>"
+            f"<last_timestamp>{(samples - 1) / BENCHMARK_SAMPLING_RATE}</last_timestamp>"
+            f"<sample_count>{samples}</sample_count></info>"
+        )
+        xdf_file.write(xdf_chunk(6, struct.pack("<I", 1) + footer.encode()))
+
+
+def plotted_viewer(data):
+    """
+    Returns an offscreen SignalViewer plotting the channels of data.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from MainWindow import SignalViewer
+
+    global application
+    application = QApplication.instance() or QApplication([])
+    viewer = SignalViewer(BENCHMARK_SAMPLING_RATE)
+    viewer.resize(1400, 900)
+    plot_fresh_signals(viewer, data)
+    viewer.start_sample = 0
+    viewer.end_sample = min(data.shape[1], 10_000)
+    return viewer
+
+
+def plot_fresh_signals(viewer, data):
+    """
+    Replaces the plotted signals of a viewer by new timeseries of the channels of data, whose caches are empty.
+    """
+    timestamps = np.arange(data.shape[1]) / BENCHMARK_SAMPLING_RATE
+    viewer.signals_plotted = [
+        Timeseries(row, BENCHMARK_SAMPLING_RATE, f"ch{channel}", timestamps) for channel, row in enumerate(data)
+    ]
+    viewer.timeseries = list(viewer.signals_plotted)
+    viewer.update_signal_selector_fft()
+
+
+class Case:
+    """
+    A benchmarked function. setup(samples, channels, workdir) prepares its input outside of the measure and
+    returns the function to measure. File cases generate a file, plot cases draw on an offscreen viewer: their setup
+    returns a function building fresh timeseries and returning the function to measure on them.
+    """
+
+    def __init__(self, name, setup, file_case=False, plot_case=False):
+        self.name = name
+        self.setup = setup
+        self.file_case = file_case
+        self.plot_case = plot_case
+
+
+def setup_csv(samples, channels, workdir):
+    path = os.path.join(workdir, f"bench_{samples}_{channels}.csv")
+    if not os.path.exists(path):
+        write_csv(path, synthetic_signals(samples, channels))
+    return lambda: parse_data_file_csv(path, BENCHMARK_SAMPLING_RATE, [])
+
+
+def setup_xdf(samples, channels, workdir):
+    path = os.path.join(workdir, f"bench_{samples}_{channels}.xdf")
+    if not os.path.exists(path):
+        write_xdf(path, synthetic_signals(samples, channels))
+    return lambda: parse_data_file_xdf(path)
+
+
+def setup_array(function):
+    def setup(samples, channels, workdir):
+        data = synthetic_signals(samples, channels)
+        return lambda: function(data)
+
+    return setup
+
+
+def setup_plot_case(draw):
+    def setup(samples, channels, workdir):
+        data = synthetic_signals(samples, channels)
+        viewer = plotted_viewer(data)
+
+        def fresh():
+            plot_fresh_signals(viewer, data)
+            return lambda: draw(viewer)
+
+        return fresh
+
+    return setup
+
+
+def draw_fft(viewer):
+    # The FFT runs on a window of a tenth of the signal
+    viewer.end_sample = max(len(viewer.signals_plotted[0]) // 10, 2)
+    viewer.perform_fft()
+
+
+def draw_interval(viewer):
+    N = viewer.end_sample - viewer.start_sample
+    viewer.update_temporal_interval_view(N, f"interval view on {N} samples")
+    viewer.top_right_panel.draw()
+
+
+CASES = [
+    Case("parse_data_file_csv", setup_csv, file_case=True),
+    Case("parse_data_file_xdf", setup_xdf, file_case=True),
+    Case("apply_geordi_filtering", setup_array(lambda data: apply_geordi_filtering(data, BENCHMARK_SAMPLING_RATE))),
+    Case(
+        "butter_lowpass_filter",
+        setup_array(lambda data: butter_lowpass_filter(data, 40, BENCHMARK_SAMPLING_RATE, order=4)),
+    ),
+    Case(
+        "butter_highpass_filter",
+        setup_array(lambda data: butter_highpass_filter(data, 4, BENCHMARK_SAMPLING_RATE, order=4)),
+    ),
+    Case(
+        "butter_bandpass_filter",
+        setup_array(lambda data: butter_bandpass_filter(data, 4, 40, BENCHMARK_SAMPLING_RATE, order=4)),
+    ),
+    Case(
+        "butter_stoppass_filter",
+        setup_array(lambda data: butter_stoppass_filter(data, 45, 55, BENCHMARK_SAMPLING_RATE, order=4)),
+    ),
+    Case("normalize_range", setup_array(normalize_range)),
+    Case("perform_fft", setup_plot_case(draw_fft), plot_case=True),
+    Case("plot_signals", setup_plot_case(lambda viewer: viewer.draw_overview()), plot_case=True),
+    Case("update_temporal_interval_view", setup_plot_case(draw_interval), plot_case=True),
+]
+
+
+def measure(function, repeat, fresh=None):
+    """
+    Returns the best wall time of repeat runs (in seconds) and the peak memory allocated by one run (in bytes).
+    Library prints are discarded so they do not flood the report.
+    :param function: The function to measure, None if fresh is given.
+    :param fresh: A function returning the function to measure on fresh state, called outside of the measure
+        before every run. Each run is then followed by a second, warm one.
+    :return: A tuple (time, peak_memory, warm_time), warm_time is None without fresh.
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        times, warm_times = [], []
+        for _ in range(repeat):
+            if fresh is not None:
+                function = fresh()
+            gc.collect()
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+            if fresh is not None:
+                start = time.perf_counter()
+                function()
+                warm_times.append(time.perf_counter() - start)
+        if fresh is not None:
+            function = fresh()
+        gc.collect()
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return min(times), peak, min(warm_times) if warm_times else None
+
+
+def run_benchmarks(cases, sizes, channel_counts, repeat, max_bytes, max_file_values, max_plot_channels, workdir):
+    """
+    Runs every case on every (samples, channels) combination within the limits.
+    :return: A dict "case/samples/channels" -> {"time": seconds, "peak_memory": bytes}, plus "warm_time" (seconds)
+        for the plot cases, "time" being measured with cold caches.
+    """
+    results = {}
+    for case in cases:
+        for samples in sizes:
+            for channels in channel_counts:
+                if samples * channels * 8 > max_bytes:
+                    continue
+                if case.file_case and samples * channels > max_file_values:
+                    continue
+                if case.plot_case and channels > max_plot_channels:
+                    continue
+                key = f"{case.name}/{samples}/{channels}"
+                try:
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        function = case.setup(samples, channels, workdir)
+                    if case.plot_case:
+                        elapsed, peak, warm = measure(None, repeat, fresh=function)
+                    else:
+                        elapsed, peak, warm = measure(function, repeat)
+                except MemoryError:
+                    print(f"{key}: out of memory")
+                    continue
+                results[key] = {"time": elapsed, "peak_memory": peak}
+                line = f"{key:50} {elapsed * 1000:12.2f} ms {peak / 1024**2:10.1f} MiB"
+                if warm is not None:
+                    results[key]["warm_time"] = warm
+                    line += f" {warm * 1000:12.2f} ms warm"
+                print(line, flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the regressions: the cases slower or using more memory than the baseline by more than tolerance
+    (and by more than REGRESSION_FLOOR).
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric in ("time", "warm_time", "peak_memory"):
+            if metric not in reference or metric not in result:
+                continue
+            limit = max(reference[metric] * (1 + tolerance), reference[metric] + REGRESSION_FLOOR[metric])
+            if reference[metric] > 0 and result[metric] > limit:
+                regressions.append((key, metric, reference[metric], result[metric]))
+    return regressions
+
+
+def parse_list(text):
+    return [int(float(item)) for item in text.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the loading, processing and plotting code.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated numbers of samples")
+    parser.add_argument("--channels", default=DEFAULT_CHANNELS, help="Comma separated numbers of channels")
+    parser.add_argument("--cases", default="", help="Comma separated names of the cases to run, all by default")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs of each case")
+    parser.add_argument("--max-bytes", type=float, default=DEFAULT_MAX_BYTES, help="Largest synthetic signal")
+    parser.add_argument("--max-file-values", type=float, default=DEFAULT_MAX_FILE_VALUES,
+                        help="Largest number of values of the generated files")
+    parser.add_argument("--max-plot-channels", type=int, default=DEFAULT_MAX_PLOT_CHANNELS,
+                        help="Most channels of the plotting cases")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Path of the baseline results")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging, 0.25 = 25%%")
+    parser.add_argument("--workdir", default=None, help="Directory of the generated files, temporary by default")
+    args = parser.parse_args(argv)
+    # pyxdf warns about the clock offsets the generated files do not have
+    logging.getLogger("pyxdf").setLevel(logging.ERROR)
+
+    cases = CASES
+    if args.cases:
+        names = set(args.cases.split(","))
+        cases = [case for case in CASES if case.name in names]
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        workdir = args.workdir or temporary_directory
+        os.makedirs(workdir, exist_ok=True)
+        results = run_benchmarks(
+            cases,
+            parse_list(args.sizes),
+            parse_list(args.channels),
+            args.repeat,
+            args.max_bytes,
+            args.max_file_values,
+            args.max_plot_channels,
+            workdir,
+        )
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        baseline.update(results)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.baseline}.")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline) as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.tolerance)
+    for key, metric, reference, value in regressions:
+        print(f"REGRESSION {key} {metric}: {reference:.6g} -> {value:.6g} ({value / reference - 1:+.0%})")
+    if not regressions:
+        print("No regression.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
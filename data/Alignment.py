@@ -0,0 +1,285 @@
+""" This file contains the alignment engine producing views of signals at any sampling rate.
+    Description: Signals keep their native samples and timestamps. An aligned view resamples a signal onto the
+    global grid k / rate (k integer), so the views of signals from different files or streams at the same rate line
+    up sample for sample. Uniformly sampled signals go through an anti-aliased polyphase resampler, irregular ones
+    are first interpolated on a uniform grid at their own rate. Views are computed window by window (see
+    resample_window), so long or disk-backed signals are never processed whole, and cached per (signal, rate), so
+    switching between rates only computes each view once.
+"""
+import math
+import threading
+from fractions import Fraction
+
+import numpy as np
+from scipy import signal
+
+from data.SignalStore import temporary_memmap
+from data.TimeIndex import grid_deviation
+from local_tools import tracing
+from local_tools.spectral import TileCache
+
+ALIGNMENT_CACHE_BYTES = 256 * 1024**2  # Memory budget of the aligned views kept in memory
+ALIGNMENT_CHUNK_SAMPLES = 1 << 20  # Number of grid samples of a view resampled at a time
+UNIFORM_TOLERANCE = 1e-3  # Largest deviation of a timestamp from the regular grid, in periods, of a uniform signal
+MAX_RATIO_DENOMINATOR = 1000  # Bound on the up and down factors of the polyphase resampler
+GRID_EPSILON = 1e-9  # Tolerance, in samples, when placing a time on the grid
+
+
+def effective_rate(timestamps, nominal_rate):
+    """
+    Returns the sampling rate of a signal: its nominal rate, or the mean rate of its timestamps when the nominal
+    rate is unknown (0 for irregular XDF streams).
+    :param timestamps: The timestamps of the signal (in seconds), or None.
+    :param nominal_rate: The declared sampling rate, possibly a string (XDF headers).
+    """
+    rate = float(nominal_rate) if nominal_rate else 0.0
+    if rate > 0 or timestamps is None or len(timestamps) < 2:
+        return rate if rate > 0 else 1.0
+    span = float(timestamps[-1]) - float(timestamps[0])
+    return (len(timestamps) - 1) / span if span > 0 else 1.0
+
+
+def is_uniform(timestamps, rate, tolerance=UNIFORM_TOLERANCE):
+    """
+    Returns True if every timestamp is within tolerance periods of the regular grid at rate starting at the first one.
+    Jitter and clock drift (e.g. of LSL streams) make a signal irregular, its timestamps are then interpolated.
+    """
+    if timestamps is None or len(timestamps) < 3:
+        return True
+    period = 1.0 / rate
+    return grid_deviation(timestamps, period) <= tolerance * period
+
+
+def rational_ratio(source_rate, target_rate):
+    """
+    Returns the up and down factors of the polyphase resampler converting source_rate into target_rate.
+    """
+    ratio = Fraction(float(target_rate) / float(source_rate)).limit_denominator(MAX_RATIO_DENOMINATOR)
+    if ratio == 0:
+        ratio = Fraction(1, MAX_RATIO_DENOMINATOR)
+    return ratio.numerator, ratio.denominator
+
+
+def grid_range(first_time, last_time, rate):
+    """
+    Returns the half-open range [first, stop) of the grid indices k whose time k / rate is in [first_time, last_time].
+    """
+    first = math.ceil(first_time * rate - GRID_EPSILON)
+    stop = math.floor(last_time * rate + GRID_EPSILON) + 1
+    return first, max(stop, first)
+
+
+def interpolate_rows(time, values, new_time):
+    """
+    Linearly interpolates every column of values at new_time in one vectorized pass.
+    new_time must lie within [time[0], time[-1]].
+    :param time: The sorted sample times, shape (samples,).
+    :param values: The samples, shape (samples, channels).
+    :param new_time: The times to interpolate at, shape (new_samples,).
+    :return: The interpolated samples, shape (channels, new_samples).
+    """
+    # Same neighbour selection and arithmetic as interp1d(kind="linear")
+    high = np.clip(np.searchsorted(time, new_time, side="left"), 1, len(time) - 1)
+    low = high - 1
+    slope = (values[high] - values[low]) / (time[high] - time[low])[:, None]
+    return (slope * (new_time - time[low])[:, None] + values[low]).T
+
+
+def interpolate_positions(rows, positions):
+    """
+    Linearly interpolates the rows of a 2-D array at fractional sample positions, in one vectorized pass.
+    :param rows: The samples, shape (channels, samples).
+    :param positions: The fractional sample indices, within [0, samples - 1].
+    :return: The interpolated samples, shape (channels, len(positions)).
+    """
+    rounded = np.rint(positions)
+    if np.all(np.abs(positions - rounded) <= GRID_EPSILON):
+        return rows[:, rounded.astype(np.intp)]
+    low = np.clip(np.floor(positions).astype(np.intp), 0, max(rows.shape[1] - 2, 0))
+    high = np.minimum(low + 1, rows.shape[1] - 1)
+    fraction = positions - low
+    return rows[:, low] * (1 - fraction) + rows[:, high] * fraction
+
+
+def resample_rows(data, timestamps, source_rate, target_rate):
+    """
+    Resamples the rows of data onto the global grid k / target_rate, within the time span of the signal.
+    Uniform signals are resampled by a polyphase filter (anti-aliased), then shifted onto the grid if their first
+    timestamp is not on it. Irregular signals are linearly interpolated on a uniform grid at their own rate first.
+    :param data: The samples, shape (channels, samples) or (samples,).
+    :param timestamps: The timestamps of the samples (in seconds), None for samples at k / source_rate.
+    :param source_rate: The sampling rate of data, see effective_rate.
+    :param target_rate: The sampling rate of the result.
+    :return: A tuple (first_index, values) where values has shape (channels, samples) and its first sample is at
+        the time first_index / target_rate.
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=np.float64))
+    source_rate = float(source_rate)
+    target_rate = float(target_rate)
+    if timestamps is None:
+        timestamps = np.arange(data.shape[1]) / source_rate
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if data.shape[1] == 0:
+        return 0, np.empty((data.shape[0], 0))
+    first, stop = grid_range(timestamps[0], timestamps[-1], target_rate)
+    if stop <= first:
+        return first, np.empty((data.shape[0], 0))
+
+    start_time = timestamps[0]
+    if not is_uniform(timestamps, source_rate):
+        # Uniform grid at the native rate, so that downsampling below still goes through the anti-aliasing filter
+        native_first, native_stop = grid_range(timestamps[0], timestamps[-1], source_rate)
+        native_time = np.arange(native_first, native_stop) / source_rate
+        with tracing.span("interpolate", samples=len(native_time), channels=data.shape[0]):
+            data = interpolate_rows(timestamps, data.T, native_time)
+        start_time = native_first / source_rate
+
+    up, down = rational_ratio(source_rate, target_rate)
+    if up != down:
+        with tracing.span("resample_poly", samples=data.shape[1], channels=data.shape[0], up=up, down=down):
+            data = signal.resample_poly(data, up, down, axis=1)
+    resampled_rate = source_rate * up / down
+    positions = (np.arange(first, stop) / target_rate - start_time) * resampled_rate
+    return first, interpolate_positions(data, np.clip(positions, 0, data.shape[1] - 1))
+
+
+def resample_window(timeseries, source_rate, target_rate, first, stop):
+    """
+    Returns the grid samples [first, stop) (at the times k / target_rate) of a timeseries, reading only the source
+    samples they depend on plus the length of the resampling filter on each side, so that long or disk-backed
+    signals are never processed whole. Windows computed this way join without seams.
+    :param timeseries: The Timeseries to resample, processed by its pipeline.
+    :param source_rate: The sampling rate of the timeseries, see effective_rate.
+    :param target_rate: The sampling rate of the grid.
+    :param first: The first grid index.
+    :param stop: The grid index after the last one.
+    :return: The 1-D resampled values, NaN where the timeseries has no sample.
+    """
+    values = np.full(max(stop - first, 0), np.nan)
+    up, down = rational_ratio(source_rate, target_rate)
+    padding = 10 * max(up, down) // up + 2
+    source_first, source_stop = timeseries.time_index.range(first / target_rate, (stop - 1) / target_rate)
+    source_first = max(source_first - padding, 0)
+    if up != down:
+        # Start on the polyphase period of the whole signal, so that the output samples are the same as its own
+        source_first -= source_first % down
+    source_stop = min(source_stop + padding, len(timeseries))
+    if source_stop - source_first < 2:
+        return values
+    timestamps = timeseries.timestamps
+    if timestamps is None:
+        window_times = np.arange(source_first, source_stop) / source_rate
+    else:
+        window_times = timestamps[source_first:source_stop]
+    window_first, window_values = resample_rows(
+        timeseries.window(source_first, source_stop), window_times, source_rate, target_rate
+    )
+    lo = max(first, window_first)
+    hi = min(stop, window_first + window_values.shape[1])
+    if hi > lo:
+        values[lo - first : hi - first] = window_values[0, lo - window_first : hi - window_first]
+    return values
+
+
+class AlignedSignal:
+    """
+    Class representing a signal resampled on the global grid k / rate.
+    """
+
+    def __init__(self, first_index, rate, values):
+        """
+        Constructor for the AlignedSignal class.
+        :param first_index: The grid index k of the first sample.
+        :param rate: The sampling rate of the grid.
+        :param values: The 1-D resampled values.
+        """
+        self.first_index = first_index
+        self.rate = rate
+        self.values = values
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    @property
+    def stop_index(self):
+        return self.first_index + len(self.values)
+
+    def times(self):
+        """
+        Returns the timestamps of the samples (in seconds).
+        """
+        return np.arange(self.first_index, self.stop_index) / self.rate
+
+    def between(self, start_time, stop_time):
+        """
+        Returns the samples whose time is in [start_time, stop_time].
+        """
+        first, stop = grid_range(start_time, stop_time, self.rate)
+        first = min(max(first - self.first_index, 0), len(self.values))
+        stop = min(max(stop - self.first_index, first), len(self.values))
+        return self.values[first:stop]
+
+
+class Aligner:
+    """
+    Produces the views of timeseries at a target sampling rate, cached per (timeseries, rate).
+    The views are computed from the processed values of the timeseries (after their pipeline).
+    """
+
+    def __init__(self, cache=None):
+        """
+        Constructor for the Aligner class.
+        :param cache: The TileCache holding the views, a private one by default.
+        """
+        self.cache = cache if cache is not None else TileCache(ALIGNMENT_CACHE_BYTES)
+        # (data token of the timeseries, rate) -> whether the timestamps are uniform at this rate
+        self.uniform = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def rate_of(timeseries):
+        return effective_rate(timeseries.timestamps, timeseries.sampling_rate)
+
+    def is_uniform(self, timeseries):
+        """
+        Returns True if the timeseries is regularly sampled at its rate, in which case its samples can be used as is.
+        """
+        rate = self.rate_of(timeseries)
+        key = (timeseries.data_token, rate)
+        with self.lock:
+            uniform = self.uniform.get(key)
+        if uniform is None:
+            uniform = is_uniform(timeseries.timestamps, rate)
+            with self.lock:
+                self.uniform[key] = uniform
+        return uniform
+
+    def view_key(self, timeseries, rate):
+        # The data token (never reused, renewed when the samples change) and the chain of stages identify the
+        # processed data the view was computed from
+        return (timeseries.data_token, timeseries.pipeline.chain_key(), float(rate))
+
+    def aligned(self, timeseries, rate):
+        """
+        Returns the AlignedSignal of a timeseries at rate, computed on first use, window by window. The view of a
+        disk-backed timeseries is memory-mapped to a temporary file as well.
+        """
+        key = self.view_key(timeseries, rate)
+        view = self.cache.get(key)
+        if view is None:
+            source_rate = self.rate_of(timeseries)
+            timestamps = timeseries.time_index.timestamps
+            if len(timestamps) == 0:
+                first, stop = 0, 0
+            else:
+                first, stop = grid_range(timestamps[0], timestamps[-1], rate)
+            allocate = temporary_memmap if timeseries.disk_backed else np.empty
+            values = allocate((stop - first,), np.float64)
+            with tracing.span("align", samples=stop - first, rate=rate):
+                for start in range(first, stop, ALIGNMENT_CHUNK_SAMPLES):
+                    end = min(start + ALIGNMENT_CHUNK_SAMPLES, stop)
+                    values[start - first : end - first] = resample_window(timeseries, source_rate, rate, start, end)
+            view = AlignedSignal(first, float(rate), values)
+            self.cache.put(key, view)
+        return view
@@ -0,0 +1,321 @@
+""" This file contains the export of signal segments to disk.
+    Description: The segment of every exported signal is read chunk by chunk (processed by its pipeline) and written
+    right away, so the memory used does not depend on the length of the segment. Signals sharing their timestamps are
+    written as they are; otherwise they are resampled on a common grid at the highest of their rates (see
+    data.Alignment), one chunk at a time.
+
+    Formats, chosen by the extension of the output file:
+        .csv: text, a time column then one column per signal,
+        .bin: raw little-endian arrays after a JSON metadata header (see RawExporter),
+        .npz: NumPy archive with the same arrays as the batch outputs (time, data, names, sampling_rate, start_time),
+        .h5: HDF5, when h5py is installed.
+"""
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from data.Alignment import effective_rate, grid_range, resample_window
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+EXPORT_CHUNK_SAMPLES = 1 << 16  # Number of samples of each signal read and written at a time
+RAW_MAGIC = b"SIGRAW1\n"
+RAW_ALIGNMENT = 4096  # The arrays of a raw file start on a multiple of this offset
+
+
+class ExportCancelled(Exception):
+    """
+    Raised by an ExportMonitor when the export it follows has been cancelled.
+    """
+
+
+class ExportMonitor:
+    """
+    Class receiving the progress of an export. The default implementation ignores everything.
+    """
+
+    def update(self, samples_written, total_samples):
+        """
+        Called after each chunk.
+        :param samples_written: The number of samples of each signal written so far.
+        :param total_samples: The number of samples of each signal to write.
+        """
+
+    def cancelled(self):
+        """
+        Returns True if the export should stop, polled between chunks.
+        """
+        return False
+
+
+class SegmentReader:
+    """
+    Reads the segment [start_time, stop_time] of several timeseries chunk by chunk, on a common time axis.
+    """
+
+    def __init__(self, timeseries, start_time, stop_time, chunk_samples=EXPORT_CHUNK_SAMPLES):
+        """
+        Constructor for the SegmentReader class.
+        :param timeseries: The list of Timeseries to read, processed by their pipelines.
+        :param start_time: The start of the segment (in seconds).
+        :param stop_time: The end of the segment (in seconds, included).
+        :param chunk_samples: The number of samples of each signal read at a time.
+        """
+        if not timeseries:
+            raise ValueError("No signal to export")
+        self.timeseries = list(timeseries)
+        self.chunk_samples = chunk_samples
+        self.rates = [effective_rate(ts.timestamps, ts.sampling_rate) for ts in self.timeseries]
+        reference = self.timeseries[0]
+        # Channels of the same store (or generated with the same timestamps) need no resampling
+        self.shared = all(
+            len(ts) == len(reference) and ts.timestamps is reference.timestamps and rate == self.rates[0]
+            for ts, rate in zip(self.timeseries, self.rates)
+        )
+        if self.shared:
+            self.rate = self.rates[0]
+            self.first, self.stop = reference.time_index.range(start_time, stop_time)
+        else:
+            self.rate = max(self.rates)
+            spans = [ts.time_index.timestamps[[0, -1]] for ts in self.timeseries if len(ts)]
+            start_time = max(start_time, min(span[0] for span in spans))
+            stop_time = min(stop_time, max(span[1] for span in spans))
+            self.first, self.stop = grid_range(start_time, stop_time, self.rate)
+
+    @property
+    def sample_count(self):
+        return max(self.stop - self.first, 0)
+
+    @property
+    def names(self):
+        return [ts.name for ts in self.timeseries]
+
+    def ranges(self):
+        """
+        Yields the (start, stop) positions of the chunks, relative to the start of the segment.
+        """
+        for start in range(0, self.sample_count, self.chunk_samples):
+            yield start, min(start + self.chunk_samples, self.sample_count)
+
+    def times(self, start, stop):
+        """
+        Returns the timestamps of the samples [start, stop) of the segment.
+        """
+        if not self.shared:
+            return np.arange(self.first + start, self.first + stop) / self.rate
+        timestamps = self.timeseries[0].timestamps
+        if timestamps is None:
+            return np.arange(self.first + start, self.first + stop) / self.rate
+        return np.asarray(timestamps[self.first + start : self.first + stop], dtype=np.float64)
+
+    def values(self, start, stop):
+        """
+        Returns the values of the samples [start, stop) of the segment, shape (signals, stop - start).
+        Resampled signals are NaN where they have no sample.
+        """
+        if self.shared:
+            return np.stack([ts.window(self.first + start, self.first + stop) for ts in self.timeseries])
+        return np.stack(
+            [
+                resample_window(ts, rate, self.rate, self.first + start, self.first + stop)
+                for ts, rate in zip(self.timeseries, self.rates)
+            ]
+        )
+
+
+class CsvExporter:
+    """
+    Writes a text CSV file: a time column then one column per signal.
+    Like every exporter, write(start, times, values) writes a chunk, close() completes the file and abort() only
+    closes its handles, the file being discarded.
+    """
+
+    def __init__(self, path, reader, dtype):
+        self.file = open(path, "w", newline="")
+        self.file.write(",".join(["time"] + reader.names) + "\n")
+        self.format = "%.9g" if np.dtype(dtype).itemsize <= 4 else "%.12g"
+
+    def write(self, start, times, values):
+        np.savetxt(self.file, np.column_stack((times, values.T)), fmt=self.format, delimiter=",")
+
+    def close(self):
+        self.file.close()
+
+    def abort(self):
+        self.file.close()
+
+
+class RawExporter:
+    """
+    Writes raw little-endian arrays after a metadata header:
+        8 bytes: b"SIGRAW1\\n", 4 bytes: the length of the JSON header (little-endian uint32), the JSON header,
+        then, from the offset data_offset of the header, the timestamps (float64) followed by each signal one after
+        the other (dtype of the header), each array holding the samples of the segment.
+    A signal can be read without the others, e.g. with np.memmap(path, dtype, "r", offset, (samples,)) where
+    offset = data_offset + samples * 8 + index * samples * itemsize.
+    """
+
+    def __init__(self, path, reader, dtype):
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.samples = reader.sample_count
+        header = {
+            "format": "signal-raw",
+            "version": 1,
+            "samples": self.samples,
+            "names": reader.names,
+            "sampling_rate": reader.rate,
+            "time_dtype": "<f8",
+            "dtype": self.dtype.str,
+        }
+        text = json.dumps(header).encode()
+        # The offset of the arrays is part of the header, it depends on the length of the header itself
+        data_offset = -(-(len(RAW_MAGIC) + 4 + len(text) + 32) // RAW_ALIGNMENT) * RAW_ALIGNMENT
+        header["data_offset"] = data_offset
+        text = json.dumps(header).encode()
+        self.data_offset = data_offset
+        self.file = open(path, "wb")
+        self.file.write(RAW_MAGIC + struct.pack("<I", len(text)) + text)
+        self.file.truncate(data_offset + self.samples * (8 + len(reader.timeseries) * self.dtype.itemsize))
+
+    def write(self, start, times, values):
+        self.file.seek(self.data_offset + start * 8)
+        self.file.write(np.asarray(times, dtype="<f8").tobytes())
+        first_signal = self.data_offset + self.samples * 8
+        for index, row in enumerate(values):
+            self.file.seek(first_signal + (index * self.samples + start) * self.dtype.itemsize)
+            self.file.write(row.astype(self.dtype).tobytes())
+
+    def close(self):
+        self.file.close()
+
+    def abort(self):
+        self.file.close()
+
+
+class NpzExporter:
+    """
+    Writes a NumPy archive, streaming each array into its entry: time (samples,), data (signals, samples) stored in
+    Fortran order so that chunks of consecutive samples are contiguous, names, sampling_rate and start_time.
+    """
+
+    def __init__(self, path, reader, dtype):
+        self.reader = reader
+        self.dtype = np.dtype(dtype)
+        self.archive = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True)
+        self.data_entry = self.archive.open("data.npy", "w", force_zip64=True)
+        np.lib.format.write_array_header_2_0(
+            self.data_entry,
+            {
+                "descr": np.lib.format.dtype_to_descr(self.dtype),
+                "fortran_order": True,
+                "shape": (len(reader.timeseries), reader.sample_count),
+            },
+        )
+        self.start_time = None
+
+    def write(self, start, times, values):
+        if self.start_time is None and len(times):
+            self.start_time = float(times[0])
+        self.data_entry.write(np.ascontiguousarray(values.T, dtype=self.dtype).tobytes())
+
+    def close(self):
+        self.data_entry.close()
+        # Entries are written one after the other: the timestamps go in a second pass, they cost no resampling
+        with self.archive.open("time.npy", "w", force_zip64=True) as time_entry:
+            np.lib.format.write_array_header_2_0(
+                time_entry, {"descr": "<f8", "fortran_order": False, "shape": (self.reader.sample_count,)}
+            )
+            for start, stop in self.reader.ranges():
+                time_entry.write(self.reader.times(start, stop).astype("<f8").tobytes())
+        small_arrays = {
+            "names": np.array(self.reader.names),
+            "sampling_rate": np.array(self.reader.rate),
+            "start_time": np.array(self.start_time if self.start_time is not None else 0.0),
+        }
+        for name, array in small_arrays.items():
+            with self.archive.open(name + ".npy", "w") as entry:
+                np.lib.format.write_array(entry, array)
+        self.archive.close()
+
+    def abort(self):
+        # Only the handles are closed, the timestamps and the other entries are not written
+        self.data_entry.close()
+        self.archive.close()
+
+
+class Hdf5Exporter:
+    """
+    Writes an HDF5 file with the datasets time (samples,) and data (signals, samples), chunked along time, and the
+    names and sampling rate as attributes.
+    """
+
+    def __init__(self, path, reader, dtype):
+        if h5py is None:
+            raise RuntimeError("HDF5 export needs the h5py package")
+        self.file = h5py.File(path, "w")
+        chunk = max(min(reader.chunk_samples, reader.sample_count), 1)
+        self.time = self.file.create_dataset("time", (reader.sample_count,), "<f8", chunks=(chunk,))
+        self.data = self.file.create_dataset(
+            "data", (len(reader.timeseries), reader.sample_count), dtype, chunks=(1, chunk)
+        )
+        self.data.attrs["names"] = reader.names
+        self.data.attrs["sampling_rate"] = reader.rate
+
+    def write(self, start, times, values):
+        self.time[start : start + len(times)] = times
+        self.data[:, start : start + values.shape[1]] = values
+
+    def close(self):
+        self.file.close()
+
+    def abort(self):
+        self.file.close()
+
+
+EXPORTERS = {".csv": CsvExporter, ".bin": RawExporter, ".npz": NpzExporter, ".h5": Hdf5Exporter}
+
+
+def export_formats():
+    """
+    Returns the file extensions that can be exported to, HDF5 only when h5py is installed.
+    """
+    return [extension for extension in EXPORTERS if extension != ".h5" or h5py is not None]
+
+
+def export_segment(path, timeseries, start_time, stop_time, dtype="float64", monitor=None):
+    """
+    Writes the segment [start_time, stop_time] of timeseries to path, in the format of its extension.
+    :param path: The output file, .csv, .bin, .npz or .h5.
+    :param timeseries: The list of Timeseries to export.
+    :param start_time: The start of the segment (in seconds).
+    :param stop_time: The end of the segment (in seconds, included).
+    :param dtype: The type of the values written, the timestamps are always float64.
+    :param monitor: The ExportMonitor notified of the progress, which can cancel the export.
+    :return: The number of samples written per signal.
+    :raise ExportCancelled: If the monitor cancelled the export, the partial file is removed.
+    """
+    monitor = monitor if monitor is not None else ExportMonitor()
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in export_formats():
+        raise ValueError(f"Unsupported export format: {extension or path}")
+    reader = SegmentReader(timeseries, start_time, stop_time)
+    exporter = EXPORTERS[extension](path, reader, dtype)
+    try:
+        for start, stop in reader.ranges():
+            if monitor.cancelled():
+                raise ExportCancelled()
+            exporter.write(start, reader.times(start, stop), reader.values(start, stop))
+            monitor.update(stop, reader.sample_count)
+    except BaseException:
+        # The partial file is discarded, without completing it
+        exporter.abort()
+        os.remove(path)
+        raise
+    exporter.close()
+    return reader.sample_count
@@ -0,0 +1,252 @@
+""" This file contains the class definitions for the sources of live signals and their acquisition thread.
+    Description: A live source produces blocks of samples of shape (channels, samples) as they are recorded.
+    Sources are pluggable: a synthetic generator (for tests and demos), a raw binary stream read from a local
+    socket or a pipe, and a CSV file that is still being written. The acquisition thread reads a source and writes
+    its blocks to a RingBuffer, so that bursty input never blocks the user interface.
+"""
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from data.RingBuffer import RingBuffer
+
+
+class LiveSource:
+    """
+    Base class of a live source.
+    """
+
+    def __init__(self, channel_names, sampling_rate):
+        """
+        Constructor for the LiveSource class.
+        :param channel_names: The names of the channels.
+        :param sampling_rate: The sampling rate of the source (in Hz).
+        """
+        self.channel_names = list(channel_names)
+        self.sampling_rate = sampling_rate
+
+    def read_block(self, timeout):
+        """
+        Waits up to timeout seconds for new samples.
+        :param timeout: The maximum time to wait (in seconds).
+        :return: The new samples, shape (channels, samples), or None if there are none yet.
+        :raise EOFError: When the source has ended.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases the resources of the source.
+        """
+
+
+class SyntheticSource(LiveSource):
+    """
+    Source generating noisy sines in real time, one frequency per channel.
+    """
+
+    def __init__(self, channel_count=4, sampling_rate=1000, block_size=50, seed=None):
+        """
+        Constructor for the SyntheticSource class.
+        :param channel_count: The number of channels to generate.
+        :param sampling_rate: The sampling rate of the generated signals (in Hz).
+        :param block_size: The number of samples generated at a time.
+        :param seed: The seed of the noise, for reproducible tests.
+        """
+        super().__init__([f"synthetic_{ch}" for ch in range(channel_count)], sampling_rate)
+        self.block_size = block_size
+        self.frequencies = 5.0 * (np.arange(channel_count) + 1)[:, None]
+        self.rng = np.random.default_rng(seed)
+        self.sample_index = 0
+        self.start_time = None
+
+    def read_block(self, timeout):
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+        # Pace the generator on the wall clock
+        due = self.start_time + (self.sample_index + self.block_size) / self.sampling_rate
+        wait = due - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return None
+        if wait > 0:
+            time.sleep(wait)
+        t = (self.sample_index + np.arange(self.block_size)) / self.sampling_rate
+        self.sample_index += self.block_size
+        block = np.sin(2 * np.pi * self.frequencies * t)
+        return block + 0.1 * self.rng.standard_normal(block.shape)
+
+
+class BinaryStreamSource(LiveSource):
+    """
+    Source reading interleaved little-endian samples (one frame of all the channels per sample) from a binary stream.
+    """
+
+    def __init__(self, channel_names, sampling_rate, dtype="<f4", max_block_bytes=1 << 20):
+        """
+        Constructor for the BinaryStreamSource class.
+        :param channel_names: The names of the channels.
+        :param sampling_rate: The sampling rate of the stream (in Hz).
+        :param dtype: The type of each sample in the stream.
+        :param max_block_bytes: The maximum number of bytes read at a time.
+        """
+        super().__init__(channel_names, sampling_rate)
+        self.dtype = np.dtype(dtype)
+        self.frame_size = self.dtype.itemsize * len(self.channel_names)
+        self.max_block_bytes = max_block_bytes
+        self.pending = b""
+
+    def read_bytes(self, size, timeout):
+        """
+        Reads up to size bytes, returns b"" if nothing arrived within timeout and raises EOFError at the end.
+        """
+        raise NotImplementedError
+
+    def read_block(self, timeout):
+        data = self.read_bytes(self.max_block_bytes, timeout)
+        if not data:
+            return None
+        data = self.pending + data
+        # Keep the incomplete frame for the next read
+        complete = len(data) - len(data) % self.frame_size
+        self.pending = data[complete:]
+        if complete == 0:
+            return None
+        frames = np.frombuffer(data[:complete], dtype=self.dtype).reshape(-1, len(self.channel_names))
+        return frames.T.astype(np.float64)
+
+
+class SocketSource(BinaryStreamSource):
+    """
+    Source reading a binary stream from a local TCP socket ("host:port") or Unix socket (path).
+    """
+
+    def __init__(self, address, channel_names, sampling_rate, dtype="<f4"):
+        super().__init__(channel_names, sampling_rate, dtype)
+        if ":" in address:
+            host, port = address.rsplit(":", 1)
+            self.socket = socket.create_connection((host, int(port)))
+        else:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(address)
+
+    def read_bytes(self, size, timeout):
+        self.socket.settimeout(timeout)
+        try:
+            data = self.socket.recv(size)
+        except socket.timeout:
+            return b""
+        if not data:
+            raise EOFError()
+        return data
+
+    def close(self):
+        self.socket.close()
+
+
+class PipeSource(BinaryStreamSource):
+    """
+    Source reading a binary stream from a named pipe (FIFO) or any file descriptor.
+    """
+
+    def __init__(self, path, channel_names, sampling_rate, dtype="<f4"):
+        super().__init__(channel_names, sampling_rate, dtype)
+        self.fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+
+    def read_bytes(self, size, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                data = os.read(self.fd, size)
+            except BlockingIOError:
+                data = None
+            if data == b"":
+                raise EOFError()
+            if data:
+                return data
+            if time.monotonic() >= deadline:
+                return b""
+            time.sleep(0.005)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class TailFileSource(LiveSource):
+    """
+    Source following a CSV file that is still being written, like `tail -f`.
+    The first line holds the column names, the first column (time) is skipped.
+    """
+
+    def __init__(self, path, sampling_rate, poll_interval=0.05):
+        """
+        Constructor for the TailFileSource class.
+        :param path: Path to the CSV file.
+        :param sampling_rate: The sampling rate of the recording (in Hz).
+        :param poll_interval: The time between two checks for new lines (in seconds).
+        """
+        self.file = open(path, "rb")
+        header = self.file.readline().decode("utf-8").strip().split(",")
+        super().__init__(header[1:], sampling_rate)
+        self.poll_interval = poll_interval
+        self.pending = b""
+
+    def read_block(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            data = self.pending + self.file.read()
+            # Only parse complete lines, the writer may be in the middle of one
+            complete = data.rfind(b"\n") + 1
+            self.pending = data[complete:]
+            if complete > 0:
+                rows = np.loadtxt(data[:complete].decode("utf-8").splitlines(), delimiter=",", ndmin=2)
+                return rows[:, 1:].T
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def close(self):
+        self.file.close()
+
+
+class AcquisitionThread(threading.Thread):
+    """
+    Thread reading a live source into a ring buffer until stopped or until the source ends.
+    """
+
+    def __init__(self, source: LiveSource, ring_buffer: RingBuffer, stream_filter=None):
+        """
+        Constructor for the AcquisitionThread class.
+        :param source: The LiveSource to read.
+        :param ring_buffer: The RingBuffer receiving the samples.
+        :param stream_filter: An optional StreamingFilter applied to each block before it is buffered.
+        """
+        super().__init__(daemon=True)
+        self.source = source
+        self.ring_buffer = ring_buffer
+        self.stream_filter = stream_filter
+        self.stop_event = threading.Event()
+        self.error = None
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                block = self.source.read_block(timeout=0.1)
+                if block is None or block.shape[1] == 0:
+                    continue
+                if self.stream_filter is not None:
+                    block = self.stream_filter.process(block)
+                self.ring_buffer.write(block)
+        except EOFError:
+            print("Live source ended.")
+        except Exception as e:
+            self.error = e
+            print(f"Error reading live source: {e}")
+        finally:
+            self.source.close()
@@ -0,0 +1,127 @@
+""" This file contains the class definition for a min/max decimation pyramid.
+    Description: The pyramid stores, for successively coarser blocks of samples, the minimum and maximum value of each block.
+    It allows a plot to draw a long timeseries with a number of points proportional to the screen width instead of the
+    number of samples, while keeping peaks and spikes visible at every zoom level.
+"""
+import numpy as np
+
+PYRAMID_CHUNK_SAMPLES = 1 << 20  # Number of samples read at a time when building the first level
+PYRAMID_DISK_BLOCK = 64  # Block size of the first level of disk-backed signals, which keeps the pyramid small
+
+
+class MinMaxPyramid:
+    """
+    Class representing a multi-resolution min/max pyramid of a 1-D signal.
+    Level k summarizes blocks of base_block * factor**k samples (level 0 is the raw signal).
+    """
+
+    def __init__(self, values, factor=4, base_block=1):
+        """
+        Constructor for the MinMaxPyramid class.
+        :param values: The 1-D array of samples to summarize, possibly memory-mapped: it is only read in chunks.
+        :param factor: The number of blocks of a level merged into one block of the next level.
+        :param base_block: The block size of the first level. Zooms finer than this read the samples themselves, so
+            a larger block trades a few more samples read per query for a pyramid base_block times smaller.
+        """
+        self.values = values
+        self.factor = factor
+        # Each level is a tuple (block_size, mins, maxs)
+        self.levels = []
+
+        if base_block > 1 and len(values) > base_block:
+            chunk = max(PYRAMID_CHUNK_SAMPLES // base_block, 1) * base_block
+            mins, maxs = [], []
+            for start in range(0, len(values), chunk):
+                block = np.asarray(values[start : start + chunk])
+                offsets = np.arange(0, len(block), base_block)
+                mins.append(np.minimum.reduceat(block, offsets))
+                maxs.append(np.maximum.reduceat(block, offsets))
+            mins, maxs = np.concatenate(mins), np.concatenate(maxs)
+            block_size = base_block
+            self.levels.append((block_size, mins, maxs))
+        else:
+            mins = maxs = np.asarray(values)
+            block_size = 1
+        while len(mins) > factor:
+            mins = self._reduce(mins, np.minimum)
+            maxs = self._reduce(maxs, np.maximum)
+            block_size *= factor
+            self.levels.append((block_size, mins, maxs))
+
+    def _reduce(self, data, ufunc):
+        """
+        Merges every `factor` consecutive entries of data with ufunc, the last block may be incomplete.
+        :param data: The array of the previous level.
+        :param ufunc: np.minimum or np.maximum.
+        :return: The array of the next level.
+        """
+        return ufunc.reduceat(data, np.arange(0, len(data), self.factor))
+
+    def query(self, start, stop, n_buckets):
+        """
+        Returns the points to draw for the samples [start, stop) on a plot n_buckets pixels wide.
+        Each bucket produces two points (its min and its max) at the same x position so that the line
+        draws a vertical segment covering every sample of the bucket.
+        :param start: The first sample index of the range.
+        :param stop: The sample index after the end of the range.
+        :param n_buckets: The number of buckets, typically the width of the plot in pixels.
+        :return: A tuple (indices, values) of arrays holding about 2 * n_buckets points.
+        """
+        start = max(int(start), 0)
+        stop = min(int(stop), len(self.values))
+        n_buckets = max(int(n_buckets), 1)
+        span = stop - start
+        if span <= 2 * n_buckets:
+            return np.arange(start, stop), np.asarray(self.values[start:stop])
+
+        # Pick the coarsest level whose blocks are still smaller than a bucket
+        samples_per_bucket = span / n_buckets
+        block_size, mins, maxs = 1, None, None
+        for level_block_size, level_mins, level_maxs in self.levels:
+            if level_block_size > samples_per_bucket:
+                break
+            block_size, mins, maxs = level_block_size, level_mins, level_maxs
+
+        if mins is None:
+            # Finer than the first level: only the samples of the range are read
+            first_block = start
+            mins = maxs = np.asarray(self.values[start:stop])
+        else:
+            first_block = start // block_size
+            last_block = -(-stop // block_size)
+            mins = mins[first_block:last_block]
+            maxs = maxs[first_block:last_block]
+
+        # Merge the blocks of the level into n_buckets buckets
+        group = -(-len(mins) // n_buckets)
+        offsets = np.arange(0, len(mins), group)
+        mins = np.minimum.reduceat(mins, offsets)
+        maxs = np.maximum.reduceat(maxs, offsets)
+
+        indices = np.repeat((first_block + offsets) * block_size, 2)
+        values = np.empty(2 * len(mins), dtype=np.result_type(mins, maxs))
+        values[0::2] = mins
+        values[1::2] = maxs
+        return indices, values
+
+
+def decimate_minmax(values, n_buckets):
+    """
+    Reduces the samples of values (along the last axis) to the min and max of n_buckets buckets, in one pass.
+    Used for data that changes too often to keep a pyramid, such as a live ring buffer.
+    :param values: A 1-D array, or a 2-D array of shape (channels, samples).
+    :param n_buckets: The number of buckets, typically the width of the plot in pixels.
+    :return: A tuple (indices, values) with about 2 * n_buckets points along the last axis.
+    """
+    values = np.asarray(values)
+    n = values.shape[-1]
+    n_buckets = max(int(n_buckets), 1)
+    if n <= 2 * n_buckets:
+        return np.arange(n), values
+    offsets = np.arange(0, n, -(-n // n_buckets))
+    mins = np.minimum.reduceat(values, offsets, axis=-1)
+    maxs = np.maximum.reduceat(values, offsets, axis=-1)
+    decimated = np.empty(values.shape[:-1] + (2 * len(offsets),), dtype=values.dtype)
+    decimated[..., 0::2] = mins
+    decimated[..., 1::2] = maxs
+    return np.repeat(offsets, 2), decimated
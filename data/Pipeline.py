@@ -0,0 +1,377 @@
+""" This file contains the class definitions for the processing pipeline of a timeseries.
+    Description: A pipeline is an ordered list of stages (filter, normalize, offset, ...) applied to the raw values of
+    a timeseries without modifying them. The pipeline is evaluated lazily on the window that is requested, padded
+    on each side by the number of samples a stage needs to avoid edge effects. Results are memoized per stage:
+    changing the parameters of a stage only recomputes that stage and the stages after it.
+    Stages always process float64 windows, whatever the type the raw values are stored in.
+    The statistics of each chain of stages are kept in a StatisticsIndex, updated block by block when raw samples
+    change.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from data.SignalStore import temporary_memmap
+from data.StatisticsIndex import StatisticsIndex
+from local_tools.filters import design_cascade, filter_channels, normalize_range
+from local_tools import tracing
+
+PIPELINE_CACHE_BYTES = 256 * 1024**2  # Memory budget of the memoized windows of one pipeline
+SPILL_WINDOW_SAMPLES = 1 << 20  # Number of samples evaluated at a time for a whole-signal result kept compact
+
+
+class Stage:
+    """
+    Base class of a processing stage.
+    """
+
+    # True if apply needs the (min, max) of the whole upstream signal
+    needs_statistics = False
+
+    def key(self):
+        """
+        Returns a hashable description of the stage and its parameters, used to memoize its results.
+        """
+        raise NotImplementedError
+
+    def padding(self, sampling_rate):
+        """
+        Returns the number of upstream samples the stage needs on each side of a window.
+        :param sampling_rate: The sampling rate of the timeseries.
+        """
+        return 0
+
+    def apply(self, values, sampling_rate, statistics=None):
+        """
+        Processes values along their last axis.
+        :param values: The upstream values.
+        :param sampling_rate: The sampling rate of the timeseries.
+        :param statistics: The (min, max) of the whole upstream signal, if needs_statistics is True.
+        :return: The processed values.
+        """
+        raise NotImplementedError
+
+
+class FilterStage(Stage):
+    """
+    Stage applying a filter cascade (see local_tools.filters.design_cascade), zero-phase or causal.
+    """
+
+    def __init__(self, stages, causal=False):
+        """
+        Constructor for the FilterStage class.
+        :param stages: The filter stages of the cascade, e.g. (("butter", 4, 40.0, "lowpass"),).
+        :param causal: True to filter forward only, like the streaming filters, False for zero phase.
+        """
+        self.stages = tuple(stages)
+        self.causal = causal
+
+    def cascade(self, sampling_rate):
+        return design_cascade(self.stages, float(sampling_rate))
+
+    def key(self):
+        return ("filter", self.stages, self.causal)
+
+    def padding(self, sampling_rate):
+        return self.cascade(sampling_rate).settling_samples()
+
+    def apply(self, values, sampling_rate, statistics=None):
+        with tracing.span("filter", samples=np.shape(values)[-1], causal=self.causal):
+            if self.causal:
+                return self.cascade(sampling_rate).filter(values, axis=-1)
+            return self.cascade(sampling_rate).filtfilt(values, axis=-1)
+
+
+class NormalizeStage(Stage):
+    """
+    Stage scaling the signal to [-1, 1] from the extrema of the whole upstream signal (see normalize_range).
+    """
+
+    needs_statistics = True
+
+    def key(self):
+        return ("normalize",)
+
+    def apply(self, values, sampling_rate, statistics=None):
+        return normalize_range(values, statistics)
+
+
+class OffsetStage(Stage):
+    """
+    Stage adding a constant to the signal.
+    """
+
+    def __init__(self, offset):
+        """
+        Constructor for the OffsetStage class.
+        :param offset: The constant added to every sample.
+        """
+        self.offset = offset
+
+    def key(self):
+        return ("offset", self.offset)
+
+    def apply(self, values, sampling_rate, statistics=None):
+        return values + self.offset
+
+
+class Pipeline:
+    """
+    Class representing the ordered processing stages of a timeseries and the memoized results.
+    """
+
+    def __init__(self, cache_bytes=PIPELINE_CACHE_BYTES):
+        """
+        Constructor for the Pipeline class.
+        :param cache_bytes: The memory budget of the memoized windows (in bytes).
+        """
+        self.stages = []
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        # (chain key, start, stop) -> values, least recently used first
+        self.windows = OrderedDict()
+        # chain key -> processed values of the whole signal
+        self.full_results = {}
+        # chain key -> StatisticsIndex of the whole signal
+        self.indexes = {}
+        # Evaluations may run on worker threads (e.g. spectrogram tiles)
+        self.lock = threading.RLock()
+        # True for disk-backed timeseries: whole-signal results go to temporary memory-mapped files
+        self.out_of_core = False
+        # The type of the whole-signal results, float32 for timeseries stored in a compact type
+        self.result_dtype = np.dtype(np.float64)
+
+    def chain_key(self, depth=None):
+        """
+        Returns the key of the first depth stages, all the stages by default.
+        """
+        return tuple(stage.key() for stage in self.stages[:depth])
+
+    def append(self, stage: Stage):
+        """
+        Adds a stage at the end of the pipeline.
+        """
+        self.stages.append(stage)
+
+    def set_stage(self, index, stage: Stage):
+        """
+        Replaces a stage, e.g. to change its parameters. Only this stage and the next ones are recomputed.
+        """
+        self.stages[index] = stage
+        self.drop_stale_full_results()
+
+    def clear(self):
+        """
+        Removes every stage, the timeseries is back to its raw values.
+        """
+        self.stages = []
+        self.drop_stale_full_results()
+
+    def invalidate(self):
+        """
+        Forgets every memoized result, to be called when the raw values or the sampling rate change.
+        """
+        self.windows.clear()
+        self.cached_bytes = 0
+        self.full_results.clear()
+        self.indexes.clear()
+
+    def drop_stale_full_results(self):
+        """
+        Frees the whole-signal results and indexes that no longer belong to the current chain of stages.
+        """
+        current = {self.chain_key(depth) for depth in range(len(self.stages) + 1)}
+        for results in (self.full_results, self.indexes):
+            for key in list(results):
+                if key not in current:
+                    del results[key]
+
+    def remember(self, key, values):
+        """
+        Memoizes a window, evicting the least recently used ones over the memory budget.
+        """
+        if values.nbytes > self.cache_bytes:
+            return
+        self.windows[key] = values
+        self.cached_bytes += values.nbytes
+        while self.cached_bytes > self.cache_bytes:
+            _, evicted = self.windows.popitem(last=False)
+            self.cached_bytes -= evicted.nbytes
+
+    def evaluate(self, raw, sampling_rate, start, stop, depth=None, memoize=True):
+        """
+        Returns the output of the first depth stages on the samples [start, stop).
+        Only the window padded by the needs of each stage is processed.
+        :param raw: The raw values of the timeseries.
+        :param sampling_rate: The sampling rate of the timeseries.
+        :param start: The first sample of the window.
+        :param stop: The sample after the end of the window.
+        :param depth: The number of stages to apply, all of them by default.
+        :param memoize: False for windows read once, e.g. by evaluate_by_window, which would only evict useful ones.
+        :return: The processed values of the window.
+        """
+        with self.lock:
+            depth = len(self.stages) if depth is None else depth
+            start = max(int(start), 0)
+            stop = max(min(int(stop), len(raw)), start)
+            if depth == 0:
+                return np.asarray(raw[start:stop], dtype=np.float64)
+
+            chain = self.chain_key(depth)
+            if chain in self.full_results:
+                return np.asarray(self.full_results[chain][start:stop], dtype=np.float64)
+            key = (chain, start, stop)
+            if key in self.windows:
+                self.windows.move_to_end(key)
+                return self.windows[key]
+
+            stage = self.stages[depth - 1]
+            padding = stage.padding(sampling_rate)
+            padded_start = max(start - padding, 0)
+            padded_stop = min(stop + padding, len(raw))
+            upstream = self.evaluate(raw, sampling_rate, padded_start, padded_stop, depth - 1, memoize)
+            statistics = None
+            if stage.needs_statistics:
+                statistics = self.statistics_of(raw, sampling_rate, depth - 1)
+            values = stage.apply(upstream, sampling_rate, statistics)[start - padded_start : stop - padded_start]
+            if memoize:
+                # A copy, as the slice would keep the whole padded result alive while only its own size is counted
+                values = np.array(values, copy=True)
+                self.remember(key, values)
+            return values
+
+    def evaluate_full(self, raw, sampling_rate, depth=None):
+        """
+        Returns the output of the first depth stages on the whole signal, kept until the chain changes.
+        """
+        with self.lock:
+            depth = len(self.stages) if depth is None else depth
+            if depth == 0:
+                return raw
+            chain = self.chain_key(depth)
+            if chain not in self.full_results and (self.out_of_core or self.result_dtype != np.float64):
+                self.full_results[chain] = self.evaluate_by_window(raw, sampling_rate, depth)
+            if chain not in self.full_results:
+                stage = self.stages[depth - 1]
+                upstream = self.evaluate_full(raw, sampling_rate, depth - 1)
+                statistics = None
+                if stage.needs_statistics:
+                    statistics = self.statistics_of(raw, sampling_rate, depth - 1)
+                self.full_results[chain] = stage.apply(upstream, sampling_rate, statistics)
+            return self.full_results[chain]
+
+    def evaluate_by_window(self, raw, sampling_rate, depth):
+        """
+        Evaluates the first depth stages on the whole signal window by window, into an array of result_dtype,
+        memory-mapped to a temporary file when out of core. No whole-signal float64 array is ever allocated.
+        """
+        allocate = temporary_memmap if self.out_of_core else np.empty
+        values = allocate((len(raw),), self.result_dtype)
+        with tracing.span("evaluate_by_window", samples=len(raw), depth=depth):
+            for start in range(0, len(raw), SPILL_WINDOW_SAMPLES):
+                stop = min(start + SPILL_WINDOW_SAMPLES, len(raw))
+                values[start:stop] = self.evaluate(raw, sampling_rate, start, stop, depth, memoize=False)
+        return values
+
+    def set_full_result(self, values, depth=None):
+        """
+        Stores the output of the first depth stages on the whole signal when it was computed elsewhere,
+        e.g. for several timeseries at once.
+        """
+        with self.lock:
+            self.full_results[self.chain_key(depth)] = values
+
+    def statistics_index(self, raw, sampling_rate, depth=None):
+        """
+        Returns the StatisticsIndex of the output of the first depth stages (all of them by default), built on first
+        use by reading the whole-signal result chunk by chunk.
+        """
+        with self.lock:
+            depth = len(self.stages) if depth is None else depth
+            chain = self.chain_key(depth)
+            if chain not in self.indexes:
+                # The whole-signal result is computed once and reused by the plots, the index reads it back
+                self.evaluate_full(raw, sampling_rate, depth)
+
+                def read(start, stop):
+                    return self.evaluate(raw, sampling_rate, start, stop, depth, memoize=False)
+
+                with tracing.span("statistics_index", samples=len(raw), depth=depth):
+                    self.indexes[chain] = StatisticsIndex(read, len(raw))
+            return self.indexes[chain]
+
+    def statistics_of(self, raw, sampling_rate, depth):
+        """
+        Returns the (min, max) of the output of the first depth stages on the whole signal.
+        """
+        return self.statistics_index(raw, sampling_rate, depth).extrema()
+
+    def raw_changed(self, raw, sampling_rate, start, stop):
+        """
+        Updates the memoized results after the raw samples [start, stop) were modified in place.
+        For each chain, only the windows and index blocks within the padding of the change are recomputed. Chains
+        after a stage using whole-signal statistics (e.g. normalization) depend on every sample and are dropped.
+        """
+        with self.lock:
+            padding = 0
+            is_global = False
+            affected = {}
+            for depth in range(len(self.stages) + 1):
+                if depth > 0:
+                    stage = self.stages[depth - 1]
+                    padding += stage.padding(sampling_rate)
+                    is_global = is_global or stage.needs_statistics
+                    # Recomputed lazily, window by window for the index below
+                    self.full_results.pop(self.chain_key(depth), None)
+                lo, hi = max(start - padding, 0), min(stop + padding, len(raw))
+                chain = self.chain_key(depth)
+                affected[chain] = (lo, hi, is_global)
+                if chain in self.indexes and is_global:
+                    del self.indexes[chain]
+            for key in list(self.windows):
+                chain, window_start, window_stop = key
+                lo, hi, is_global = affected.get(chain, (0, 0, True))
+                if is_global or (window_start < hi and window_stop > lo):
+                    self.cached_bytes -= self.windows.pop(key).nbytes
+            for chain, (lo, hi, is_global) in affected.items():
+                if chain in self.indexes:
+                    self.indexes[chain].update(lo, hi)
+
+
+def filter_by_window(pipelines, raws, sampling_rate, cascade, causal=False):
+    """
+    Evaluates the last stage of several pipelines, a FilterStage applying cascade, on whole signals of the same length
+    read window by window: each padded window of every signal is filtered as one 2-D array (see filter_channels), so
+    disk-backed or compact signals are filtered together without reading any of them whole in float64.
+    The results are stored as the whole-signal results of the pipelines, allocated like in evaluate_by_window.
+    :param pipelines: The pipelines, all ending with the same FilterStage.
+    :param raws: The raw values of each pipeline.
+    :param sampling_rate: The sampling rate shared by the signals.
+    :param cascade: The FilterCascade of the last stage.
+    :param causal: True if the stage filters forward only.
+    """
+    if not pipelines:
+        return
+    samples = len(raws[0])
+    padding = cascade.settling_samples()
+    window = max(SPILL_WINDOW_SAMPLES // len(pipelines), 4 * padding, 1)
+    results = [
+        (temporary_memmap if pipeline.out_of_core else np.empty)((samples,), pipeline.result_dtype)
+        for pipeline in pipelines
+    ]
+    with tracing.span("filter_by_window", channels=len(pipelines), samples=samples):
+        for start in range(0, samples, window):
+            stop = min(start + window, samples)
+            padded_start, padded_stop = max(start - padding, 0), min(stop + padding, samples)
+            upstream = np.stack(
+                [
+                    pipeline.evaluate(raw, sampling_rate, padded_start, padded_stop, len(pipeline.stages) - 1, False)
+                    for pipeline, raw in zip(pipelines, raws)
+                ]
+            )
+            filtered = filter_channels(cascade, upstream, causal=causal)
+            for values, row in zip(results, filtered):
+                values[start:stop] = row[start - padded_start : stop - padded_start]
+    for pipeline, values in zip(pipelines, results):
+        pipeline.set_full_result(values)
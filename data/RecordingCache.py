@@ -0,0 +1,190 @@
+""" This file contains the class definition for the on-disk cache of parsed recordings.
+    Description: Parsing and resampling a large CSV or XDF file takes a long time, so the resulting signal stores are
+    saved as raw little-endian binary files next to a JSON metadata sidecar. Re-opening the same file memory-maps
+    the binary files instead of parsing the source again. Entries are keyed on the source path, modification time,
+    size, target sampling rate and storage type, and the least recently used entries are evicted when the cache exceeds its budget.
+"""
+import hashlib
+import json
+import os
+from typing import List
+
+import numpy as np
+
+from data.SignalStore import SignalStore
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "signal_processing_ui")
+DEFAULT_CACHE_BUDGET = 8 * 1024**3  # bytes
+
+
+class RecordingCache:
+    """
+    Class representing a persistent cache of parsed recordings.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY, budget=DEFAULT_CACHE_BUDGET):
+        """
+        Constructor for the RecordingCache class.
+        :param directory: The directory holding the cache files, created on first save.
+        :param budget: The maximum total size of the cache (in bytes).
+        """
+        self.directory = directory
+        self.budget = budget
+
+    def key(self, file_path, target_sampling_rate, storage=None):
+        """
+        Returns the cache key of a source file.
+        :param file_path: Path to the source CSV or XDF file.
+        :param target_sampling_rate: The sampling rate the file is resampled to, None if it is not resampled.
+        :param storage: The type the data is stored in (see SignalStore.STORAGE_TYPES), None for the parsed type.
+        :return: A hexadecimal key, which changes whenever the source file is modified.
+        """
+        stat = os.stat(file_path)
+        description = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{target_sampling_rate}"
+        if storage is not None:
+            description += f"|{storage}"
+        return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+    def sidecar_path(self, key):
+        """
+        Returns the path of the metadata sidecar of a cache entry.
+        """
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, file_path, target_sampling_rate, storage=None) -> List[SignalStore]:
+        """
+        Memory-maps the cached signal stores of a source file.
+        :param file_path: Path to the source CSV or XDF file.
+        :param target_sampling_rate: The sampling rate the file is resampled to, None if it is not resampled.
+        :param storage: The type the data is stored in, None for the parsed type.
+        :return: The list of SignalStore objects, or None if the file is not in the cache.
+        """
+        sidecar = self.sidecar_path(self.key(file_path, target_sampling_rate, storage))
+        try:
+            with open(sidecar, "r") as f:
+                metadata = json.load(f)
+            stores = []
+            for entry in metadata["stores"]:
+                # Copy-on-write maps: in-place changes stay in memory and never reach the cache
+                data = np.memmap(
+                    os.path.join(self.directory, entry["data"]),
+                    dtype=np.dtype(entry["dtype"]),
+                    mode="c",
+                    shape=tuple(entry["shape"]),
+                )
+                timestamps = np.memmap(
+                    os.path.join(self.directory, entry["timestamps"]),
+                    dtype=np.dtype(entry["timestamps_dtype"]),
+                    mode="c",
+                    shape=(entry["shape"][1],),
+                )
+                stores.append(
+                    SignalStore(
+                        data,
+                        timestamps,
+                        entry["sampling_rate"],
+                        entry["names"],
+                        gain=entry.get("gain"),
+                        offset=entry.get("offset"),
+                    )
+                )
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(sidecar):
+                print(f"Ignoring unreadable cache entry {sidecar}: {e}")
+            return None
+
+        # Mark the entry as recently used
+        os.utime(sidecar)
+        return stores
+
+    def save(self, file_path, target_sampling_rate, stores: List[SignalStore], storage=None):
+        """
+        Writes the signal stores of a source file to the cache, then evicts old entries if over budget.
+        :param file_path: Path to the source CSV or XDF file.
+        :param target_sampling_rate: The sampling rate the file is resampled to, None if it is not resampled.
+        :param stores: The list of SignalStore objects parsed from the file.
+        :param storage: The type the data is stored in, None for the parsed type.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        key = self.key(file_path, target_sampling_rate, storage)
+        metadata = {
+            "source": os.path.abspath(file_path),
+            "target_sampling_rate": target_sampling_rate,
+            "stores": [],
+        }
+        for i, store in enumerate(stores):
+            data_dtype = store.data.dtype.newbyteorder("<")
+            timestamps = np.asarray(store.timestamps)
+            timestamps_dtype = timestamps.dtype.newbyteorder("<")
+            entry = {
+                "data": f"{key}_{i}.data.bin",
+                "timestamps": f"{key}_{i}.time.bin",
+                "dtype": data_dtype.str,
+                "timestamps_dtype": timestamps_dtype.str,
+                "shape": list(store.data.shape),
+                "sampling_rate": store.sampling_rate,
+                "names": [str(name) for name in store.names],
+                # Scaled integers, see SignalStore.decode
+                "gain": None if store.gain is None else store.gain.tolist(),
+                "offset": None if store.offset is None else store.offset.tolist(),
+            }
+            self._write_array(entry["data"], store.data.astype(data_dtype, copy=False))
+            self._write_array(entry["timestamps"], timestamps.astype(timestamps_dtype, copy=False))
+            metadata["stores"].append(entry)
+
+        # The sidecar is written last, an entry without one is never read
+        sidecar = self.sidecar_path(key)
+        with open(sidecar + ".tmp", "w") as f:
+            json.dump(metadata, f)
+        os.replace(sidecar + ".tmp", sidecar)
+        self.evict(keep=key)
+
+    def _write_array(self, file_name, array):
+        """
+        Writes an array as raw bytes in the cache directory.
+        """
+        path = os.path.join(self.directory, file_name)
+        with open(path + ".tmp", "wb") as f:
+            np.ascontiguousarray(array).tofile(f)
+        os.replace(path + ".tmp", path)
+
+    def entries(self):
+        """
+        Returns the entries of the cache, least recently used first.
+        :return: A list of (key, last_used, size_in_bytes, file_paths) tuples.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        files = {}
+        for file_name in os.listdir(self.directory):
+            files.setdefault(file_name.split("_")[0].split(".")[0], []).append(
+                os.path.join(self.directory, file_name)
+            )
+        entries = []
+        for key, paths in files.items():
+            sidecar = self.sidecar_path(key)
+            # Files without a sidecar are leftovers of an interrupted save, evict them first
+            last_used = os.path.getmtime(sidecar) if sidecar in paths else 0
+            size = sum(os.path.getsize(path) for path in paths)
+            entries.append((key, last_used, size, paths))
+        entries.sort(key=lambda entry: entry[1])
+        return entries
+
+    def evict(self, keep=None):
+        """
+        Deletes the least recently used entries until the cache fits in its budget.
+        :param keep: A key that must not be evicted, typically the entry just saved.
+        """
+        entries = self.entries()
+        total = sum(entry[2] for entry in entries)
+        for key, _, size, paths in entries:
+            if total <= self.budget:
+                break
+            if key == keep:
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Could not evict {path}: {e}")
+            total -= size
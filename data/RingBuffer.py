@@ -0,0 +1,74 @@
+""" This file contains the class definition for a multichannel ring buffer.
+    Description: A ring buffer keeps the most recent samples of every channel of a live signal in a preallocated
+    (channels, capacity) array. Blocks are written with vectorized copies that wrap around the end of the array,
+    and readers get a contiguous copy of the latest samples. Writes and reads can happen on different threads.
+"""
+import threading
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Class representing the latest samples of a multichannel live signal.
+    """
+
+    def __init__(self, channel_count, capacity, dtype=np.float64):
+        """
+        Constructor for the RingBuffer class.
+        :param channel_count: The number of channels.
+        :param capacity: The number of samples kept per channel.
+        :param dtype: The type of the samples.
+        """
+        self.data = np.zeros((channel_count, capacity), dtype=dtype)
+        self.capacity = capacity
+        # Total number of samples written since the creation of the buffer
+        self.total_written = 0
+        self.lock = threading.Lock()
+
+    @property
+    def channel_count(self):
+        return self.data.shape[0]
+
+    @property
+    def count(self):
+        """
+        Returns the number of valid samples per channel, at most the capacity.
+        """
+        return min(self.total_written, self.capacity)
+
+    def write(self, block):
+        """
+        Appends a block of samples, overwriting the oldest ones when the buffer is full.
+        :param block: The new samples, shape (channels, samples).
+        """
+        block = np.asarray(block)
+        if block.shape[0] != self.channel_count:
+            raise ValueError(f"Expected {self.channel_count} channels, got {block.shape[0]}")
+        written = block.shape[1]
+        # Only the last capacity samples of a burst can be kept, they go where they would have been written
+        block = block[:, -self.capacity :]
+        n = block.shape[1]
+        with self.lock:
+            start = (self.total_written + written - n) % self.capacity
+            first = min(n, self.capacity - start)
+            self.data[:, start : start + first] = block[:, :first]
+            self.data[:, : n - first] = block[:, first:]
+            self.total_written += written
+
+    def latest(self, n=None):
+        """
+        Returns a copy of the latest samples in chronological order.
+        :param n: The number of samples per channel, all the valid ones by default.
+        :return: A tuple (samples, index) where samples has shape (channels, n) and index is the total index
+            of its first sample since the creation of the buffer.
+        """
+        with self.lock:
+            n = self.count if n is None else min(n, self.count)
+            end = self.total_written % self.capacity
+            start = end - n
+            if start >= 0:
+                samples = self.data[:, start:end].copy()
+            else:
+                samples = np.concatenate((self.data[:, start:], self.data[:, :end]), axis=1)
+            return samples, self.total_written - n
@@ -0,0 +1,251 @@
+""" This file contains the class definition for a columnar signal store.
+    Description: A signal store holds every channel of a file (or of an XDF stream) in one contiguous 2-D array
+    of shape (channels, samples), along with a single timestamp vector shared by all the channels.
+    The Timeseries objects created from a store are views into its rows, so no channel data is copied.
+    A store can be disk-backed: its arrays are then memory-mapped files (cache entries, spilled stores) read one window
+    at a time, so recordings larger than the memory can be opened.
+    A store can also hold its data in a compact type (float32, or int16/int32 scaled by a gain and an offset per
+    channel): the channels are then read through CompactChannel views, which decode each block to float64 when it is
+    read, so processing runs in float64 while only the blocks being processed take 8 bytes per sample.
+"""
+import tempfile
+
+import numpy as np
+
+SPILL_CHUNK_SAMPLES = 1 << 20  # Number of samples copied at a time when spilling or converting arrays
+# The types a store can hold its data in, the integer ones are scaled to the range of each channel
+STORAGE_TYPES = ("float64", "float32", "int32", "int16")
+
+
+def temporary_memmap(shape, dtype=np.float64):
+    """
+    Returns a writable array backed by an anonymous temporary file, which disappears when the array is freed.
+    :param shape: The shape of the array.
+    :param dtype: The type of the array.
+    """
+    if int(np.prod(shape)) == 0:
+        return np.zeros(shape, dtype)
+    with tempfile.TemporaryFile() as spill_file:
+        # The mapping keeps the file alive once it is closed
+        return np.memmap(spill_file, dtype=dtype, mode="w+", shape=shape)
+
+
+def decode(stored, gain=None, offset=None):
+    """
+    Returns stored values as float64. Scaled integers are decoded as stored * gain + offset, the smallest integer of
+    their type being the code of NaN.
+    :param stored: The stored values, of any numeric type.
+    :param gain: The gain of the values (broadcast against them), None if they are not scaled.
+    :param offset: The offset of the values (broadcast against them).
+    """
+    stored = np.asarray(stored)
+    values = np.asarray(stored, dtype=np.float64)
+    if gain is None:
+        return values[()]
+    # np.where rather than a masked assignment, so that a single sample decodes too ([()] unwraps it to a scalar)
+    return np.where(stored == np.iinfo(stored.dtype).min, np.nan, values * gain + offset)[()]
+
+
+class CompactChannel:
+    """
+    1-D view of a channel stored in a compact type. Indexing returns float64 values (see decode), so only the block
+    being read is upcast; np.asarray decodes the whole channel. Assigned values are encoded back, scaled integers
+    being clipped to the range of the channel.
+    """
+
+    def __init__(self, stored, gain=None, offset=None):
+        """
+        Constructor for the CompactChannel class.
+        :param stored: The 1-D array of stored values, possibly memory-mapped.
+        :param gain: The gain of the scaled integers, None if the values are not scaled.
+        :param offset: The offset of the scaled integers.
+        """
+        self.stored = stored
+        self.gain = gain
+        self.offset = offset
+
+    dtype = np.dtype(np.float64)
+    ndim = 1
+
+    def __len__(self):
+        return len(self.stored)
+
+    @property
+    def shape(self):
+        return self.stored.shape
+
+    @property
+    def size(self):
+        return self.stored.size
+
+    @property
+    def nbytes(self):
+        """
+        Returns the size of the stored values (in bytes), not of their float64 decoding.
+        """
+        return self.stored.nbytes
+
+    def __getitem__(self, key):
+        return decode(self.stored[key], self.gain, self.offset)
+
+    def __setitem__(self, key, values):
+        values = np.asarray(values, dtype=np.float64)
+        if self.stored.dtype.kind == "f":
+            self.stored[key] = values
+            return
+        info = np.iinfo(self.stored.dtype)
+        gain = 1.0 if self.gain is None else self.gain
+        offset = 0.0 if self.offset is None else self.offset
+        encoded = np.rint((values - offset) / gain)
+        missing = np.isnan(encoded)
+        encoded = np.clip(encoded, -info.max if self.gain is not None else info.min, info.max)
+        encoded = np.where(missing, info.min if self.gain is not None else 0, encoded)
+        self.stored[key] = encoded
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+
+class SignalStore:
+    """
+    Class representing the channels of a recording sharing the same timestamps.
+    """
+
+    def __init__(self, data, timestamps, sampling_rate, names, stream_id=None, gain=None, offset=None):
+        """
+        Constructor for the SignalStore class.
+        :param data: A 2-D array of shape (channels, samples), each row is one channel.
+        :param timestamps: The timestamps shared by every channel (in seconds).
+        :param sampling_rate: The sampling rate shared by every channel.
+        :param names: The names of the channels.
+        :param stream_id: The identifier of the XDF stream the store was read from, if any.
+        :param gain: The gain of each channel when data holds scaled integers (see decode), None otherwise.
+        :param offset: The offset of each channel when data holds scaled integers.
+        """
+        self.disk_backed = isinstance(data, np.memmap)
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise ValueError(f"A signal store needs a 2-D array, got {data.ndim} dimension(s)")
+        if len(names) != data.shape[0]:
+            raise ValueError(f"Got {len(names)} names for {data.shape[0]} channels")
+        # Rows must be contiguous so that each channel is a zero-copy 1-D view
+        self.data = np.ascontiguousarray(data)
+        self.timestamps = timestamps
+        self.sampling_rate = sampling_rate
+        self.names = list(names)
+        self.stream_id = stream_id
+        self.gain = None if gain is None else np.asarray(gain, dtype=np.float64)
+        self.offset = None if offset is None else np.asarray(offset, dtype=np.float64)
+
+    @property
+    def channel_count(self):
+        """
+        Returns the number of channels in the store.
+        """
+        return self.data.shape[0]
+
+    @property
+    def sample_count(self):
+        """
+        Returns the number of samples of each channel in the store.
+        """
+        return self.data.shape[1]
+
+    @property
+    def storage(self):
+        """
+        Returns the name of the type the data is stored in, e.g. "float64" or "int16".
+        """
+        return self.data.dtype.name
+
+    @property
+    def compact(self):
+        """
+        Returns True if the channels are numbers stored in another type than float64, read through CompactChannel.
+        """
+        return np.issubdtype(self.data.dtype, np.number) and self.data.dtype != np.float64
+
+    def decode(self, start=0, stop=None):
+        """
+        Returns the float64 values of the samples [start, stop) of every channel, shape (channels, samples).
+        """
+        stored = self.data[:, start:stop]
+        if self.gain is None:
+            return decode(stored)
+        return decode(stored, self.gain[:, np.newaxis], self.offset[:, np.newaxis])
+
+    def convert(self, storage):
+        """
+        Converts the data of the store to another type, chunk by chunk. Integer types are scaled so that the range of
+        each channel spans the integers of the type (NaN getting its own code), unless the data already holds
+        integers that fit in the type.
+        :param storage: The new type, one of STORAGE_TYPES.
+        """
+        dtype = np.dtype(storage)
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unsupported storage type: {storage}")
+        if not np.issubdtype(self.data.dtype, np.number) or (dtype == self.data.dtype and self.gain is None):
+            return
+        allocate = temporary_memmap if self.disk_backed else np.empty
+        data = allocate(self.data.shape, dtype)
+        chunks = range(0, self.sample_count, SPILL_CHUNK_SAMPLES)
+        gain = offset = None
+        if dtype.kind == "f":
+            for start in chunks:
+                data[:, start : start + SPILL_CHUNK_SAMPLES] = self.decode(start, start + SPILL_CHUNK_SAMPLES)
+        elif self.gain is None and self.data.dtype.kind in "iu" and np.can_cast(self.data.dtype, dtype):
+            for start in chunks:
+                data[:, start : start + SPILL_CHUNK_SAMPLES] = self.data[:, start : start + SPILL_CHUNK_SAMPLES]
+        else:
+            # First pass: the finite range of each channel, second pass: the scaled integers
+            minimum = np.full(self.channel_count, np.nan)
+            maximum = np.full(self.channel_count, np.nan)
+            for start in chunks:
+                chunk = self.decode(start, start + SPILL_CHUNK_SAMPLES)
+                chunk = np.where(np.isfinite(chunk), chunk, np.nan)
+                minimum = np.fmin(minimum, np.fmin.reduce(chunk, axis=1))
+                maximum = np.fmax(maximum, np.fmax.reduce(chunk, axis=1))
+            minimum, maximum = np.nan_to_num(minimum), np.nan_to_num(maximum)
+            largest = np.iinfo(dtype).max
+            offset = (maximum + minimum) / 2
+            gain = (maximum - minimum) / (2 * largest)
+            gain[gain == 0] = 1.0
+            for start in chunks:
+                chunk = (self.decode(start, start + SPILL_CHUNK_SAMPLES) - offset[:, np.newaxis]) / gain[:, np.newaxis]
+                missing = np.isnan(chunk)
+                chunk = np.clip(np.rint(chunk), -largest, largest)
+                chunk[missing] = np.iinfo(dtype).min
+                data[:, start : start + SPILL_CHUNK_SAMPLES] = chunk
+        self.data = np.asarray(data)
+        self.gain, self.offset = gain, offset
+
+    def spill(self):
+        """
+        Moves the data and the timestamps of the store to temporary memory-mapped files, chunk by chunk, so that
+        the memory they used is released once the caller drops its references to the original arrays.
+        """
+        if self.disk_backed:
+            return
+        data = temporary_memmap(self.data.shape, self.data.dtype)
+        for start in range(0, self.sample_count, SPILL_CHUNK_SAMPLES):
+            data[:, start : start + SPILL_CHUNK_SAMPLES] = self.data[:, start : start + SPILL_CHUNK_SAMPLES]
+        self.data = np.asarray(data)
+        if self.timestamps is not None:
+            timestamps = np.asarray(self.timestamps)
+            spilled = temporary_memmap(timestamps.shape, timestamps.dtype)
+            spilled[:] = timestamps
+            self.timestamps = np.asarray(spilled)
+        self.disk_backed = True
+
+    def channel(self, index):
+        """
+        Returns a view on the values of one channel.
+        :param index: The index of the channel.
+        :return: A 1-D view into the store data, a CompactChannel decoding it to float64 if the store is compact.
+        """
+        if not self.compact:
+            return self.data[index]
+        if self.gain is None:
+            return CompactChannel(self.data[index])
+        return CompactChannel(self.data[index], self.gain[index], self.offset[index])
@@ -0,0 +1,204 @@
+""" This file contains the class definition for an index of block statistics.
+    Description: The index stores, for successively coarser blocks of samples, the count, minimum, maximum, sum and
+    sum of squares of each block (NaN samples are left out). The statistics of any range of samples (mean, RMS,
+    variance, peak-to-peak, extrema) are then merged from at most 2 * (factor - 1) blocks per level plus the samples
+    of the two incomplete blocks at the ends, instead of scanning the range.
+    When samples change, only the blocks covering them and their parents are recomputed.
+"""
+import numpy as np
+
+STATISTICS_BLOCK = 64  # Number of samples summarized by a block of the first level
+STATISTICS_CHUNK_SAMPLES = 1 << 20  # Number of samples read at a time when building the first level
+
+
+def summarize_blocks(values, block_size):
+    """
+    Returns the statistics of consecutive blocks of values, the last block may be incomplete.
+    :param values: The 1-D float64 samples.
+    :param block_size: The number of samples of a block.
+    :return: A tuple of arrays (counts, mins, maxs, sums, sums_of_squares), one entry per block.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    offsets = np.arange(0, len(values), block_size)
+    if len(offsets) == 0:
+        return tuple(np.empty(0) for _ in range(5))
+    missing = np.isnan(values)
+    finite = np.where(missing, 0.0, values)
+    return (
+        np.add.reduceat(~missing, offsets).astype(np.float64),
+        np.fmin.reduceat(values, offsets),
+        np.fmax.reduceat(values, offsets),
+        np.add.reduceat(finite, offsets),
+        np.add.reduceat(finite * finite, offsets),
+    )
+
+
+class RangeStatistics:
+    """
+    Class representing the statistics of a range of samples, NaN samples left out.
+    """
+
+    def __init__(self, count=0, minimum=np.nan, maximum=np.nan, total=0.0, total_squares=0.0):
+        """
+        Constructor for the RangeStatistics class.
+        :param count: The number of samples.
+        :param minimum: The smallest sample, NaN if there is none.
+        :param maximum: The largest sample, NaN if there is none.
+        :param total: The sum of the samples.
+        :param total_squares: The sum of the squares of the samples.
+        """
+        self.count = int(count)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.total = float(total)
+        self.total_squares = float(total_squares)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    @property
+    def rms(self):
+        return np.sqrt(self.total_squares / self.count) if self.count else np.nan
+
+    @property
+    def variance(self):
+        if not self.count:
+            return np.nan
+        # Rounding can make the difference slightly negative for a constant signal
+        return max(self.total_squares / self.count - self.mean**2, 0.0)
+
+    @property
+    def standard_deviation(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def peak_to_peak(self):
+        return self.maximum - self.minimum
+
+
+class StatisticsIndex:
+    """
+    Class representing a hierarchy of block statistics of a 1-D signal.
+    Level k summarizes blocks of base_block * factor**k samples.
+    """
+
+    def __init__(self, read, length, factor=4, base_block=STATISTICS_BLOCK, chunk_samples=STATISTICS_CHUNK_SAMPLES):
+        """
+        Constructor for the StatisticsIndex class.
+        :param read: A function read(start, stop) returning the float64 samples [start, stop) of the signal. It is
+            called chunk by chunk, so the signal can be memory-mapped or evaluated window by window.
+        :param length: The number of samples of the signal.
+        :param factor: The number of blocks of a level merged into one block of the next level.
+        :param base_block: The number of samples of a block of the first level.
+        :param chunk_samples: The approximate number of samples read at a time.
+        """
+        self.read = read
+        self.length = int(length)
+        self.factor = factor
+        self.base_block = base_block
+        self.chunk_samples = max(chunk_samples // base_block, 1) * base_block
+        # Each level is a tuple (block_size, counts, mins, maxs, sums, sums_of_squares)
+        self.levels = []
+
+        parts = [
+            summarize_blocks(self.read(start, min(start + self.chunk_samples, self.length)), base_block)
+            for start in range(0, self.length, self.chunk_samples)
+        ]
+        statistics = tuple(np.concatenate(arrays) for arrays in zip(*parts)) if parts else summarize_blocks([], 1)
+        block_size = base_block
+        self.levels.append((block_size,) + statistics)
+        while len(statistics[0]) > factor:
+            statistics = self._reduce(statistics, 0, len(statistics[0]))
+            block_size *= factor
+            self.levels.append((block_size,) + statistics)
+
+    def _reduce(self, statistics, first, stop):
+        """
+        Merges every `factor` consecutive blocks of statistics[first:stop] into the blocks of the next level.
+        :param statistics: The arrays (counts, mins, maxs, sums, sums_of_squares) of a level.
+        :param first: The first block to merge, a multiple of factor.
+        :param stop: The block after the last one to merge.
+        :return: The arrays of the merged blocks.
+        """
+        offsets = np.arange(0, stop - first, self.factor)
+        counts, mins, maxs, sums, squares = (array[first:stop] for array in statistics)
+        return (
+            np.add.reduceat(counts, offsets),
+            np.fmin.reduceat(mins, offsets),
+            np.fmax.reduceat(maxs, offsets),
+            np.add.reduceat(sums, offsets),
+            np.add.reduceat(squares, offsets),
+        )
+
+    def update(self, start, stop):
+        """
+        Recomputes the blocks covering the samples [start, stop) after they changed, then their parents.
+        Only these samples (rounded to whole blocks) are read again.
+        """
+        start = max(int(start), 0)
+        stop = min(int(stop), self.length)
+        if start >= stop:
+            return
+        first = start // self.base_block
+        last = -(-stop // self.base_block)
+        for level, (block_size, *statistics) in enumerate(self.levels):
+            if level == 0:
+                fresh = summarize_blocks(
+                    self.read(first * block_size, min(last * block_size, self.length)), block_size
+                )
+            else:
+                children = self.levels[level - 1][1:]
+                fresh = self._reduce(children, first * self.factor, min(last * self.factor, len(children[0])))
+            for array, values in zip(statistics, fresh):
+                array[first:last] = values
+            first, last = first // self.factor, -(-last // self.factor)
+
+    def query(self, start, stop):
+        """
+        Returns the statistics of the samples [start, stop).
+        :param start: The first sample of the range.
+        :param stop: The sample after the end of the range.
+        :return: A RangeStatistics.
+        """
+        start = max(int(start), 0)
+        stop = min(int(stop), self.length)
+        parts = []
+        first = -(-start // self.base_block)
+        last = stop // self.base_block
+        if first >= last:
+            # Within one or two blocks: the samples themselves are read
+            if start < stop:
+                parts.append(summarize_blocks(self.read(start, stop), stop - start))
+        else:
+            # Samples of the incomplete blocks at both ends, then whole blocks from the finest level up
+            for lo, hi in ((start, first * self.base_block), (last * self.base_block, stop)):
+                if lo < hi:
+                    parts.append(summarize_blocks(self.read(lo, hi), hi - lo))
+            for level, (_, *statistics) in enumerate(self.levels):
+                next_first = -(-first // self.factor)
+                next_last = last // self.factor
+                if next_first >= next_last or level == len(self.levels) - 1:
+                    parts.append(tuple(array[first:last] for array in statistics))
+                    break
+                for lo, hi in ((first, next_first * self.factor), (next_last * self.factor, last)):
+                    if lo < hi:
+                        parts.append(tuple(array[lo:hi] for array in statistics))
+                first, last = next_first, next_last
+        if not parts:
+            return RangeStatistics()
+        counts, mins, maxs, sums, squares = (np.concatenate(arrays) for arrays in zip(*parts))
+        return RangeStatistics(
+            counts.sum(),
+            np.fmin.reduce(mins, initial=np.nan),
+            np.fmax.reduce(maxs, initial=np.nan),
+            sums.sum(),
+            squares.sum(),
+        )
+
+    def extrema(self):
+        """
+        Returns the (min, max) of the whole signal.
+        """
+        statistics = self.query(0, self.length)
+        return statistics.minimum, statistics.maximum
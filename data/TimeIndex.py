@@ -0,0 +1,94 @@
+""" This file contains the class definition for a time index.
+    Description: A time index converts times (in seconds) into sample indices of a timeseries in logarithmic time.
+    Uniformly sampled timestamps (resampled CSV files) are answered with arithmetic, irregular timestamps
+    (XDF streams) with a binary search.
+"""
+import numpy as np
+
+
+GRID_CHUNK_SAMPLES = 1 << 20  # Number of timestamps compared to the grid at a time
+
+
+def grid_deviation(timestamps, period):
+    """
+    Returns the largest distance between the timestamps and the regular grid of period starting at the first one.
+    The timestamps are read in chunks, so memory-mapped timestamps are never loaded whole.
+    """
+    deviation = 0.0
+    for start in range(0, len(timestamps), GRID_CHUNK_SAMPLES):
+        chunk = np.asarray(timestamps[start : start + GRID_CHUNK_SAMPLES], dtype=np.float64)
+        grid = timestamps[0] + np.arange(start, start + len(chunk)) * period
+        deviation = max(deviation, float(np.max(np.abs(chunk - grid))))
+    return deviation
+
+
+class TimeIndex:
+    """
+    Class representing a sorted time index over the timestamps of a timeseries.
+    """
+
+    def __init__(self, timestamps, sampling_rate=None, tolerance=1e-6):
+        """
+        Constructor for the TimeIndex class.
+        :param timestamps: The sorted timestamps of the timeseries (in seconds).
+        :param sampling_rate: The nominal sampling rate, used to detect uniformly sampled timestamps.
+        :param tolerance: The maximum deviation from the uniform grid, as a fraction of the sampling period.
+        """
+        self.timestamps = np.asarray(timestamps)
+        self.start_time = None
+        self.period = None
+        if len(self.timestamps) < 2:
+            return
+
+        if sampling_rate is not None and float(sampling_rate) > 0:
+            period = 1 / float(sampling_rate)
+        else:
+            period = (self.timestamps[-1] - self.timestamps[0]) / (len(self.timestamps) - 1)
+        if period > 0 and grid_deviation(self.timestamps, period) <= tolerance * period:
+            self.start_time = self.timestamps[0]
+            self.period = period
+
+    def is_uniform(self):
+        """
+        Returns True if the timestamps are answered with the arithmetic path.
+        """
+        return self.period is not None
+
+    def range(self, start_time, end_time):
+        """
+        Returns the indices of the samples whose timestamp is in [start_time, end_time].
+        :param start_time: The start of the interval (in seconds).
+        :param end_time: The end of the interval (in seconds).
+        :return: A tuple (start, stop) to slice the timeseries with, start == stop if the interval is empty.
+        """
+        n = len(self.timestamps)
+        if self.is_uniform():
+            start = int(np.ceil((start_time - self.start_time) / self.period - 1e-9))
+            stop = int(np.floor((end_time - self.start_time) / self.period + 1e-9)) + 1
+        else:
+            start = int(np.searchsorted(self.timestamps, start_time, side="left"))
+            stop = int(np.searchsorted(self.timestamps, end_time, side="right"))
+        start = min(max(start, 0), n)
+        stop = min(max(stop, start), n)
+        return start, stop
+
+    def nearest(self, time):
+        """
+        Returns the index of the sample whose timestamp is the closest to time.
+        :param time: The time to look up (in seconds).
+        :return: The index of the nearest sample.
+        """
+        n = len(self.timestamps)
+        if n == 0:
+            raise ValueError("The time index is empty")
+        if self.is_uniform():
+            index = int(np.rint((time - self.start_time) / self.period))
+            return min(max(index, 0), n - 1)
+        index = int(np.searchsorted(self.timestamps, time))
+        if index == 0:
+            return 0
+        if index == n:
+            return n - 1
+        if time - self.timestamps[index - 1] <= self.timestamps[index] - time:
+            return index - 1
+        return index
@@ -4,29 +4,83 @@
 """
 import pandas as pd
 import os
+import itertools
 from typing import List
 import pyxdf
 import numpy as np
 
-from scipy.interpolate import interp1d
+from data.MinMaxPyramid import PYRAMID_DISK_BLOCK, MinMaxPyramid
+from data.TimeIndex import TimeIndex
+from data.SignalStore import SignalStore, temporary_memmap
+from data.Pipeline import Pipeline
+from data.Alignment import effective_rate, interpolate_rows
+from local_tools import tracing
+
+DATA_TOKENS = itertools.count()  # Source of the data tokens of the timeseries, never reused unlike id()
+
+
 class Timeseries:
     """
     Class representing a timeseries.
     """
 
-    def __init__(self, data, sampling_rate, name, timestamps=None):
+    def __init__(self, data, sampling_rate, name, timestamps=None, store=None, channel=None, storage=None):
         """
         Constructor for the Timeseries class.
         :param data: A list of data points.
         :param sampling_rate: The sampling rate of the timeseries.
+        :param store: The SignalStore the data is a view of, if any.
+        :param channel: The index of the channel in the store.
+        :param storage: The type to keep the data in (see SignalStore.STORAGE_TYPES), None to keep it as given.
+            Ignored for a view of a store, the type of the store applies.
         """
+        if storage is not None and store is None:
+            # Memory-mapped data keeps its type, so the store (and the converted data) stay disk-backed
+            data = data if isinstance(data, np.ndarray) else np.asarray(data)
+            store = SignalStore(data[np.newaxis], timestamps, sampling_rate, [name])
+            store.convert(storage)
+            data, channel = store.channel(0), 0
+        self.store = store
+        self.channel = channel
         self.values_data = data
         self.timestamps_data = timestamps
         self.sampling_rate_data = sampling_rate
         self.name_data = name
+        self.pyramid_data = None
+        self.pyramid_key = None
+        self.time_index_data = None
+        # Identifies the raw samples, timestamps and rate, renewed whenever one of them changes (cache keys)
+        self.data_token = next(DATA_TOKENS)
+        # Processing stages applied lazily on top of the raw values
+        self.pipeline = Pipeline()
+        self.pipeline.out_of_core = self.disk_backed
+        self.pipeline.result_dtype = self.result_dtype
+
+    @classmethod
+    def from_store(cls, store: SignalStore, channel):
+        """
+        Creates a timeseries viewing one channel of a signal store, without copying its data.
+        :param store: The SignalStore holding the channel.
+        :param channel: The index of the channel in the store.
+        :return: The new Timeseries.
+        """
+        return cls(
+            store.channel(channel),
+            store.sampling_rate,
+            store.names[channel],
+            store.timestamps,
+            store=store,
+            channel=channel,
+        )
 
     # Add more methods here as needed
 
+    def __len__(self):
+        """
+        Returns the number of samples of the timeseries, without evaluating its pipeline.
+        """
+        return len(self.values_data)
+
     def get_sampling_rate(self):
         """
         Returns the sampling rate of the timeseries.
@@ -40,25 +94,135 @@ class Timeseries:
         :param sampling_rate: The sampling rate of the timeseries.
         """
         self.sampling_rate_data = sampling_rate
+        self.time_index_data = None
+        self.data_token = next(DATA_TOKENS)
+        self.pipeline.invalidate()
 
     sampling_rate = property(get_sampling_rate, set_sampling_rate)
 
     def get_data(self):
         """
-        Returns the data of the timeseries.
+        Returns the data of the timeseries, processed by its pipeline over the whole signal.
         :return: The data of the timeseries.
         """
-        return self.values_data
+        if not self.pipeline.stages:
+            return self.values_data
+        return self.pipeline.evaluate_full(self.values_data, self.sampling_rate_data)
 
     def set_data(self, data):
         """
-        Sets the data of the timeseries.
+        Sets the raw data of the timeseries, the stages of its pipeline are kept and applied to the new data.
         :param data: The data of the timeseries.
         """
+        # New data no longer is a view of the store
+        self.store = None
+        self.channel = None
         self.values_data = data
+        self.pyramid_data = None
+        self.data_token = next(DATA_TOKENS)
+        self.pipeline.invalidate()
+        self.pipeline.out_of_core = self.disk_backed
+        self.pipeline.result_dtype = self.result_dtype
 
     values = property(get_data, set_data)
 
+    def get_raw_values(self):
+        """
+        Returns the data of the timeseries before its pipeline.
+        :return: The raw data of the timeseries.
+        """
+        return self.values_data
+
+    raw_values = property(get_raw_values)
+
+    @property
+    def disk_backed(self):
+        """
+        Returns True if the raw values are a memory-mapped file: consumers then read them one window at a time,
+        and whole-signal results of the pipeline are spilled to disk as well.
+        """
+        if self.store is not None:
+            return self.store.disk_backed
+        return isinstance(self.values_data, np.memmap)
+
+    @property
+    def storage(self):
+        """
+        Returns the name of the type the raw values are stored in, e.g. "float64" or "int16".
+        """
+        if self.store is not None:
+            return self.store.storage
+        return np.asarray(self.values_data[:0]).dtype.name
+
+    @property
+    def compact(self):
+        """
+        Returns True if the raw values are stored in a more compact type than float64. Processing then reads them one
+        window at a time, upcast to float64, and keeps whole-signal results in float32.
+        """
+        if self.store is not None:
+            return self.store.compact
+        return self.storage in ("float32", "float16")
+
+    @property
+    def result_dtype(self):
+        """
+        Returns the type of the whole-signal results of the pipeline.
+        """
+        return np.dtype(np.float32 if self.compact else np.float64)
+
+    def window(self, start, stop):
+        """
+        Returns the processed data of the samples [start, stop), only this window (plus the padding needed by
+        the stages) is processed.
+        :param start: The first sample of the window.
+        :param stop: The sample after the end of the window.
+        :return: The processed data of the window.
+        """
+        return self.pipeline.evaluate(self.values_data, self.sampling_rate_data, start, stop)
+
+    def get_pyramid(self):
+        """
+        Returns the min/max decimation pyramid of the processed timeseries.
+        The pyramid is built on first use and reused until the data or the pipeline of the timeseries change.
+        :return: The MinMaxPyramid of the timeseries values.
+        """
+        key = self.pipeline.chain_key()
+        if self.pyramid_data is None or self.pyramid_key != key:
+            base_block = PYRAMID_DISK_BLOCK if self.disk_backed or self.compact else 1
+            self.pyramid_data = MinMaxPyramid(self.values, base_block=base_block)
+            self.pyramid_key = key
+        return self.pyramid_data
+
+    pyramid = property(get_pyramid)
+
+    def get_statistics(self):
+        """
+        Returns the statistics index of the processed timeseries, which gives the mean, RMS, variance and extrema of
+        any range of samples (see data.StatisticsIndex). Built on first use, like the pyramid.
+        :return: The StatisticsIndex of the timeseries values.
+        """
+        return self.pipeline.statistics_index(self.values_data, self.sampling_rate_data)
+
+    statistics = property(get_statistics)
+
+    def write(self, start, values):
+        """
+        Overwrites raw samples in place, from the sample start on. The statistics and the memoized windows are only
+        updated around the modified samples; the pyramid is rebuilt on next use.
+        :param start: The first sample to overwrite.
+        :param values: The new raw values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        start = int(start)
+        stop = start + len(values)
+        if start < 0 or stop > len(self):
+            raise IndexError(f"Samples [{start}, {stop}) are out of the {len(self)} samples of {self.name}")
+        self.values_data[start:stop] = values
+        self.pipeline.raw_changed(self.values_data, self.sampling_rate_data, start, stop)
+        self.pyramid_data = None
+        self.data_token = next(DATA_TOKENS)
+
     def set_name(self, name):
         """
         Sets the name of the timeseries.
@@ -81,6 +245,8 @@ class Timeseries:
         :param timestamps: The timestamps of the timeseries.
         """
         self.timestamps_data = timestamps
+        self.time_index_data = None
+        self.data_token = next(DATA_TOKENS)
 
     def get_timestamps(self):
         """
@@ -91,76 +257,351 @@ class Timeseries:
 
     timestamps = property(get_timestamps, set_timestamps)
 
+    def get_time_index(self):
+        """
+        Returns the time index of the timeseries, used to convert times into sample indices.
+        The index is built on first use and reused until the timestamps or the sampling rate change.
+        :return: The TimeIndex of the timeseries.
+        """
+        if self.time_index_data is None:
+            timestamps = self.timestamps_data
+            if timestamps is None:
+                timestamps = np.arange(len(self.values_data)) / float(self.sampling_rate_data)
+            self.time_index_data = TimeIndex(timestamps, self.sampling_rate_data)
+        return self.time_index_data
+
+    time_index = property(get_time_index)
+
 
-def parse_data_file_csv(file_path, target_sampling_rate, timeseries: List[Timeseries]):
+class LoadCancelled(Exception):
+    """
+    Raised by a LoadMonitor when the load it follows has been cancelled.
+    """
+
+
+class LoadMonitor:
+    """
+    Class receiving the progress of a file load. The default implementation ignores everything,
+    subclasses override the methods they need (e.g. to report progress in the UI).
+    """
+
+    def update(self, bytes_read, total_bytes, channels_done, total_channels):
+        """
+        Called whenever the load progresses.
+        :param bytes_read: The number of bytes of the file read so far.
+        :param total_bytes: The size of the file (in bytes).
+        :param channels_done: The number of channels fully loaded so far.
+        :param total_channels: The number of channels in the file, 0 while unknown.
+        """
+
+    def deliver(self, timeseries: List[Timeseries]):
+        """
+        Called with the timeseries as soon as they are fully loaded, before the whole file is done.
+        :param timeseries: The newly loaded Timeseries objects.
+        """
+
+    def cancelled(self):
+        """
+        Returns True if the load should stop, polled between chunks and streams.
+        """
+        return False
+
+    def check_cancelled(self):
+        """
+        Raises LoadCancelled if the load should stop.
+        """
+        if self.cancelled():
+            raise LoadCancelled()
+
+
+CSV_CHUNK_BYTES = 64 * 1024**2  # Bound on the parsed values held in memory while reading a CSV file
+
+# Time column names and their factor to convert them to seconds
+CSV_TIME_COLUMNS = {"time": 1, "TimeStamp (ms)": 0.001}
+
+
+def read_last_line(file_path, block_size=4096):
+    """
+    Returns the last non-empty line of a text file without reading the whole file.
+    :param file_path: Path to the text file.
+    :param block_size: The number of bytes read at a time from the end of the file.
+    :return: The last line, decoded.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            tail = f.read(read_size) + tail
+            lines = tail.rstrip(b"\r\n").split(b"\n")
+            if len(lines) > 1 or position == 0:
+                return lines[-1].decode("utf-8").strip()
+    return ""
+
+
+def parse_data_file_csv(
+    file_path,
+    target_sampling_rate,
+    timeseries: List[Timeseries],
+    chunk_bytes=CSV_CHUNK_BYTES,
+    monitor=None,
+    disk_backed=False,
+    storage=None,
+):
     """
     Parses a data file, synchronizes start times of signals, and resamples them to a target sampling rate.
+    The file is streamed in chunks of about chunk_bytes of parsed values, each chunk is resampled for every column
+    at once into preallocated arrays, so the peak memory stays close to the size of the resampled data.
     :param file_path: Path to the CSV file.
-    :param target_sampling_rate: Desired sampling rate (in Hz).
+    :param target_sampling_rate: Desired sampling rate (in Hz), None to keep the samples and timestamps of the file
+        (windows are resampled at any rate on demand, see data.Alignment.resample_window).
     :param timeseries: List to append the resulting Timeseries objects to.
+    :param chunk_bytes: The approximate size of the values parsed at a time (in bytes).
+    :param monitor: The LoadMonitor notified of the progress, which can cancel the load.
+    :param disk_backed: True to write the resampled channels to a temporary memory-mapped file instead of memory.
+    :param storage: The type to store the channels in (see SignalStore.STORAGE_TYPES), float64 by default.
     :return: Updated list of Timeseries objects.
     """
     file_name = os.path.basename(file_path)
-    print(f"Loading data from {file_name} ...")
+    allocate = temporary_memmap if disk_backed else np.zeros
+    # Channels stored in 4 bytes or less are parsed into float32 right away, before their final conversion
+    parse_dtype = np.float32 if storage in ("float32", "int16") else np.float64
+    monitor = monitor if monitor is not None else LoadMonitor()
+    total_bytes = os.path.getsize(file_path)
     try:
-        df = pd.read_csv(file_path)
+        first_rows = pd.read_csv(file_path, nrows=1)
     
-        # Determine the time column and convert it if necessary
-        if df.columns[0] == 'time':
-            original_time = df['time'].values  # Already in seconds
-        elif df.columns[0] == 'TimeStamp (ms)':
-            original_time = df['TimeStamp (ms)'].values * 0.001  # Convert from ms to seconds
-        else:
+        # Determine the time column and its conversion factor to seconds
+        if first_rows.columns[0] not in CSV_TIME_COLUMNS:
             raise ValueError("Unknown time column name")
-        # Find the minimum start time across signals if they are supposed to start at the same time
+        time_scale = CSV_TIME_COLUMNS[first_rows.columns[0]]
+
+        # The time column is sorted: the first and last rows give the time span of the file
+        # Find the start time across signals if they are supposed to start at the same time
         # For individual signal adjustment, this part needs to be adapted
-        min_start_time = np.min(original_time)
+        min_start_time = float(first_rows.iloc[0, 0]) * time_scale
+        end_time = float(read_last_line(file_path).split(",")[0]) * time_scale
         
         # Calculate new start time based on the need to start at 0
         start_offset = min_start_time  # Assuming the earliest signal starts at 0 after adjustment
         
-        # Create a new, regularly spaced time vector starting from 0
-        total_duration = original_time[-1] - min_start_time
-        new_time_vector = np.arange(0, total_duration, 1 / target_sampling_rate)
-        
-        column_names = df.columns[1:]  # Skip the first column assuming it's the time column
-        print(f"Column names: {column_names}")
+        column_names = first_rows.columns[1:]  # Skip the first column assuming it's the time column
+        native = target_sampling_rate is None
+        native_times, native_values = [], []
+        if not native:
+            # Create a new, regularly spaced time vector starting from 0
+            total_duration = end_time - min_start_time
+            new_time_vector = np.arange(0, total_duration, 1 / target_sampling_rate)
+
+            # Preallocate the resampled channels, samples past the end of the file stay at zero
+            resampled_data = allocate((len(column_names), len(new_time_vector)), parse_dtype)
+        chunk_rows = max(2, chunk_bytes // (8 * len(first_rows.columns)))
+        next_sample = 0
+        previous_time = previous_values = None
+        with open(file_path, "rb") as csv_file:
+            for chunk in pd.read_csv(csv_file, chunksize=chunk_rows):
+                monitor.check_cancelled()
+                # Shift original time series to start at 0
+                chunk_time = chunk.iloc[:, 0].to_numpy(dtype=float) * time_scale - start_offset
+                chunk_values = chunk.iloc[:, 1:].to_numpy(dtype=float)
+                if native:
+                    native_times.append(chunk_time)
+                    native_values.append(chunk_values)
+                    monitor.update(csv_file.tell(), total_bytes, 0, len(column_names))
+                    continue
+                # Carry the last sample of the previous chunk to interpolate across the boundary
+                if previous_time is not None:
+                    chunk_time = np.concatenate((previous_time, chunk_time))
+                    chunk_values = np.concatenate((previous_values, chunk_values))
+                previous_time, previous_values = chunk_time[-1:], chunk_values[-1:]
+                if len(chunk_time) < 2:
+                    continue
+
+                last_sample = np.searchsorted(new_time_vector, chunk_time[-1], side="right")
+                with tracing.span("resample", samples=last_sample - next_sample, channels=len(column_names)):
+                    resampled_data[:, next_sample:last_sample] = interpolate_rows(
+                        chunk_time, chunk_values, new_time_vector[next_sample:last_sample]
+                    )
+                next_sample = last_sample
+                monitor.update(csv_file.tell(), total_bytes, 0, len(column_names))
+
+        if native:
+            new_time_vector = np.concatenate(native_times)
+            resampled_data = allocate((len(column_names), len(new_time_vector)), parse_dtype)
+            next_sample = 0
+            for chunk_values in native_values:
+                resampled_data[:, next_sample : next_sample + len(chunk_values)] = chunk_values.T
+                next_sample += len(chunk_values)
+            native_values.clear()
+            target_sampling_rate = effective_rate(new_time_vector, 0)
+        store = SignalStore(resampled_data, new_time_vector, target_sampling_rate, column_names)
+        del resampled_data
+        if storage is not None:
+            store.convert(storage)
+
+        # Append the new, resampled timeseries to the list
         count = 0
-        for column in column_names:
-            # Shift original time series to start at 0 and interpolate
-            shifted_time = original_time - start_offset
-            interpolator = interp1d(shifted_time, df[column], bounds_error=False, fill_value=0)  # Extend with zeros outside original range
-            resampled_data = interpolator(new_time_vector)
-            
-            # Append the new, resampled timeseries to the list
-            timeseries.append(Timeseries(resampled_data, target_sampling_rate, column, new_time_vector))
+        for channel in range(store.channel_count):
+            timeseries.append(Timeseries.from_store(store, channel))
             count += 1
+        monitor.update(total_bytes, total_bytes, count, count)
+        monitor.deliver(timeseries[len(timeseries) - count:])
         
-        print(f"Loaded and resampled {count} timeseries from {file_name}.")
+        print(f"Loaded {'' if native else 'and resampled '}{count} timeseries from {file_name}.")
+    except LoadCancelled:
+        raise
     except Exception as e:
         print(f"Error loading and resampling from CSV: {e}")
     return timeseries
 
 
-def parse_data_file_xdf(file_path):
+def parse_data_file_xdf(file_path, monitor=None, stream_ids=None, disk_backed=False, storage=None):
+    """
+    Parses the streams of an XDF file, one SignalStore per stream.
+    :param file_path: Path to the XDF file.
+    :param monitor: The LoadMonitor notified of the progress, which can cancel the load.
+    :param stream_ids: The identifiers of the streams to load (see data.XdfIndex.read_xdf_streams), all by default.
+        The samples of the other streams are skipped without being decoded.
+    :param disk_backed: True to move each stream to a temporary memory-mapped file once decoded.
+    :param storage: The type to store the numeric streams in (see SignalStore.STORAGE_TYPES), None to keep the type
+        decoded by pyxdf.
+    :return: The list of Timeseries objects of the loaded streams.
+    """
     file_name = os.path.basename(file_path)
-    print(f"Loading data from {file_name} ...")
-    data, header = pyxdf.load_xdf(file_path)
+    monitor = monitor if monitor is not None else LoadMonitor()
+    total_bytes = os.path.getsize(file_path)
+    select_streams = None if stream_ids is None else [int(stream_id) for stream_id in stream_ids]
+    if select_streams == []:
+        return []
+    with tracing.span("xdf_parse", file=file_name, streams=str(select_streams)):
+        data, header = pyxdf.load_xdf(file_path, select_streams=select_streams)
+    total_channels = sum(int(stream["info"]["channel_count"][0]) for stream in data)
+    monitor.update(total_bytes, total_bytes, 0, total_channels)
 
     timeseries: List[Timeseries] = []
     count = 0
     for stream in data:
+        monitor.check_cancelled()
         channel_count = int(stream["info"]["channel_count"][0])
+        # One store per stream, the channels of a stream share its timestamps
+        store = SignalStore(
+            np.asarray(stream["time_series"]).T,
+            stream["time_stamps"],
+            stream["info"]["nominal_srate"][0],
+            [f"{stream['info']['name'][0]}_{ch}" for ch in range(channel_count)],
+            stream_id=stream["info"]["stream_id"],
+        )
+        # The store holds its own copy, the decoded samples can go
+        stream["time_series"] = None
+        if storage is not None:
+            store.convert(storage)
+        if disk_backed:
+            store.spill()
         for ch in range(channel_count):
             # Create a new timeseries object for each stream and channel
-            timeseries.append(
-                Timeseries(
-                    stream["time_series"][:,ch],
-                    stream["info"]["nominal_srate"][0],
-                    f"{stream['info']['name'][0]}_{ch}",
-                    stream["time_stamps"],
-                )
-            )
+            timeseries.append(Timeseries.from_store(store, ch))
             count += 1
+        monitor.update(total_bytes, total_bytes, count, total_channels)
+        monitor.deliver(timeseries[len(timeseries) - channel_count:])
     print(f"Loaded {count} timeseries from {file_name}.")
     return timeseries
+
+
+def load_data_file(
+    file_path, target_sampling_rate, cache=None, monitor=None, stream_ids=None, disk_backed=False, storage=None
+):
+    """
+    Loads a CSV or XDF file into timeseries, going through the recording cache when one is given.
+    :param file_path: Path to the CSV or XDF file.
+    :param target_sampling_rate: Desired sampling rate (in Hz) of the CSV files, XDF streams keep their own rate.
+    :param cache: The RecordingCache to read from and save to, None to always parse the file.
+    :param monitor: The LoadMonitor notified of the progress, which can cancel the load.
+    :param stream_ids: The XDF streams to load, all by default. Selected streams are cached one by one, so that
+        adding a stream later only parses that stream.
+    :param disk_backed: True to keep the parsed data in memory-mapped files rather than in memory. Data read from
+        the cache is always memory-mapped.
+    :param storage: The type to store the channels in (see SignalStore.STORAGE_TYPES), None for float64 CSV
+        channels and the type decoded by pyxdf for XDF streams. Processing always runs in float64.
+    :return: The list of Timeseries objects of the file.
+    """
+    monitor = monitor if monitor is not None else LoadMonitor()
+    is_xdf = file_path.endswith(".xdf")
+    if is_xdf and stream_ids is not None:
+        return load_xdf_streams(file_path, stream_ids, cache, monitor, disk_backed, storage)
+    cache_rate = None if is_xdf else target_sampling_rate
+    if cache is not None:
+        stores = cache.load(file_path, cache_rate, storage)
+        if stores is not None:
+            print(f"Loaded {os.path.basename(file_path)} from cache.")
+            timeseries = [Timeseries.from_store(store, ch) for store in stores for ch in range(store.channel_count)]
+            total_bytes = os.path.getsize(file_path)
+            monitor.update(total_bytes, total_bytes, len(timeseries), len(timeseries))
+            monitor.deliver(timeseries)
+            return timeseries
+
+    with tracing.span("load", file=os.path.basename(file_path)):
+        if is_xdf:
+            timeseries = parse_data_file_xdf(file_path, monitor, disk_backed=disk_backed, storage=storage)
+        else:
+            timeseries = parse_data_file_csv(
+                file_path, target_sampling_rate, [], monitor=monitor, disk_backed=disk_backed, storage=storage
+            )
+
+    if cache is not None and len(timeseries) > 0:
+        try:
+            cache.save(file_path, cache_rate, unique_stores(timeseries), storage)
+        except OSError as e:
+            print(f"Could not cache {os.path.basename(file_path)}: {e}")
+    return timeseries
+
+
+def unique_stores(timeseries: List[Timeseries]):
+    """
+    Returns the signal stores the timeseries are views of, each once, in order.
+    """
+    stores = []
+    for ts in timeseries:
+        if ts.store is not None and not any(ts.store is store for store in stores):
+            stores.append(ts.store)
+    return stores
+
+
+def load_xdf_streams(file_path, stream_ids, cache=None, monitor=None, disk_backed=False, storage=None):
+    """
+    Loads some streams of an XDF file, each stream being read from the cache when it is there.
+    :param file_path: Path to the XDF file.
+    :param stream_ids: The identifiers of the streams to load.
+    :param cache: The RecordingCache to read from and save to, None to always parse the file.
+    :param monitor: The LoadMonitor notified of the progress, which can cancel the load.
+    :param disk_backed: True to keep the parsed streams in memory-mapped files rather than in memory.
+    :param storage: The type to store the streams in, see load_data_file.
+    :return: The list of Timeseries objects of the streams.
+    """
+    monitor = monitor if monitor is not None else LoadMonitor()
+    timeseries: List[Timeseries] = []
+    missing = []
+    for stream_id in stream_ids:
+        stores = cache.load(file_path, f"stream {stream_id}", storage) if cache is not None else None
+        if stores is None:
+            missing.append(stream_id)
+            continue
+        for store in stores:
+            store.stream_id = stream_id
+            channels = [Timeseries.from_store(store, ch) for ch in range(store.channel_count)]
+            timeseries.extend(channels)
+            monitor.deliver(channels)
+    if timeseries:
+        print(f"Loaded {len(timeseries)} timeseries of {os.path.basename(file_path)} from cache.")
+
+    with tracing.span("load", file=os.path.basename(file_path), streams=len(missing)):
+        parsed = parse_data_file_xdf(file_path, monitor, missing, disk_backed, storage)
+    if cache is not None:
+        for store in unique_stores(parsed):
+            try:
+                cache.save(file_path, f"stream {store.stream_id}", [store], storage)
+            except OSError as e:
+                print(f"Could not cache a stream of {os.path.basename(file_path)}: {e}")
+    return timeseries + parsed
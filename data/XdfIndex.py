@@ -0,0 +1,117 @@
+""" This file contains the functions listing the streams of an XDF file without loading their samples.
+    Description: An XDF file is a sequence of chunks, each starting with its length and a tag. The stream headers
+    (tag 2) hold the XML description of each stream; the sample chunks (tag 3) are skipped with a seek, only their
+    sizes are added up to estimate the memory each stream would take once loaded. Opening a file this way reads a
+    few kilobytes, whatever its size, and the streams the user picks are then loaded with pyxdf.
+"""
+import gzip
+import struct
+import xml.etree.ElementTree as ElementTree
+
+XDF_STREAM_HEADER = 2
+XDF_SAMPLES = 3
+
+
+class XdfStreamInfo:
+    """
+    Class representing the description of a stream of an XDF file.
+    """
+
+    def __init__(self, stream_id, name, stream_type, channel_count, nominal_srate, channel_format, channel_labels):
+        """
+        Constructor for the XdfStreamInfo class.
+        :param stream_id: The identifier of the stream in the file, used to select it with pyxdf.
+        :param name: The name of the stream.
+        :param stream_type: The content type of the stream (EEG, EMG, Markers, ...).
+        :param channel_count: The number of channels of the stream.
+        :param nominal_srate: The nominal sampling rate (in Hz), 0 for irregular streams such as markers.
+        :param channel_format: The type of the samples (float32, double64, string, ...).
+        :param channel_labels: The labels of the channels declared in the header, if any.
+        """
+        self.stream_id = stream_id
+        self.name = name
+        self.stream_type = stream_type
+        self.channel_count = channel_count
+        self.nominal_srate = nominal_srate
+        self.channel_format = channel_format
+        self.channel_labels = channel_labels
+        # Size of the sample chunks of the stream in the file (in bytes)
+        self.sample_bytes = 0
+
+    def is_numeric(self):
+        return self.channel_format != "string"
+
+    def __repr__(self):
+        return (
+            f"XdfStreamInfo({self.stream_id}, {self.name!r}, {self.stream_type!r}, {self.channel_count} channels, "
+            f"{self.nominal_srate} Hz, {self.channel_format})"
+        )
+
+
+def read_varlen_int(xdf_file):
+    """
+    Reads the variable-length integer starting a chunk: one byte giving its size (1, 4 or 8) then the integer.
+    :raise EOFError: At the end of the file.
+    """
+    size = xdf_file.read(1)
+    if not size:
+        raise EOFError()
+    size = size[0]
+    if size == 1:
+        return xdf_file.read(1)[0]
+    if size == 4:
+        return struct.unpack("<I", xdf_file.read(4))[0]
+    if size == 8:
+        return struct.unpack("<Q", xdf_file.read(8))[0]
+    raise ValueError(f"Invalid variable-length integer size {size}")
+
+
+def parse_stream_header(stream_id, xml_text):
+    info = ElementTree.fromstring(xml_text)
+
+    def text(tag, default=""):
+        element = info.find(tag)
+        return element.text if element is not None and element.text is not None else default
+
+    labels = [label.text or "" for label in info.findall("desc/channels/channel/label")]
+    return XdfStreamInfo(
+        stream_id,
+        text("name"),
+        text("type"),
+        int(text("channel_count", "0")),
+        float(text("nominal_srate", "0")),
+        text("channel_format"),
+        labels,
+    )
+
+
+def read_xdf_streams(file_path):
+    """
+    Lists the streams of an XDF file from its headers, the samples are skipped.
+    :param file_path: Path to the XDF file (.xdf or gzip-compressed .xdfz).
+    :return: The list of XdfStreamInfo, in the order of the file.
+    """
+    opener = gzip.open if file_path.endswith(".xdfz") else open
+    streams = {}
+    with opener(file_path, "rb") as xdf_file:
+        if xdf_file.read(4) != b"XDF:":
+            raise ValueError(f"{file_path} is not an XDF file")
+        while True:
+            try:
+                length = read_varlen_int(xdf_file)
+            except EOFError:
+                break
+            tag = struct.unpack("<H", xdf_file.read(2))[0]
+            content = length - 2
+            if tag == XDF_STREAM_HEADER:
+                stream_id = struct.unpack("<I", xdf_file.read(4))[0]
+                xml_text = xdf_file.read(content - 4).decode("utf-8", "replace")
+                streams[stream_id] = parse_stream_header(stream_id, xml_text)
+            elif tag == XDF_SAMPLES:
+                stream_id = struct.unpack("<I", xdf_file.read(4))[0]
+                if stream_id in streams:
+                    streams[stream_id].sample_bytes += content - 4
+                xdf_file.seek(content - 4, 1)
+            else:
+                xdf_file.seek(content, 1)
+    return list(streams.values())
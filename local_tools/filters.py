@@ -1,6 +1,160 @@
 from scipy import signal
 import math
 import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+FILTER_DESIGN_CACHE_SIZE = 128  # Number of filter designs kept by design_cascade
+FILTER_PARALLEL_CHANNELS = 16  # Number of channels from which filter_channels splits the work across threads
+RANGE_CHUNK_SAMPLES = 1 << 20  # Number of samples read at a time by value_range
+
+
+class FilterCascade:
+    """
+    A chain of filters in second-order sections form, designed once and applied in a single pass.
+    """
+
+    def __init__(self, sos):
+        """
+        Constructor for the FilterCascade class.
+        :param sos: The second-order sections of every filter of the chain, shape (sections, 6).
+        """
+        self.sos = np.array(sos, dtype=float)
+
+    def filtfilt(self, data, axis=-1):
+        """
+        Applies the whole chain forward and backward (zero phase) in one pass along axis.
+        The signal is extended at both ends by odd reflection over the settling length of the chain (see
+        settling_samples), or as much as a shorter signal allows, so the edge transients of every section have
+        decayed before the first and last samples.
+        :param data: The signal, or a 2-D array of signals.
+        :param axis: The time axis of data.
+        :return: The filtered data.
+        """
+        padlen = min(self.settling_samples(), np.shape(data)[axis] - 1)
+        return signal.sosfiltfilt(self.sos, data, axis=axis, padtype="odd", padlen=padlen)
+
+    def filter(self, data, axis=-1):
+        """
+        Applies the whole chain once, forward only (causal), along axis.
+        :param data: The signal, or a 2-D array of signals.
+        :param axis: The time axis of data.
+        :return: The filtered data.
+        """
+        return signal.sosfilt(self.sos, data, axis=axis)
+
+    def settling_samples(self, tolerance=1e-6):
+        """
+        Returns the number of samples after which the impulse response of the chain decays below tolerance.
+        Filtering a window padded by this many samples on each side gives the same result as filtering the
+        whole signal, within tolerance, on the window.
+        :param tolerance: The relative amplitude of the impulse response considered settled.
+        :return: The number of samples.
+        """
+        _, poles, _ = signal.sos2zpk(self.sos)
+        radius = np.max(np.abs(poles)) if len(poles) > 0 else 0
+        if radius <= 0:
+            return 0
+        if radius >= 1:
+            raise ValueError("The filter cascade is unstable")
+        return int(np.ceil(np.log(tolerance) / np.log(radius)))
+
+
+class StreamingFilter:
+    """
+    Applies a cascade causally to a signal arriving in blocks, in constant memory.
+    The state of every section of every channel is kept between blocks, so filtering a signal block by block
+    gives the same output as one causal pass (FilterCascade.filter) over the whole signal.
+    """
+
+    def __init__(self, cascade):
+        """
+        Constructor for the StreamingFilter class.
+        :param cascade: The FilterCascade to apply.
+        """
+        self.cascade = cascade
+        self.state = None
+
+    def reset(self):
+        """
+        Forgets the state, the next block starts a new signal.
+        """
+        self.state = None
+
+    def process(self, block):
+        """
+        Filters the next block of the signal.
+        :param block: The next samples, shape (samples,) for one channel or (channels, samples).
+        :return: The filtered block, same shape as block.
+        """
+        block = np.asarray(block)
+        if self.state is None:
+            # Zero initial conditions, like a single causal pass
+            self.state = np.zeros((len(self.cascade.sos),) + block.shape[:-1] + (2,))
+        elif self.state.shape[1:-1] != block.shape[:-1]:
+            raise ValueError(f"Expected blocks of {self.state.shape[1:-1]} channels, got {block.shape[:-1]}")
+        filtered, self.state = signal.sosfilt(self.cascade.sos, block, axis=-1, zi=self.state)
+        return filtered
+
+
+def filter_channels(cascade, data, workers=None, causal=False):
+    """
+    Applies a cascade forward and backward on every channel of a 2-D array along its time axis.
+    Large channel sets are split into blocks of rows filtered on worker threads (the SOS filter releases the GIL).
+    :param cascade: The FilterCascade to apply.
+    :param data: The signals, shape (channels, samples).
+    :param workers: The number of threads to use, the number of CPUs by default.
+    :param causal: True to apply the cascade forward only (FilterCascade.filter).
+    :return: The filtered signals, shape (channels, samples).
+    """
+    data = np.atleast_2d(data)
+    apply = cascade.filter if causal else cascade.filtfilt
+    workers = workers if workers is not None else os.cpu_count() or 1
+    workers = min(workers, data.shape[0] // FILTER_PARALLEL_CHANNELS)
+    if workers <= 1:
+        return apply(data, axis=-1)
+
+    filtered = np.empty(data.shape, dtype=np.result_type(data.dtype, np.float64))
+
+    def filter_rows(rows):
+        filtered[rows] = apply(data[rows], axis=-1)
+
+    bounds = np.linspace(0, data.shape[0], workers + 1).astype(int)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(filter_rows, [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]))
+    return filtered
+
+
+def design_stage(stage, fs):
+    """
+    Designs one filter of a cascade in second-order sections form.
+    :param stage: ("notch", frequency, quality_factor) or ("butter", order, cutoff, btype),
+        cutoff being a (low, high) tuple for the band filters.
+    :param fs: The sampling rate (in Hz).
+    :return: The second-order sections of the filter.
+    """
+    kind = stage[0]
+    if kind == "notch":
+        _, frequency, quality_factor = stage
+        b, a = signal.iirnotch(frequency, quality_factor, fs)
+        return signal.tf2sos(b, a)
+    if kind == "butter":
+        _, order, cutoff, btype = stage
+        return signal.butter(order, cutoff, btype=btype, fs=fs, output="sos")
+    raise ValueError(f"Unknown filter stage: {kind}")
+
+
+@lru_cache(maxsize=FILTER_DESIGN_CACHE_SIZE)
+def design_cascade(stages, fs):
+    """
+    Designs a chain of filters, the designs are cached on (stages, fs) with least recently used eviction.
+    :param stages: A tuple of stages as described in design_stage, applied in order.
+    :param fs: The sampling rate (in Hz).
+    :return: The FilterCascade of the chain.
+    """
+    return FilterCascade(np.concatenate([design_stage(stage, fs) for stage in stages]))
+
 
 def butter_bandpass(lowcut, highcut, fs, order=5):
     b, a = signal.iirfilter(order, Wn=[lowcut, highcut], fs=fs, btype="bandpass", ftype="butter")
@@ -19,76 +173,86 @@ def butter_lowpass(fcut, fs, order=5):
     return b, a
 
 def butter_bandpass_filter(data, lowcut, highcut, fs, order=5):
-    b, a = butter_bandpass(lowcut, highcut, fs, order=order)
-    y = signal.filtfilt(b, a, data)
+    cascade = design_cascade((("butter", order, (lowcut, highcut), "bandpass"),), fs)
+    y = cascade.filtfilt(data)
     return y
 
 def butter_stoppass_filter(data, lowcut, highcut, fs, order=5):
-    b, a = butter_stoppass(lowcut, highcut, fs, order=order)
-    y = signal.filtfilt(b, a, data)
+    cascade = design_cascade((("butter", order, (lowcut, highcut), "bandstop"),), fs)
+    y = cascade.filtfilt(data)
     return y
 
 def butter_highpass_filter(data, fcut, fs, order=5):
-    b, a = butter_highpass(fcut, fs, order=order)
-    y = signal.filtfilt(b, a, data)
+    cascade = design_cascade((("butter", order, fcut, "high"),), fs)
+    y = cascade.filtfilt(data)
     return y
 
 def butter_lowpass_filter(data, fcut, fs, order=5):
-    b, a = butter_lowpass(fcut, fs, order=order)
-    y = signal.filtfilt(b, a, data)
+    cascade = design_cascade((("butter", order, fcut, "lowpass"),), fs)
+    y = cascade.filtfilt(data)
     return y
 
 
-def normalize_range(signal):
-    norm_signal = (signal - np.min(signal)) / (np.max(signal) - np.min(signal))
+def value_range(values, chunk_samples=RANGE_CHUNK_SAMPLES):
+    """
+    Returns the (min, max) of values, read in chunks so that memory-mapped signals are never loaded whole.
+    """
+    minimum = maximum = None
+    for start in range(0, len(values), chunk_samples):
+        chunk = np.asarray(values[start : start + chunk_samples])
+        low, high = np.min(chunk), np.max(chunk)
+        minimum = low if minimum is None else min(minimum, low)
+        maximum = high if maximum is None else max(maximum, high)
+    if minimum is None:
+        raise ValueError("The range of an empty signal is undefined")
+    return minimum, maximum
+
+
+def normalize_range(signal, statistics=None):
+    """
+    Scales signal to [-1, 1]. A flat signal, which has no range, is mapped to 0 rather than to NaN.
+    :param signal: The samples, a row per channel for several channels.
+    :param statistics: The (min, max) to scale from, those of signal by default. They can come from elsewhere
+        (e.g. the whole signal) when signal is a window, and be columns of per-channel extrema.
+    """
+    minimum, maximum = statistics if statistics is not None else value_range(signal)
+    span = np.subtract(maximum, minimum)
+    flat = span == 0
+    norm_signal = (signal - minimum) / np.where(flat, 1, span)
+    if np.any(flat):
+        return np.where(flat, 0.0, 2 * norm_signal - 1)
     return 2 * norm_signal - 1
 
-def apply_geordi_filtering(y, fs): 
-    f60Hz = 60 # Frequency to be removed from signal (Hz)
-    Q = 10  # Quality factor
-    
-    # Sample frequency (Hz) and cutoff frequency (Hz)
-    
-    fc = 2  # Cutoff frequency for the high-pass filter
-    
-    # Design a high-pass Butterworth filter
-    order = 4  # Filter order (you can adjust this as needed)
-    
-    b, a = signal.iirnotch(f60Hz, Q, fs)
-    Q2 = 30  # Quality factor
-    b2, a2 = signal.iirnotch( f60Hz*2, Q2, fs)
-    Q3 = 30  # Quality factor
-    b3, a3 = signal.iirnotch( f60Hz*3, Q3, fs)
-    f17Hz = 17 # Frequency to be removed from signal (Hz)
-    Q3 = 30  # Quality factor
-    b4, a4 = signal.iirnotch(f17Hz, Q3, fs)
-    Q3 = 30  # Quality factor
-    b5, a5 = signal.iirnotch(f17Hz*2, Q3, fs)
-    Q3 = 30  # Quality factor
-    b6, a6 = signal.iirnotch(f17Hz*3, Q3, fs)
-    Q3 = 30  # Quality factor
-    b7, a7 = signal.iirnotch(f17Hz*4, Q3, fs)
-    Q3 = 30  # Quality factor
-    b8, a8 = signal.iirnotch(f17Hz*5, Q3, fs)
-    Q3 = 30  # Quality factor
-    b9, a9 = signal.iirnotch(f17Hz*6, Q3, fs)
-    fc = 50  # Cutoff frequency for the low-pass filter (Hz)
-    low_pass_order = 4  # The order of the low-pass filter (you can adjust this)
-    b_low, a_low = signal.butter(low_pass_order, fc / (fs / 2), 'low')
-    
-    high_pass_order = 4
-    # Designing the high pass filter
-    b_high, a_high = signal.butter(high_pass_order, 4 / (fs / 2), 'high')
-    
-    y = signal.filtfilt(b, a, y)
-    y = signal.filtfilt(b2, a2, y)
-    y = signal.filtfilt(b3, a3, y)
-    y = signal.filtfilt(b4, a4, y)
-    y = signal.filtfilt(b5, a5, y)
-    y = signal.filtfilt(b6, a6, y)
-    y = signal.filtfilt(b7, a7, y)
-    y = signal.filtfilt(b8, a8, y)
-    y = signal.filtfilt(b9, a9, y)
-    y = signal.filtfilt(b_low, a_low, y)
-    y = signal.filtfilt(b_high, a_high, y)
-    return y
\ No newline at end of file
+# Notches of the power line (60 Hz) and of the 17 Hz interference harmonics, then a 4-50 Hz band
+GEORDI_STAGES = (
+    ("notch", 60, 10),
+    ("notch", 60 * 2, 30),
+    ("notch", 60 * 3, 30),
+    ("notch", 17, 30),
+    ("notch", 17 * 2, 30),
+    ("notch", 17 * 3, 30),
+    ("notch", 17 * 4, 30),
+    ("notch", 17 * 5, 30),
+    ("notch", 17 * 6, 30),
+    ("butter", 4, 50, "lowpass"),
+    ("butter", 4, 4, "highpass"),
+)
+
+
+def geordi_cascade(fs):
+    """
+    Returns the cascade of apply_geordi_filtering for the sampling rate fs (designed once per fs).
+    """
+    return design_cascade(GEORDI_STAGES, float(fs))
+
+
+def geordi_streaming_filter(fs):
+    """
+    Returns a StreamingFilter applying the cascade of apply_geordi_filtering causally, block by block.
+    """
+    return StreamingFilter(geordi_cascade(fs))
+
+
+def apply_geordi_filtering(y, fs):
+    # The eleven filters run forward-backward as one cascade, in a single pass
+    return geordi_cascade(fs).filtfilt(y)
@@ -0,0 +1,319 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.fft
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window
+
+from local_tools import tracing
+
+SPECTROGRAM_CACHE_BYTES = 256 * 1024**2  # Memory budget of the spectrogram tiles kept in memory
+SPECTROGRAM_FRAMES_PER_TILE = 128  # Number of STFT columns computed and cached together
+SPECTROGRAM_CHUNK_SAMPLES = 1 << 22  # Maximum number of samples transformed at once inside a tile
+WELCH_SEGMENT = 1024  # Default number of samples of a Welch segment
+WELCH_CHUNK_BYTES = 64 * 1024**2  # Bound on the windowed segments transformed at once by welch_psd
+
+
+def stft_power(values, nperseg, hop, window=None):
+    """
+    Returns the power spectral density of the frames of values, one row per frame.
+    Frames start every hop samples. When hop is at least nperseg, each frame averages the periodograms of the
+    hop // nperseg consecutive segments at its start (Welch), so that coarse frames still cover every sample when hop
+    is a multiple of nperseg.
+    :param values: The 1-D signal.
+    :param nperseg: The number of samples of a segment (FFT length).
+    :param hop: The number of samples between the starts of two frames.
+    :param window: The window applied to each segment, a Hann window by default.
+    :return: An array of shape (frames, nperseg // 2 + 1).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if window is None:
+        window = np.hanning(nperseg)
+    scale = 1.0 / np.sum(window**2)
+    if hop < nperseg:
+        if len(values) < nperseg:
+            return np.empty((0, nperseg // 2 + 1))
+        frames = sliding_window_view(values, nperseg)[::hop]
+        return np.abs(np.fft.rfft(frames * window, axis=-1)) ** 2 * scale
+
+    segments = hop // nperseg
+    count = len(values) // hop
+    # The samples of a frame past its last whole segment are left out
+    frames = values[: count * hop].reshape(count, hop)[:, : segments * nperseg].reshape(count, segments, nperseg)
+    return np.mean(np.abs(np.fft.rfft(frames * window, axis=-1)) ** 2, axis=1) * scale
+
+
+def _welch_power(data, nperseg, hop, nfft, window, workers):
+    """
+    Returns the sum over the segments of the periodograms of each row of data, unscaled, shape (channels, bins).
+    The segments are detrended and windowed into a buffer reused from one chunk of segments to the next.
+    """
+    # (channels, segments, nperseg) view, no copy
+    segments = sliding_window_view(data, nperseg, axis=-1)[:, ::hop]
+    step = max(WELCH_CHUNK_BYTES // (data.shape[0] * nfft * 16), 1)
+    buffer = np.empty((data.shape[0], min(step, segments.shape[1]), nperseg))
+    power = np.zeros((data.shape[0], nfft // 2 + 1))
+    for first in range(0, segments.shape[1], step):
+        frames = segments[:, first : first + step]
+        block = buffer[:, : frames.shape[1]]
+        np.subtract(frames, frames.mean(axis=-1, keepdims=True), out=block)
+        np.multiply(block, window, out=block)
+        spectrum = scipy.fft.rfft(block, n=nfft, axis=-1, workers=workers)
+        # |X|^2 summed over the segments in one pass, on the interleaved real and imaginary parts
+        parts = spectrum.view(np.float64)
+        squares = np.einsum("csk,csk->ck", parts, parts)
+        power += squares[:, 0::2] + squares[:, 1::2]
+    return power
+
+
+def welch_psd(data, sampling_rate, nperseg=WELCH_SEGMENT, noverlap=None, window=None, workers=None):
+    """
+    Returns the power spectral density of every row of data (Welch: the periodograms of overlapping windowed
+    segments, detrended by their mean, are averaged), like scipy.signal.welch with its defaults, for all the
+    channels at once. The segments are transformed as 2-D blocks by real-input FFTs, zero padded to an efficient
+    length. The channels are split between worker threads (the FFTs of a single channel are threaded instead), and
+    each thread processes its block in chunks of segments to bound its memory.
+    :param data: The signals, shape (channels, samples) or (samples,).
+    :param sampling_rate: The sampling rate of the signals.
+    :param nperseg: The number of samples of a segment, at most the number of samples of data.
+    :param noverlap: The number of samples shared by two consecutive segments, nperseg // 2 by default.
+    :param window: The window applied to each segment, a periodic Hann window by default.
+    :param workers: The number of worker threads, the number of CPUs by default.
+    :return: A tuple (frequencies, psd) where psd has shape (channels, frequencies).
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=np.float64))
+    channels, samples = data.shape
+    nperseg = max(min(int(nperseg), samples), 1)
+    noverlap = nperseg // 2 if noverlap is None else min(int(noverlap), nperseg - 1)
+    nfft = scipy.fft.next_fast_len(nperseg, real=True)
+    frequencies = np.fft.rfftfreq(nfft, 1 / float(sampling_rate))
+    if samples == 0 or channels == 0:
+        return frequencies, np.full((channels, len(frequencies)), np.nan)
+    if window is None:
+        window = get_window("hann", nperseg)
+    workers = workers or os.cpu_count() or 1
+    hop = nperseg - noverlap
+
+    groups = np.array_split(np.arange(channels), min(workers, channels))
+    fft_workers = max(workers // len(groups), 1)
+    if len(groups) == 1:
+        power = _welch_power(data, nperseg, hop, nfft, window, fft_workers)
+    else:
+        with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            parts = executor.map(
+                lambda rows: _welch_power(data[rows[0] : rows[-1] + 1], nperseg, hop, nfft, window, fft_workers),
+                groups,
+            )
+            power = np.concatenate(list(parts))
+    count = (samples - nperseg) // hop + 1
+    power *= 1.0 / (float(sampling_rate) * np.sum(window**2) * count)
+    # One-sided: the bins other than DC (and Nyquist for an even length) also hold their negative frequency
+    power[:, 1 : None if nfft % 2 else -1] *= 2
+    return frequencies, power
+
+
+class TileCache:
+    """
+    Thread-safe least recently used cache of arrays (spectrogram tiles), bounded by a memory budget.
+    """
+
+    def __init__(self, budget_bytes=SPECTROGRAM_CACHE_BYTES):
+        """
+        Constructor for the TileCache class.
+        :param budget_bytes: The maximum number of bytes of the cached tiles.
+        """
+        self.budget_bytes = budget_bytes
+        self.cached_bytes = 0
+        self.tiles = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the tile of key, or None if it is not cached.
+        """
+        with self.lock:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.tiles.move_to_end(key)
+            return tile
+
+    def put(self, key, tile):
+        """
+        Caches a tile, evicting the least recently used ones over the budget.
+        """
+        if tile.nbytes > self.budget_bytes:
+            return
+        with self.lock:
+            previous = self.tiles.pop(key, None)
+            if previous is not None:
+                self.cached_bytes -= previous.nbytes
+            self.tiles[key] = tile
+            self.cached_bytes += tile.nbytes
+            while self.cached_bytes > self.budget_bytes:
+                _, evicted = self.tiles.popitem(last=False)
+                self.cached_bytes -= evicted.nbytes
+
+
+class SpectrogramTiler:
+    """
+    Computes the spectrogram of a timeseries as fixed-size tiles of STFT columns, cached per resolution.
+    The resolution (hop) follows the zoom level so that a view never needs more columns than it has pixels,
+    and panning or zooming back reuses the tiles already computed. Missing tiles are computed on worker threads.
+    """
+
+    def __init__(
+        self,
+        timeseries,
+        nperseg=256,
+        cache=None,
+        workers=None,
+        frames_per_tile=SPECTROGRAM_FRAMES_PER_TILE,
+        sampling_rate=None,
+    ):
+        """
+        Constructor for the SpectrogramTiler class.
+        :param timeseries: The Timeseries to analyse, processed by its pipeline.
+        :param nperseg: The number of samples of an FFT segment, sets the frequency resolution.
+        :param cache: The TileCache holding the tiles, a private one by default.
+        :param workers: The number of worker threads, the number of CPUs by default.
+        :param frames_per_tile: The number of STFT columns of a tile.
+        :param sampling_rate: The rate of the samples (see data.Alignment.effective_rate), the nominal rate of the
+            timeseries by default.
+        """
+        self.timeseries = timeseries
+        self.sampling_rate = float(sampling_rate if sampling_rate is not None else timeseries.sampling_rate)
+        self.nperseg = nperseg
+        self.cache = cache if cache is not None else TileCache()
+        self.frames_per_tile = frames_per_tile
+        self.window = np.hanning(nperseg)
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        # tile key -> Future of the tiles being computed
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def frequencies(self):
+        return np.fft.rfftfreq(self.nperseg, 1 / self.sampling_rate)
+
+    def hop_for(self, span, width):
+        """
+        Returns the coarsest useful hop to show span samples on width pixels: nperseg / 2 times a power of two,
+        the smallest one giving at most one column per pixel.
+        """
+        hop = max(self.nperseg // 2, 1)
+        while span / hop > max(int(width), 1):
+            hop *= 2
+        return hop
+
+    def frame_length(self, hop):
+        """
+        Returns the number of samples covered by a column at this hop.
+        """
+        return max(hop, self.nperseg)
+
+    def column_count(self, hop):
+        """
+        Returns the number of columns of the whole timeseries at this hop.
+        """
+        n = len(self.timeseries)
+        length = self.frame_length(hop)
+        return 0 if n < length else (n - length) // hop + 1
+
+    def column_range(self, start, stop, hop):
+        """
+        Returns the half-open range of columns overlapping the samples [start, stop).
+        """
+        first = max((int(start) - self.frame_length(hop)) // hop + 1, 0)
+        last = min(-(-int(stop) // hop), self.column_count(hop))
+        return first, max(last, first)
+
+    def tile_key(self, hop, index):
+        # The data token and the chain of stages identify the processed data the tile was computed from, the
+        # token is never reused by another timeseries of the shared cache
+        return (
+            self.timeseries.data_token,
+            self.timeseries.pipeline.chain_key(),
+            self.nperseg,
+            hop,
+            index,
+        )
+
+    def cached_tile(self, hop, index):
+        return self.cache.get(self.tile_key(hop, index))
+
+    @tracing.traced("stft")
+    def compute_tile(self, hop, index):
+        """
+        Computes the columns of a tile, shape (columns, nperseg // 2 + 1).
+        Long tiles are transformed in chunks to bound the memory of the intermediate arrays.
+        """
+        first = index * self.frames_per_tile
+        last = min(first + self.frames_per_tile, self.column_count(hop))
+        step = max(SPECTROGRAM_CHUNK_SAMPLES // self.frame_length(hop), 1)
+        parts = []
+        for chunk_first in range(first, last, step):
+            chunk_last = min(chunk_first + step, last)
+            start = chunk_first * hop
+            stop = (chunk_last - 1) * hop + self.frame_length(hop)
+            values = self.timeseries.window(start, stop)
+            parts.append(stft_power(values, self.nperseg, hop, self.window)[: chunk_last - chunk_first])
+        if not parts:
+            return np.empty((0, self.nperseg // 2 + 1))
+        return np.concatenate(parts)
+
+    def request(self, hop, indices, callback):
+        """
+        Computes the missing tiles of indices in the background, callback(hop, index) is called from a worker
+        thread when one is ready. Pending tiles that are no longer requested are cancelled if not started yet.
+        :param hop: The hop of the tiles.
+        :param indices: The indices of the tiles of the current view.
+        :param callback: The function notified of each new tile.
+        """
+        keys = {self.tile_key(hop, index): index for index in indices}
+        with self.lock:
+            for key in list(self.pending):
+                if key not in keys and self.pending[key].cancel():
+                    del self.pending[key]
+            for key, index in keys.items():
+                if key in self.pending or self.cache.get(key) is not None:
+                    continue
+                self.pending[key] = self.executor.submit(self.run_tile, key, hop, index, callback)
+
+    def run_tile(self, key, hop, index, callback):
+        try:
+            self.cache.put(key, self.compute_tile(hop, index))
+        except Exception as e:
+            print(f"Error computing spectrogram tile {index}: {e}")
+            return
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+        callback(hop, index)
+
+    def view(self, start, stop, width):
+        """
+        Assembles the cached columns of the samples [start, stop) for a view width pixels wide.
+        :return: A tuple (hop, first_column, power, missing) where power has shape (columns, frequencies), the
+            columns of missing tiles are NaN, and missing lists the indices of those tiles.
+        """
+        hop = self.hop_for(stop - start, width)
+        first, last = self.column_range(start, stop, hop)
+        power = np.full((last - first, self.nperseg // 2 + 1), np.nan)
+        missing = []
+        if last <= first:
+            return hop, first, power, missing
+        for index in range(first // self.frames_per_tile, (last - 1) // self.frames_per_tile + 1):
+            tile = self.cached_tile(hop, index)
+            if tile is None:
+                missing.append(index)
+                continue
+            tile_first = index * self.frames_per_tile
+            lo = max(first, tile_first)
+            hi = min(last, tile_first + len(tile))
+            power[lo - first : hi - first] = tile[lo - tile_first : hi - tile_first]
+        return hop, first, power, missing
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
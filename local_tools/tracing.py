@@ -0,0 +1,154 @@
+import json
+import numbers
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+TRACE_CAPACITY = 100_000  # Number of spans kept in memory, the oldest ones are dropped first
+
+# Tracing is off by default: span() then returns a shared no-op object and costs one global lookup
+enabled = False
+events = deque(maxlen=TRACE_CAPACITY)
+# Time origin of the trace, in the clock of time.perf_counter_ns
+origin_ns = time.perf_counter_ns()
+
+
+class NullSpan:
+    """
+    Span returned while tracing is disabled, does nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """
+    A named, timed section of code, recorded when it exits.
+    """
+
+    __slots__ = ("name", "args", "start_ns")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end_ns = time.perf_counter_ns()
+        events.append((self.name, self.start_ns, end_ns - self.start_ns, threading.get_ident(), self.args))
+        return False
+
+    def set(self, **args):
+        """
+        Adds arguments known only inside the span, e.g. the number of samples processed.
+        """
+        self.args.update(args)
+
+
+def span(name, **args):
+    """
+    Returns a context manager timing the code it wraps under name, e.g.
+        with span("fft", samples=N):
+            ...
+    :param name: The name of the span: load, resample, filter, fft, draw, ...
+    :param args: Values describing this occurrence, exported with the span.
+    """
+    if not enabled:
+        return NULL_SPAN
+    return Span(name, args)
+
+
+def traced(name):
+    """
+    Decorator timing every call of a function as a span.
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            with Span(name, {}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable(flag=True):
+    global enabled
+    enabled = flag
+
+
+def clear():
+    events.clear()
+
+
+def recent_summary(seconds=5.0):
+    """
+    Returns the statistics of the spans that ended in the last seconds, per name.
+    :return: A list of (name, count, mean_ms, max_ms, last_ms) sorted by total time, largest first.
+    """
+    threshold = time.perf_counter_ns() - int(seconds * 1e9)
+    durations = {}
+    for name, start_ns, duration_ns, _, _ in list(events):
+        if start_ns + duration_ns >= threshold:
+            durations.setdefault(name, []).append(duration_ns / 1e6)
+    summary = [
+        (name, len(values), sum(values) / len(values), max(values), values[-1]) for name, values in durations.items()
+    ]
+    return sorted(summary, key=lambda item: item[1] * item[2], reverse=True)
+
+
+def json_value(value):
+    """
+    Converts a span argument (possibly a numpy scalar) into a JSON value.
+    """
+    if isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    return str(value)
+
+
+def export_chrome_trace(path):
+    """
+    Writes the recorded spans in the Chrome trace event format, to open in chrome://tracing or Perfetto.
+    :param path: The path of the JSON file.
+    :return: The number of spans written.
+    """
+    pid = os.getpid()
+    trace_events = [
+        {
+            "name": name,
+            "ph": "X",
+            "ts": (start_ns - origin_ns) / 1000,
+            "dur": duration_ns / 1000,
+            "pid": pid,
+            "tid": tid,
+            "args": {key: json_value(value) for key, value in args.items()},
+        }
+        for name, start_ns, duration_ns, tid, args in list(events)
+    ]
+    with open(path, "w") as trace_file:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, trace_file)
+    return len(trace_events)
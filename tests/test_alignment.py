@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from data.Alignment import Aligner, resample_rows
+from data.Pipeline import OffsetStage
+from data.Timeseries import Timeseries
+
+
+def make_timeseries(samples=20_000, rate=250.0, jitter=0.0, start=0.37):
+    rng = np.random.default_rng(0)
+    timestamps = start + (np.arange(samples) + rng.uniform(-jitter, jitter, samples)) / rate
+    t = np.arange(samples) / rate
+    return Timeseries(np.sin(2 * np.pi * 3 * t) + 0.1 * rng.normal(size=samples), rate, "s", timestamps)
+
+
+@pytest.mark.parametrize("jitter", [0.0, 0.2])
+@pytest.mark.parametrize("rate", [100.0, 250.0, 1000.0, 333.0])
+def test_views_match_resampling_the_whole_signal(rate, jitter, monkeypatch):
+    monkeypatch.setattr("data.Alignment.ALIGNMENT_CHUNK_SAMPLES", 1000)
+    timeseries = make_timeseries(jitter=jitter)
+    view = Aligner().aligned(timeseries, rate)
+    first, expected = resample_rows(timeseries.values, timeseries.timestamps, 250.0, rate)
+    assert view.first_index == first and view.rate == rate
+    assert np.allclose(view.values, expected[0], atol=1e-9)
+    assert np.allclose(view.times(), np.arange(first, first + len(view.values)) / rate)
+    assert np.array_equal(view.between(10.0, 20.0), view.values[int(np.ceil(10 * rate)) - first : int(20 * rate) + 1 - first])
+
+
+def test_views_are_cached_per_signal_and_rate():
+    aligner = Aligner()
+    timeseries = make_timeseries()
+    view = aligner.aligned(timeseries, 100.0)
+    assert aligner.aligned(timeseries, 100.0) is view
+    assert aligner.aligned(timeseries, 200.0) is not view
+    # Another timeseries of the same array, the processed values and new samples each get their own view
+    assert aligner.aligned(Timeseries(timeseries.raw_values, 250.0, "t", timeseries.timestamps), 100.0) is not view
+    timeseries.pipeline.append(OffsetStage(1))
+    offset = aligner.aligned(timeseries, 100.0)
+    assert np.allclose(offset.values[20:-20], view.values[20:-20] + 1, atol=1e-3)
+    timeseries.write(0, [5.0])
+    assert aligner.aligned(timeseries, 100.0) is not offset
+
+
+@pytest.mark.parametrize("disk_backed", [False, True])
+@pytest.mark.parametrize("storage", [None, "int16"])
+def test_csv_channels_are_delivered_at_the_rate_of_the_viewer(tmp_path, disk_backed, storage):
+    pytest.importorskip("PyQt6")
+    from LoadWorker import LoadWorker
+
+    rng = np.random.default_rng(1)
+    time = np.arange(3000) / 1000 + rng.uniform(-2e-4, 2e-4, 3000)
+    time[0] = 0
+    values = np.column_stack((np.sin(2 * np.pi * 5 * time), np.cos(2 * np.pi * 5 * time)))
+    path = tmp_path / "recording.csv"
+    np.savetxt(path, np.column_stack((time, values)), delimiter=",", header="time,a,b", comments="", fmt="%.9f")
+
+    worker = LoadWorker(str(path), 250.0, disk_backed=disk_backed, storage=storage)
+    delivered = []
+    worker.signals.timeseries_loaded.connect(delivered.extend)
+    worker.run()
+    assert [ts.name for ts in delivered] == ["a", "b"]
+    a, b = delivered
+    assert a.sampling_rate == 250.0 and a.timestamps is b.timestamps
+    assert a.disk_backed == disk_backed and a.compact == (storage is not None)
+    assert np.allclose(np.diff(a.timestamps), 1 / 250)
+    inner = slice(10, -10)
+    assert np.allclose(a.values[inner], np.sin(2 * np.pi * 5 * a.timestamps[inner]), atol=1e-2)
@@ -0,0 +1,98 @@
+import csv
+import json
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from data.Export import RAW_MAGIC, ExportCancelled, ExportMonitor, NpzExporter, SegmentReader, export_segment
+from data.Timeseries import Timeseries
+
+
+def make_timeseries(samples=1000, rate=100.0):
+    timestamps = np.arange(samples) / rate
+    rng = np.random.default_rng(0)
+    return [Timeseries(rng.normal(size=samples), rate, name, timestamps) for name in ("a", "b")]
+
+
+def read_raw(path):
+    with open(path, "rb") as raw_file:
+        assert raw_file.read(len(RAW_MAGIC)) == RAW_MAGIC
+        (length,) = struct.unpack("<I", raw_file.read(4))
+        header = json.loads(raw_file.read(length))
+    samples = header["samples"]
+    time = np.memmap(path, "<f8", "r", header["data_offset"], (samples,))
+    data = np.memmap(path, header["dtype"], "r", header["data_offset"] + samples * 8, (len(header["names"]), samples))
+    return header, np.array(time), np.array(data)
+
+
+@pytest.mark.parametrize("chunk_samples", [64, 1 << 16])
+def test_round_trips(tmp_path, monkeypatch, chunk_samples):
+    monkeypatch.setattr(SegmentReader.__init__, "__defaults__", (chunk_samples,))
+    timeseries = make_timeseries()
+    first, stop = 150, 801  # Samples of the segment [1.5 s, 8 s]
+    expected = np.stack([ts.values[first:stop] for ts in timeseries])
+    expected_time = timeseries[0].timestamps[first:stop]
+
+    assert export_segment(str(tmp_path / "s.npz"), timeseries, 1.5, 8.0) == stop - first
+    with np.load(tmp_path / "s.npz") as archive:
+        assert np.array_equal(archive["data"], expected)
+        assert np.array_equal(archive["time"], expected_time)
+        assert list(archive["names"]) == ["a", "b"]
+        assert archive["sampling_rate"] == 100.0
+        assert archive["start_time"] == expected_time[0]
+
+    export_segment(str(tmp_path / "s.bin"), timeseries, 1.5, 8.0, dtype="float32")
+    header, time, data = read_raw(tmp_path / "s.bin")
+    assert header["names"] == ["a", "b"] and header["sampling_rate"] == 100.0
+    assert np.array_equal(time, expected_time)
+    assert np.array_equal(data, expected.astype(np.float32))
+
+    export_segment(str(tmp_path / "s.csv"), timeseries, 1.5, 8.0)
+    with open(tmp_path / "s.csv", newline="") as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert rows[0] == ["time", "a", "b"]
+    table = np.array(rows[1:], dtype=float)
+    assert np.allclose(table[:, 0], expected_time, rtol=1e-12)
+    assert np.allclose(table[:, 1:].T, expected, rtol=1e-11)
+
+
+def test_signals_at_different_rates_are_resampled_on_a_common_grid(tmp_path):
+    slow = Timeseries(np.sin(np.arange(500) / 50 * 2 * np.pi), 50.0, "slow", np.arange(500) / 50)
+    fast = Timeseries(np.cos(np.arange(1000) / 100 * 2 * np.pi), 100.0, "fast", np.arange(1000) / 100)
+    export_segment(str(tmp_path / "m.npz"), [slow, fast], 1.0, 5.0)
+    with np.load(tmp_path / "m.npz") as archive:
+        assert archive["sampling_rate"] == 100.0
+        assert np.allclose(archive["time"], np.arange(100, 501) / 100)
+        assert np.allclose(archive["data"][1], fast.values[100:501])
+        assert np.allclose(archive["data"][0], np.sin(archive["time"] * 2 * np.pi), atol=0.05)
+
+
+class CancelAfter(ExportMonitor):
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def update(self, samples_written, total_samples):
+        self.chunks -= 1
+
+    def cancelled(self):
+        return self.chunks <= 0
+
+
+@pytest.mark.parametrize("extension", [".csv", ".bin", ".npz"])
+def test_cancelled_export_removes_the_file(tmp_path, monkeypatch, extension):
+    monkeypatch.setattr(SegmentReader.__init__, "__defaults__", (64,))
+    path = str(tmp_path / ("s" + extension))
+    with pytest.raises(ExportCancelled):
+        export_segment(path, make_timeseries(), 0, 10, monitor=CancelAfter(2))
+    assert not os.path.exists(path)
+
+
+def test_aborted_npz_does_not_write_the_timestamps(tmp_path, monkeypatch):
+    reader = SegmentReader(make_timeseries(), 0, 10)
+    exporter = NpzExporter(str(tmp_path / "s.npz"), reader, "float64")
+    exporter.write(0, reader.times(0, 10), reader.values(0, 10))
+    monkeypatch.setattr(reader, "times", lambda start, stop: pytest.fail("timestamps read by abort"))
+    exporter.abort()
+    assert exporter.archive.fp is None
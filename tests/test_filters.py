@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from local_tools.filters import (
+    apply_geordi_filtering,
+    butter_lowpass,
+    butter_lowpass_filter,
+    design_cascade,
+    geordi_cascade,
+    normalize_range,
+)
+
+
+def reference_geordi_filtering(y, fs):
+    # The implementation before the filters were designed as cascades: eleven consecutive filtfilt calls
+    b, a = signal.iirnotch(60, 10, fs)
+    y = signal.filtfilt(b, a, y)
+    for frequency in (60 * 2, 60 * 3, 17, 17 * 2, 17 * 3, 17 * 4, 17 * 5, 17 * 6):
+        b, a = signal.iirnotch(frequency, 30, fs)
+        y = signal.filtfilt(b, a, y)
+    b, a = signal.butter(4, 50 / (fs / 2), "low")
+    y = signal.filtfilt(b, a, y)
+    b, a = signal.butter(4, 4 / (fs / 2), "high")
+    return signal.filtfilt(b, a, y)
+
+
+def make_signal(fs, seconds=10):
+    rng = np.random.default_rng(int(fs))
+    t = np.arange(int(seconds * fs)) / fs
+    return 3 + np.sin(2 * np.pi * 10 * t) + 0.5 * np.sin(2 * np.pi * 60 * t) + 0.2 * rng.normal(size=len(t))
+
+
+@pytest.mark.parametrize("fs", [500, 1000, 2000])
+def test_geordi_is_one_zero_phase_pass_including_edges(fs):
+    y = make_signal(fs)
+    cascade = geordi_cascade(fs)
+    expected = signal.sosfiltfilt(cascade.sos, y, padtype="odd", padlen=min(cascade.settling_samples(), len(y) - 1))
+    filtered = apply_geordi_filtering(y, fs)
+    peak = np.max(np.abs(expected))
+    assert np.max(np.abs(filtered - expected)) < 1e-12 * peak
+    edges = np.r_[0:200, len(y) - 200 : len(y)]
+    assert np.max(np.abs(filtered[edges] - expected[edges])) < 1e-12 * peak
+
+
+@pytest.mark.parametrize("fs", [500, 1000, 2000])
+def test_geordi_matches_consecutive_filtfilt_calls_past_the_settling_length(fs):
+    # Only the edge padding differs from the former eleven passes: one settling length from each end on
+    y = make_signal(fs, seconds=60)
+    settling = geordi_cascade(fs).settling_samples()
+    expected = reference_geordi_filtering(y, fs)
+    filtered = apply_geordi_filtering(y, fs)
+    interior = slice(settling, len(y) - settling)
+    assert np.max(np.abs(filtered[interior] - expected[interior])) < 1e-6 * np.max(np.abs(expected))
+
+
+def test_single_filter_matches_filtfilt():
+    y = make_signal(1000, seconds=2)
+    b, a = butter_lowpass(40, 1000, order=4)
+    expected = signal.filtfilt(b, a, y)
+    settling = design_cascade((("butter", 4, 40, "lowpass"),), 1000).settling_samples()
+    interior = slice(settling, len(y) - settling)
+    assert np.allclose(butter_lowpass_filter(y, 40, 1000, order=4)[interior], expected[interior], atol=1e-6)
+
+
+def test_geordi_filters_2d_rows_like_1d():
+    data = np.stack([make_signal(500), make_signal(500)[::-1].copy()])
+    filtered = apply_geordi_filtering(data, 500)
+    for row, filtered_row in zip(data, filtered):
+        assert np.allclose(filtered_row, apply_geordi_filtering(row, 500))
+
+
+def test_normalize_range():
+    values = np.array([2.0, 4.0, 3.0])
+    assert np.allclose(normalize_range(values), [-1, 1, 0])
+    # Extrema of the whole signal applied to a window of it
+    assert np.allclose(normalize_range(values[2:], (2.0, 4.0)), [0])
+
+
+def test_normalize_range_of_a_flat_signal_is_finite():
+    assert np.array_equal(normalize_range(np.full(5, 7.0)), np.zeros(5))
+    data = np.array([[1.0, 1.0, 1.0], [0.0, 5.0, 10.0]])
+    normalized = normalize_range(data, (data.min(axis=1, keepdims=True), data.max(axis=1, keepdims=True)))
+    assert np.array_equal(normalized, [[0, 0, 0], [-1, 0, 1]])
+
+
+def test_batch_normalizes_like_the_viewer():
+    from batch import parse_pipeline, process_store
+    from data.SignalStore import SignalStore
+
+    data = np.vstack([np.full(1000, 3.0), np.sin(np.arange(1000) / 10)])
+    store = SignalStore(data, None, 100, ["flat", "sine"])
+    results = process_store(store, parse_pipeline('{"normalize": true, "dtype": "float64"}'), {})
+    assert np.all(np.isfinite(results["data"]))
+    assert np.array_equal(results["data"][0], np.zeros(1000))
+    assert np.allclose(results["data"][1], normalize_range(data[1]))
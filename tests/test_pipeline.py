@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from data.Pipeline import FilterStage, NormalizeStage, OffsetStage, Pipeline, filter_by_window
+from local_tools.filters import design_cascade, normalize_range
+
+RATE = 500.0
+LOWPASS = (("butter", 4, 40.0, "lowpass"),)
+BAND = (("notch", 60, 30), ("butter", 4, 4, "highpass"), ("butter", 4, 50, "lowpass"))
+
+
+def make_signal(samples=50_000):
+    rng = np.random.default_rng(0)
+    t = np.arange(samples) / RATE
+    return np.sin(2 * np.pi * 7 * t) + 0.3 * np.sin(2 * np.pi * 60 * t) + 0.2 * rng.normal(size=samples) + 2
+
+
+WINDOWS = [(0, 1000), (10_000, 12_000), (25_000, 25_001), (48_500, 50_000), (0, 50_000)]
+
+
+@pytest.mark.parametrize("stages", [LOWPASS, BAND])
+@pytest.mark.parametrize("causal", [False, True])
+def test_windows_match_the_whole_signal(stages, causal):
+    raw = make_signal()
+    pipeline = Pipeline()
+    pipeline.append(FilterStage(stages, causal))
+    cascade = design_cascade(stages, RATE)
+    full = cascade.filter(raw) if causal else cascade.filtfilt(raw)
+    peak = np.max(np.abs(full))
+    for start, stop in WINDOWS:
+        window = pipeline.evaluate(raw, RATE, start, stop)
+        assert np.max(np.abs(window - full[start:stop])) < 1e-5 * peak
+
+
+def test_chained_stages_and_normalization_use_the_whole_signal():
+    raw = make_signal()
+    pipeline = Pipeline()
+    pipeline.append(FilterStage(LOWPASS))
+    pipeline.append(NormalizeStage())
+    pipeline.append(OffsetStage(3))
+    filtered = design_cascade(LOWPASS, RATE).filtfilt(raw)
+    full = normalize_range(filtered) + 3
+    assert np.allclose(pipeline.evaluate_full(raw, RATE), full, atol=1e-5)
+    for start, stop in WINDOWS:
+        assert np.allclose(pipeline.evaluate(raw, RATE, start, stop), full[start:stop], atol=1e-5)
+
+
+def test_raw_values_are_never_modified_and_changed_stages_recompute():
+    raw = make_signal(5000)
+    copy = raw.copy()
+    pipeline = Pipeline()
+    pipeline.append(OffsetStage(1))
+    pipeline.append(OffsetStage(2))
+    assert np.array_equal(pipeline.evaluate(raw, RATE, 100, 200), copy[100:200] + 1 + 2)
+    pipeline.set_stage(1, OffsetStage(-1))
+    assert np.array_equal(pipeline.evaluate(raw, RATE, 100, 200), copy[100:200] + 1 - 1)
+    assert np.array_equal(raw, copy)
+
+
+def test_windows_follow_in_place_changes_of_the_raw_values():
+    raw = make_signal(20_000)
+    pipeline = Pipeline()
+    pipeline.append(FilterStage(LOWPASS))
+    before = pipeline.evaluate(raw, RATE, 9000, 11_000).copy()
+    far = pipeline.evaluate(raw, RATE, 0, 1000).copy()
+    raw[10_000:10_010] += 50
+    pipeline.raw_changed(raw, RATE, 10_000, 10_010)
+    after = pipeline.evaluate(raw, RATE, 9000, 11_000)
+    assert not np.allclose(before, after)
+    full = design_cascade(LOWPASS, RATE).filtfilt(raw)
+    assert np.max(np.abs(after - full[9000:11_000])) < 1e-5 * np.max(np.abs(full))
+    assert np.array_equal(pipeline.evaluate(raw, RATE, 0, 1000), far)
+
+
+def test_memoized_windows_do_not_keep_their_padding_alive():
+    raw = make_signal(20_000)
+    pipeline = Pipeline()
+    pipeline.append(FilterStage(LOWPASS))
+    pipeline.append(OffsetStage(1))
+    window = pipeline.evaluate(raw, RATE, 9000, 9100)
+    assert window.base is None
+    assert pipeline.cached_bytes == sum(values.nbytes for values in pipeline.windows.values())
+    assert all(values.base is None for values in pipeline.windows.values())
+
+
+@pytest.mark.parametrize("causal", [False, True])
+@pytest.mark.parametrize("out_of_core", [False, True])
+def test_filtering_by_window_matches_each_pipeline(causal, out_of_core, monkeypatch):
+    monkeypatch.setattr("data.Pipeline.SPILL_WINDOW_SAMPLES", 8192)
+    raws = [make_signal(30_000) * (channel + 1) for channel in range(3)]
+    pipelines = []
+    for _ in raws:
+        pipeline = Pipeline()
+        pipeline.out_of_core = out_of_core
+        pipeline.result_dtype = np.dtype(np.float32)
+        pipeline.append(OffsetStage(-2))
+        pipeline.append(FilterStage(BAND, causal))
+        pipelines.append(pipeline)
+    filter_by_window(pipelines, raws, RATE, design_cascade(BAND, RATE), causal)
+    for pipeline, raw in zip(pipelines, raws):
+        result = pipeline.full_results[pipeline.chain_key()]
+        assert result.dtype == np.float32 and isinstance(result, np.memmap) == out_of_core
+        cascade = design_cascade(BAND, RATE)
+        expected = cascade.filter(raw - 2) if causal else cascade.filtfilt(raw - 2)
+        assert np.max(np.abs(result - expected)) < 1e-5 * np.max(np.abs(expected))
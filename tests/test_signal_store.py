@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from data.SignalStore import SignalStore
+
+
+def make_store(storage):
+    data = np.array([[0.0, 1.5, -2.0, 4.0, np.nan, 3.25], [10.0, 11.0, 12.0, 13.0, 14.0, 15.0]])
+    store = SignalStore(data.copy(), None, 100, ["a", "b"])
+    store.convert(storage)
+    return data, store
+
+
+@pytest.mark.parametrize("storage", ["float32", "int32", "int16"])
+def test_single_samples_of_compact_channels_decode_to_floats(storage):
+    data, store = make_store(storage)
+    channel = store.channel(0)
+    tolerance = 6 / 32767
+    assert isinstance(channel[3], np.floating)
+    assert channel[3] == pytest.approx(4.0, abs=tolerance)
+    assert np.isnan(channel[4])
+    assert np.allclose(channel[1:4], data[0, 1:4], atol=tolerance)
+    assert np.array_equal(np.isnan(np.asarray(channel)), np.isnan(data[0]))
+
+
+@pytest.mark.parametrize("storage", ["float32", "int32", "int16"])
+def test_single_samples_of_compact_channels_are_encoded(storage):
+    data, store = make_store(storage)
+    channel = store.channel(1)
+    channel[2] = 12.5
+    channel[3] = np.nan
+    assert channel[2] == pytest.approx(12.5, abs=5 / 32767)
+    assert np.isnan(channel[3])
+    assert channel[5] == pytest.approx(15.0, abs=5 / 32767)
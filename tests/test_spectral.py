@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import scipy.fft
+from scipy import signal
+
+from data.Timeseries import Timeseries
+from local_tools.spectral import SpectrogramTiler, TileCache, stft_power, welch_psd
+
+
+def periodogram(segment, window):
+    return np.abs(np.fft.rfft(segment * window)) ** 2 / np.sum(window**2)
+
+
+@pytest.mark.parametrize("hop", [64, 256, 512, 700, 1000])
+def test_stft_power_frames(hop):
+    nperseg = 256
+    values = np.random.default_rng(0).normal(size=10_000)
+    window = np.hanning(nperseg)
+    power = stft_power(values, nperseg, hop, window)
+    if hop < nperseg:
+        count = (len(values) - nperseg) // hop + 1
+    else:
+        count = len(values) // hop
+    assert power.shape == (count, nperseg // 2 + 1)
+    segments = max(hop // nperseg, 1)
+    for frame in (0, count // 2, count - 1):
+        start = frame * hop
+        expected = np.mean(
+            [periodogram(values[start + k * nperseg : start + (k + 1) * nperseg], window) for k in range(segments)],
+            axis=0,
+        )
+        assert np.allclose(power[frame], expected)
+
+
+def test_tile_keys_follow_the_data_not_the_array():
+    cache = TileCache()
+    values = np.random.default_rng(1).normal(size=4096)
+    first = Timeseries(values, 100, "a")
+    second = Timeseries(values, 100, "b")
+    first_tiler = SpectrogramTiler(first, nperseg=64, cache=cache, workers=1)
+    second_tiler = SpectrogramTiler(second, nperseg=64, cache=cache, workers=1)
+    try:
+        # Two timeseries sharing the same array still have their own tiles (their pipelines can differ)
+        assert first_tiler.tile_key(32, 0) != second_tiler.tile_key(32, 0)
+        key = first_tiler.tile_key(32, 0)
+        assert first_tiler.tile_key(32, 0) == key
+        first.values = values.copy()
+        assert first_tiler.tile_key(32, 0) != key
+    finally:
+        first_tiler.shutdown()
+        second_tiler.shutdown()
+
+
+
+def test_tiler_frequencies_of_an_irregular_stream():
+    from data.Alignment import effective_rate
+
+    timestamps = 2.0 + np.cumsum(np.random.default_rng(3).uniform(0.5, 1.5, 4096)) / 200.0
+    timeseries = Timeseries(np.zeros(4096), 0, "irregular", timestamps)
+    rate = effective_rate(timestamps, timeseries.sampling_rate)
+    tiler = SpectrogramTiler(timeseries, nperseg=64, workers=1, sampling_rate=rate)
+    try:
+        assert 190 < rate < 210
+        assert np.isclose(tiler.frequencies()[-1], rate / 2)
+    finally:
+        tiler.shutdown()
+
+@pytest.mark.parametrize("nperseg, noverlap", [(256, None), (1000, None), (256, 64), (4096, None)])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_welch_psd_matches_scipy(nperseg, noverlap, workers):
+    data = np.random.default_rng(2).normal(size=(5, 3000)) + np.arange(5)[:, None]
+    frequencies, psd = welch_psd(data, 500.0, nperseg, noverlap=noverlap, workers=workers)
+    expected_frequencies, expected = signal.welch(data, 500.0, nperseg=min(nperseg, 3000), noverlap=noverlap,
+                                                  nfft=scipy.fft.next_fast_len(min(nperseg, 3000), real=True))
+    assert np.allclose(frequencies, expected_frequencies, rtol=0, atol=1e-12)
+    assert np.max(np.abs(psd - expected)) <= 1e-14 * np.max(expected)
+
+
+def test_welch_psd_of_one_channel_and_of_no_sample():
+    values = np.sin(2 * np.pi * 50 * np.arange(2048) / 1000.0)
+    frequencies, psd = welch_psd(values, 1000.0, 512)
+    assert psd.shape == (1, len(frequencies))
+    assert abs(frequencies[np.argmax(psd[0])] - 50) <= frequencies[1]
+    _, empty = welch_psd(np.empty((2, 0)), 1000.0)
+    assert empty.shape[0] == 2 and np.all(np.isnan(empty))
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from data.StatisticsIndex import StatisticsIndex
+from data.Timeseries import Timeseries
+
+
+def make_values(samples=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=samples) * 3 + 1
+    values[rng.integers(0, samples, samples // 50)] = np.nan
+    values[5000:5200] = np.nan  # A whole run of blocks without sample
+    return values
+
+
+def assert_matches(statistics, values):
+    finite = values[~np.isnan(values)]
+    assert statistics.count == len(finite)
+    if len(finite) == 0:
+        assert np.isnan(statistics.minimum) and np.isnan(statistics.maximum) and np.isnan(statistics.mean)
+        return
+    assert statistics.minimum == finite.min()
+    assert statistics.maximum == finite.max()
+    assert statistics.mean == pytest.approx(finite.mean(), rel=1e-9, abs=1e-12)
+    assert statistics.rms == pytest.approx(np.sqrt(np.mean(finite**2)), rel=1e-9)
+    assert statistics.standard_deviation == pytest.approx(finite.std(), rel=1e-6, abs=1e-9)
+    assert statistics.peak_to_peak == finite.max() - finite.min()
+
+
+def random_ranges(length, count, seed=1):
+    rng = np.random.default_rng(seed)
+    ranges = [(0, length), (0, 1), (length - 1, length), (63, 65), (64, 128), (5000, 5200), (4990, 5210)]
+    for _ in range(count):
+        start, stop = sorted(rng.integers(0, length + 1, 2))
+        ranges.append((start, stop))
+    return ranges
+
+
+@pytest.mark.parametrize("factor, base_block, chunk_samples", [(4, 64, 1 << 20), (2, 16, 1000), (8, 100, 333)])
+def test_queries_match_brute_force(factor, base_block, chunk_samples):
+    values = make_values()
+    index = StatisticsIndex(lambda start, stop: values[start:stop], len(values), factor, base_block, chunk_samples)
+    for start, stop in random_ranges(len(values), 200):
+        assert_matches(index.query(start, stop), values[start:stop])
+    finite = values[~np.isnan(values)]
+    assert index.extrema() == (finite.min(), finite.max())
+
+
+def test_empty_ranges_and_signals():
+    values = make_values(1000)
+    index = StatisticsIndex(lambda start, stop: values[start:stop], len(values))
+    assert index.query(10, 10).count == 0
+    assert index.query(-50, 0).count == 0
+    assert_matches(index.query(-50, 5000), values)
+    empty = StatisticsIndex(lambda start, stop: np.empty(0), 0)
+    assert np.isnan(empty.extrema()[0])
+
+
+def test_updates_only_touch_the_changed_blocks():
+    values = make_values()
+    reads = []
+
+    def read(start, stop):
+        reads.append((start, stop))
+        return values[start:stop]
+
+    index = StatisticsIndex(read, len(values), base_block=64)
+    rng = np.random.default_rng(2)
+    for start in (0, 130, 5100, 19_990):
+        stop = min(start + 25, len(values))
+        values[start:stop] = rng.normal(size=stop - start) * 100
+        values[start] = np.nan
+        reads.clear()
+        index.update(start, stop)
+        assert all(hi - lo <= 2 * 64 for lo, hi in reads)
+        for query_start, query_stop in random_ranges(len(values), 50, seed=start):
+            assert_matches(index.query(query_start, query_stop), values[query_start:query_stop])
+
+
+def test_timeseries_statistics_follow_writes_and_the_pipeline():
+    from data.Pipeline import OffsetStage
+
+    values = make_values(5000)
+    timeseries = Timeseries(values.copy(), 100, "s")
+    assert_matches(timeseries.statistics.query(100, 4000), values[100:4000])
+    timeseries.write(1000, np.full(10, 1e6))
+    values[1000:1010] = 1e6
+    assert timeseries.statistics.query(0, 5000).maximum == 1e6
+    timeseries.pipeline.append(OffsetStage(2))
+    assert_matches(timeseries.statistics.query(100, 4000), values[100:4000] + 2)
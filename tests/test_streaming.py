@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from data.RingBuffer import RingBuffer
+from local_tools.filters import StreamingFilter, design_cascade, geordi_cascade, geordi_streaming_filter
+
+RATE = 500.0
+
+
+def make_signal(channels=3, samples=10_000):
+    return np.random.default_rng(0).normal(size=(channels, samples)) + np.arange(channels)[:, None]
+
+
+def block_sizes(samples, seed=1):
+    rng = np.random.default_rng(seed)
+    sizes = []
+    while sum(sizes) < samples:
+        sizes.append(int(rng.choice([1, 7, 64, 333, 1024])))
+    return sizes
+
+
+@pytest.mark.parametrize(
+    "cascade",
+    [design_cascade((("butter", 4, 40.0, "lowpass"),), RATE), geordi_cascade(RATE)],
+)
+def test_streaming_filter_matches_one_causal_pass(cascade):
+    data = make_signal()
+    streaming = StreamingFilter(cascade)
+    blocks, start = [], 0
+    for size in block_sizes(data.shape[1]):
+        blocks.append(streaming.process(data[:, start : start + size]))
+        start += size
+    assert np.allclose(np.concatenate(blocks, axis=1), cascade.filter(data), rtol=0, atol=1e-10)
+
+
+def test_streaming_filter_of_one_channel_and_reset():
+    data = make_signal(1)[0]
+    streaming = geordi_streaming_filter(RATE)
+    first = np.concatenate([streaming.process(data[:5000]), streaming.process(data[5000:])])
+    assert np.allclose(first, geordi_cascade(RATE).filter(data), atol=1e-10)
+    streaming.reset()
+    assert np.allclose(streaming.process(data[:100]), first[:100], atol=1e-12)
+    with pytest.raises(ValueError):
+        streaming.process(np.zeros((2, 10)))
+
+
+def test_ring_buffer_keeps_the_latest_samples():
+    data = make_signal(2, 1000)
+    buffer = RingBuffer(2, 300)
+    assert buffer.latest()[0].shape == (2, 0)
+    written = 0
+    for size in block_sizes(1000, seed=2) + [0]:
+        block = data[:, written : written + size]
+        buffer.write(block)
+        written += block.shape[1]
+        samples, index = buffer.latest()
+        assert index == max(written - 300, 0)
+        assert np.array_equal(samples, data[:, index:written])
+        samples, index = buffer.latest(50)
+        assert index == max(written - 50, 0)
+        assert np.array_equal(samples, data[:, index:written])
+
+
+def test_ring_buffer_burst_longer_than_the_capacity():
+    data = make_signal(2, 1000)
+    buffer = RingBuffer(2, 300)
+    buffer.write(data[:, :10])
+    buffer.write(data[:, 10:760])
+    samples, index = buffer.latest()
+    assert buffer.total_written == 760
+    assert index == 460
+    assert np.array_equal(samples, data[:, 460:760])
+    with pytest.raises(ValueError):
+        buffer.write(np.zeros((3, 10)))
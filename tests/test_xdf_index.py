@@ -0,0 +1,108 @@
+import gzip
+import struct
+
+import numpy as np
+import pytest
+
+from data.XdfIndex import read_xdf_streams
+
+
+def length_prefix(length, size):
+    return struct.pack({1: "<BB", 4: "<BI", 8: "<BQ"}[size], size, length)
+
+
+def chunk(tag, content, size=4):
+    return length_prefix(len(content) + 2, size) + struct.pack("<H", tag) + content
+
+
+def stream_header(stream_id, name, stream_type, channels, rate, channel_format, labels=()):
+    description = "".join(f"<channel><label>{label}</label></channel>" for label in labels)
+    xml = (
+        f"<?xml version='1.0'?><info><name>{name}</name><type>{stream_type}</type>"
+        f"<channel_count>{channels}</channel_count><nominal_srate>{rate}</nominal_srate>"
+        f"<channel_format>{channel_format}</channel_format><desc><channels>{description}</channels></desc></info>"
+    )
+    return chunk(2, struct.pack("<I", stream_id) + xml.encode())
+
+
+def samples_chunk(stream_id, payload_bytes, size=4):
+    return chunk(3, struct.pack("<I", stream_id) + bytes(payload_bytes), size)
+
+
+def write_file(path):
+    content = b"XDF:" + chunk(1, b"<?xml version='1.0'?><info><version>1.0</version></info>")
+    content += stream_header(7, "EEG amp", "EEG", 3, 250, "float32", ["Fz", "Cz", "Pz"])
+    content += stream_header(2, "Triggers", "Markers", 1, 0, "string")
+    content += samples_chunk(7, 1000) + samples_chunk(2, 30, 1) + samples_chunk(7, 500, 8)
+    content += samples_chunk(99, 40)  # Samples of a stream without header are ignored
+    content += chunk(4, struct.pack("<I", 7) + bytes(16))  # Clock offset
+    content += chunk(6, struct.pack("<I", 7) + b"<?xml version='1.0'?><info></info>")
+    path.write_bytes(content)
+    return content
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_streams_are_listed_from_the_headers(tmp_path, compressed):
+    path = tmp_path / "recording.xdf"
+    content = write_file(path)
+    if compressed:
+        path = tmp_path / "recording.xdfz"
+        path.write_bytes(gzip.compress(content))
+    eeg, markers = read_xdf_streams(str(path))
+    assert (eeg.stream_id, eeg.name, eeg.stream_type) == (7, "EEG amp", "EEG")
+    assert (eeg.channel_count, eeg.nominal_srate, eeg.channel_format) == (3, 250.0, "float32")
+    assert eeg.channel_labels == ["Fz", "Cz", "Pz"]
+    assert eeg.sample_bytes == 1500 and eeg.is_numeric()
+    assert (markers.stream_id, markers.nominal_srate, markers.channel_labels) == (2, 0.0, [])
+    assert markers.sample_bytes == 30 and not markers.is_numeric()
+
+
+def test_samples_are_skipped_without_being_read(tmp_path, monkeypatch):
+    path = tmp_path / "recording.xdf"
+    write_file(path)
+    sizes = []
+    original_open = open
+
+    class CountingFile:
+        def __init__(self, handle):
+            self.handle = handle
+
+        def read(self, size=-1):
+            data = self.handle.read(size)
+            sizes.append(len(data))
+            return data
+
+        def __getattr__(self, name):
+            return getattr(self.handle, name)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.handle.close()
+
+    monkeypatch.setattr("builtins.open", lambda *args, **kwargs: CountingFile(original_open(*args, **kwargs)))
+    read_xdf_streams(str(path))
+    assert max(sizes) < 500  # The sample chunks (up to 1000 bytes) are seeked over
+
+
+def test_not_an_xdf_file(tmp_path):
+    path = tmp_path / "recording.xdf"
+    path.write_bytes(b"time,a\n0,1\n")
+    with pytest.raises(ValueError):
+        read_xdf_streams(str(path))
+
+
+def test_headers_agree_with_pyxdf(tmp_path):
+    pyxdf = pytest.importorskip("pyxdf")
+    from benchmark import write_xdf
+
+    path = str(tmp_path / "benchmark.xdf")
+    write_xdf(path, np.random.default_rng(0).normal(size=(4, 25_000)))
+    (stream,) = read_xdf_streams(path)
+    streams, _ = pyxdf.load_xdf(path)
+    assert stream.stream_id == streams[0]["info"]["stream_id"]
+    assert stream.channel_count == int(streams[0]["info"]["channel_count"][0]) == 4
+    assert stream.nominal_srate == float(streams[0]["info"]["nominal_srate"][0])
+    # Each sample takes a timestamp flag, a timestamp and a float32 per channel
+    assert stream.sample_bytes == 25_000 * (1 + 8 + 4 * 4) + 3 * 5  # Plus the sample count of each chunk